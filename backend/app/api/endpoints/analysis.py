@@ -1,35 +1,76 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
-import os
+from typing import List, Optional, Dict, Any, Tuple, Union
+import asyncio
+import hashlib
 import json
 
-from langchain_groq import ChatGroq
-from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
 from youtube_transcript_api import TranscriptsDisabled, NoTranscriptFound
 
-from app.services.prompts import (
-    SUMMARY_PROMPT, 
-    MINDMAP_PROMPT, 
-    QUIZ_PROMPT, 
-    FLASHCARD_PROMPT
+from app.services.youtube import (
+    extract_video_id,
+    get_transcript_with_track,
+    get_video_metadata,
+    metadata_cache_stats,
+    timed_transcript,
 )
-from app.services.youtube import extract_video_id, get_video_metadata, get_transcript
+from app.services.batch import BatchRunner, batch_max_videos, resolve_video_ids
+from app.services.executor import run_blocking
+from app.services.jobs import Job, JobFn, QueueFull, get_job_queue
+from app.services.logger import get_logger
+from app.services.llm import LLMRegistry, get_llm_registry
+from app.services.longdoc import fit_transcript
+from app.services.metrics import REGISTRY, Sample, cache_samples, count_error
+from app.services.retrieval import start_retrieval_index
+from app.services.scheduler import BATCH, get_llm_scheduler, is_rate_limit
+from app.services.response_cache import cache_bypass, get_response_cache
+from app.services.sessions import AnalysisSession, get_session_store
+from app.services.singleflight import SingleFlight
+from app.services.streaming import SSE_HEADERS, sse_event
+from app.services.timing import StageTimer
+from app.services.transcript_store import transcript_cache_stats
 
 router = APIRouter()
+log = get_logger(__name__)
+
+# In-flight deduplication of identical summary pipelines and LLM generations
+inflight = SingleFlight()
 
 # --- Dependencies & Helpers ---
-def get_llm():
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
+def _require_llm_registry() -> LLMRegistry:
+    registry = get_llm_registry()
+    if registry is None:
         raise HTTPException(status_code=500, detail="GROQ_API_KEY not configured")
-    
-    return ChatGroq(
-        groq_api_key=api_key,
-        model_name="llama-3.3-70b-versatile",
-        temperature=0.3,
-        max_tokens=4096
-    )
+    return registry
+
+def get_chain(name: str, priority: Optional[int] = None):
+    """Prebuilt chain for `name` ("summary", "mindmap", "quiz", "flashcards", "chat")."""
+    return _require_llm_registry().chain(name, priority)
+
+def resolve_session(
+    analysis_id: Optional[str],
+    transcript: Optional[str] = None,
+    title: Optional[str] = None,
+) -> AnalysisSession:
+    """
+    Look up the stored analysis session, or wrap an uploaded transcript
+    in a transient (unstored) one for clients that still send it.
+    """
+    if analysis_id:
+        session = get_session_store().get(analysis_id)
+        if session is None:
+            raise HTTPException(
+                status_code=404,
+                detail={"code": "ERR_ANALYSIS_NOT_FOUND", "message": "분석 세션이 만료되었습니다. 영상을 다시 분석해주세요. (Analysis Session Expired)"}
+            )
+        return session
+    if not transcript:
+        raise HTTPException(
+            status_code=400,
+            detail={"code": "ERR_MISSING_TRANSCRIPT", "message": "analysis_id 또는 transcript가 필요합니다. (analysis_id or transcript required)"}
+        )
+    return AnalysisSession(id="", video_id="", title=title or "", transcript=transcript)
 
 # --- Request/Response Models ---
 class SummaryRequest(BaseModel):
@@ -37,9 +78,22 @@ class SummaryRequest(BaseModel):
     length: str = "MEDIUM"
     language: str = "ko"
 
+class StudyPackRequest(SummaryRequest):
+    # One multi-output prompt instead of four concurrent chains
+    batched: bool = False
+
+class BatchRequest(BaseModel):
+    # Video and/or playlist URLs; duplicates are analyzed once
+    urls: List[str]
+    length: str = "MEDIUM"
+    language: str = "ko"
+    include_transcript: bool = False
+
 class BaseAnalysisRequest(BaseModel):
-    transcript: str
-    title: str
+    # Either analysis_id (from /summary) or the full transcript + title
+    analysis_id: Optional[str] = None
+    transcript: Optional[str] = None
+    title: Optional[str] = None
 
 class VideoMetadata(BaseModel):
     id: str
@@ -51,10 +105,43 @@ class VideoMetadata(BaseModel):
     publishedAt: str
     views: int
 
+class TranscriptTrack(BaseModel):
+    language_code: str
+    language: str
+    is_generated: bool
+    translated_from: Optional[str] = None
+
 class SummaryResponse(BaseModel):
+    analysis_id: str
     metadata: VideoMetadata
     summary: str 
     transcript: str
+    transcript_track: Optional[TranscriptTrack] = None
+    timings: Dict[str, float] = {}
+
+class BatchResponse(BaseModel):
+    # One record per video, in input order (see app.services.batch)
+    results: List[Dict[str, Any]]
+    invalid: List[str] = []
+    stats: Dict[str, Any]
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+    events_url: str
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str  # queued | running | succeeded | failed
+    stage: Optional[str] = None
+    stages: Dict[str, float] = {}
+    result: Optional[Union[SummaryResponse, BatchResponse]] = None
+    error: Optional[Dict[str, Any]] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
 
 class MindMapResponse(BaseModel):
     markdown_code: str
@@ -76,139 +163,593 @@ class FlashcardResponse(BaseModel):
     flashcards: List[FlashcardItem]
 
 
+# --- Pipeline Helpers ---
+
+LENGTH_DESCRIPTIONS = {
+    "SHORT": "Brief/Concise",
+    "MEDIUM": "Moderate/Standard",
+    "LONG": "Detailed/In-depth"
+}
+
+def rate_limit_error() -> HTTPException:
+    """The provider kept rate-limiting us after the scheduler's retries."""
+    return HTTPException(
+        status_code=429, 
+        detail={"code": "ERR_LLM_RATE_LIMIT", "message": "AI 모델 사용량이 초과되었습니다. 잠시 후 다시 시도해주세요. (Rate Limit Exceeded)"}
+    )
+
+def summary_error(e: Exception) -> HTTPException:
+    """Map a failure in the summary pipeline to the API's error codes."""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, TranscriptsDisabled):
+        return HTTPException(
+            status_code=400, 
+            detail={"code": "ERR_YT_TRANSCRIPT_DISABLED", "message": "이 동영상은 자막이 비활성화되어 있습니다. (Transcripts Disabled)"}
+        )
+    if isinstance(e, NoTranscriptFound):
+        return HTTPException(
+            status_code=404, 
+            detail={"code": "ERR_YT_NO_TRANSCRIPT", "message": "이 동영상에서 자막을 찾을 수 없습니다. (No Transcript Found)"}
+        )
+
+    error_msg = str(e)
+    if is_rate_limit(e):
+        log.warning("analysis.rate_limited", error=error_msg)
+        return rate_limit_error()
+    
+    log.error("analysis.failed", error=error_msg, exc_info=e)
+    return HTTPException(
+        status_code=500, 
+        detail={"code": "ERR_INTERNAL_SERVER", "message": f"서버 내부 오류가 발생했습니다. 담당자에게 문의해주세요.\nDetails: {error_msg}"}
+    )
+
+def error_payload(e: Exception) -> Dict[str, Any]:
+    """summary_error as an SSE / job error payload ({status, detail}), counted in the error metrics."""
+    error = summary_error(e)
+    count_error(error.status_code, error.detail)
+    return {"status": error.status_code, "detail": error.detail}
+
+def require_video_id(url: str) -> str:
+    video_id = extract_video_id(url)
+    if not video_id:
+        raise HTTPException(status_code=400, detail="Invalid YouTube URL")
+    return video_id
+
+def require_transcript(transcript_result: Optional[dict]) -> str:
+    if not transcript_result:
+        raise HTTPException(status_code=404, detail="Could not extract transcript. The video might not have captions or is restricted.")
+    transcript = transcript_result['text']
+    log.debug("analysis.transcript", chars=len(transcript), track=transcript_result['track'])
+    return transcript
+
+def open_session(video_id: str, metadata_dict: dict, transcript_result: dict, index: bool = True) -> AnalysisSession:
+    """Store the transcript server-side and (unless `index` is False) start building its chat index."""
+    session = get_session_store().create(
+        video_id=video_id,
+        title=metadata_dict['title'],
+        transcript=transcript_result['text'],
+        track=transcript_result['track'],
+        segments=timed_transcript(transcript_result),
+    )
+    if index:
+        start_retrieval_index(session)
+    return session
+
+def summary_inputs(transcript: str, title: str, length: str) -> dict:
+    return {
+        "transcript": transcript,
+        "length_desc": LENGTH_DESCRIPTIONS.get(length, "standard"),
+        "title": title
+    }
+
+
+def clean_mermaid(code: str) -> str:
+    # Cleanup code blocks if model insists on adding them
+    return code.replace("```mermaid", "").replace("```", "").strip()
+
+def artifact_inputs(name: str, transcript: str, title: str, options: dict) -> dict:
+    if name in ("summary", "study_pack"):
+        return summary_inputs(transcript, title, options.get("length", "MEDIUM"))
+    return {"transcript": transcript, "title": title}
+
+def artifact_output(name: str, raw: Any) -> Any:
+    """Validate a chain's raw output into the JSON value the endpoint returns."""
+    if name == "mindmap":
+        return MindMapResponse(markdown_code=clean_mermaid(raw)).model_dump()
+    if name == "quiz":
+        # raw should be {"quizzes": [...]}
+        return QuizResponse(**raw).model_dump()
+    if name == "flashcards":
+        return FlashcardResponse(**raw).model_dump()
+    if name == "study_pack":
+        return {
+            "summary": str(raw["summary"]),
+            "mindmap": artifact_output("mindmap", raw["mindmap"]),
+            "quiz": artifact_output("quiz", {"quizzes": raw["quizzes"]}),
+            "flashcards": artifact_output("flashcards", {"flashcards": raw["flashcards"]}),
+        }
+    return raw
+
+async def generate_artifact(
+    name: str,
+    session: AnalysisSession,
+    bypass: bool = False,
+    timer: Optional[StageTimer] = None,
+    priority: Optional[int] = None,
+    **options: Any,
+) -> Tuple[Any, bool]:
+    """
+    Generate one artifact ("summary", "mindmap", "quiz", "flashcards") for a
+    session. Returns (value, cache_hit): served from the response cache when
+    the same transcript, title and options were seen before, and shared with
+    any identical generation already in flight. `priority` overrides the
+    chain's scheduler priority.
+    """
+    timer = timer or StageTimer()
+    cache = get_response_cache()
+    key = cache.key(name, session.transcript, session.title, **options)
+
+    async def compute():
+        transcript = await timer.run("condense", fit_transcript(name, session, _require_llm_registry(), priority))
+        raw = await timer.run("llm", get_chain(name, priority).ainvoke(
+            artifact_inputs(name, transcript, session.title, options)
+        ))
+        return artifact_output(name, raw)
+
+    return await inflight.do(flight_key(key, bypass), lambda: cache.get_or_compute(key, compute, bypass))
+
+def flight_key(key: str, bypass: bool) -> str:
+    """In-flight sharing key: a cache-bypassing request never joins a run that may answer from the cache."""
+    return f"{key}:bypass" if bypass else key
+
+def set_cache_header(response: Response, hit: bool) -> None:
+    response.headers["X-Cache"] = "HIT" if hit else "MISS"
+
+
+async def run_summary_pipeline(
+    video_id: str,
+    request: SummaryRequest,
+    bypass: bool,
+    timer: Optional[StageTimer] = None,
+) -> Tuple[SummaryResponse, bool]:
+    """Metadata + transcript + summary for one video. Returns (response, cache_hit)."""
+    # Fail before fetching anything when no model is configured (the clients
+    # and chains themselves are prebuilt at startup, see main.lifespan)
+    _require_llm_registry()
+    # Metadata and transcript are independent: fetch them concurrently so
+    # latency is the slower of the two, not the sum.
+    timer = timer or StageTimer()
+    metadata_dict, transcript_result = await asyncio.gather(
+        timer.run("metadata", run_blocking(get_video_metadata, video_id)),
+        timer.run("transcript", run_blocking(get_transcript_with_track, video_id)),
+    )
+    transcript = require_transcript(transcript_result)
+
+    session = open_session(video_id, metadata_dict, transcript_result)
+
+    # Generate Summary
+    summary_md, hit = await generate_artifact(
+        "summary", session, bypass, timer,
+        length=request.length, language=request.language,
+    )
+    
+    log.info("summary.generated", video_id=video_id, cache_hit=hit, timings_ms=timer.as_dict())
+    
+    return SummaryResponse(
+        analysis_id=session.id,
+        metadata=VideoMetadata(**metadata_dict),
+        summary=summary_md,
+        transcript=transcript,
+        transcript_track=TranscriptTrack(**transcript_result['track']),
+        timings=timer.as_dict()
+    ), hit
+
+
+async def fetch_for_batch(video_id: str) -> Tuple[dict, dict]:
+    """Batch fetch stage: (metadata, transcript result) for one video."""
+    metadata_dict, transcript_result = await asyncio.gather(
+        run_blocking(get_video_metadata, video_id),
+        run_blocking(get_transcript_with_track, video_id),
+    )
+    require_transcript(transcript_result)
+    return metadata_dict, transcript_result
+
+def batch_summarizer(request: BatchRequest):
+    """Batch LLM stage: summary record for one fetched video, at batch priority."""
+    async def analyze(video_id: str, fetched: Tuple[dict, dict]) -> Dict[str, Any]:
+        metadata_dict, transcript_result = fetched
+        # No chat index: most batch results are never chatted with
+        session = open_session(video_id, metadata_dict, transcript_result, index=False)
+        timer = StageTimer()
+        summary_md, hit = await generate_artifact(
+            "summary", session, False, timer, BATCH,
+            length=request.length, language=request.language,
+        )
+        record = {
+            "analysis_id": session.id,
+            "metadata": VideoMetadata(**metadata_dict).model_dump(),
+            "summary": summary_md,
+            "transcript_track": transcript_result['track'],
+            "cache_hit": hit,
+            "timings": timer.as_dict(),
+        }
+        if request.include_transcript:
+            record["transcript"] = session.transcript
+        return record
+    return analyze
+
+def batch_runner(request: BatchRequest, **limits: Any) -> BatchRunner:
+    return BatchRunner(fetch_for_batch, batch_summarizer(request), error_payload, **limits)
+
+def batch_too_large(count: int) -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail={"code": "ERR_BATCH_TOO_LARGE", "message": f"한 번에 최대 {batch_max_videos()}개 영상까지 분석할 수 있습니다. (Batch Too Large: {count})"}
+    )
+
+def summary_flight_key(video_id: str, request: SummaryRequest, bypass: bool) -> str:
+    return flight_key(f"summary:{video_id}:{request.length}:{request.language}", bypass)
+
+def submit_job(kind: str, key: str, run: JobFn) -> JobSubmitResponse:
+    try:
+        job = get_job_queue().submit(kind, key, run, error_payload)
+    except QueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail={"code": "ERR_JOB_QUEUE_FULL", "message": "대기 중인 분석이 너무 많습니다. 잠시 후 다시 시도해주세요. (Job Queue Full)"}
+        )
+    return JobSubmitResponse(
+        job_id=job.id,
+        status=job.status,
+        status_url=f"/api/analyze/jobs/{job.id}",
+        events_url=f"/api/analyze/jobs/{job.id}/events",
+    )
+
+def require_job(job_id: str) -> Job:
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "ERR_JOB_NOT_FOUND", "message": "작업을 찾을 수 없거나 만료되었습니다. (Job Not Found)"}
+        )
+    return job
+
+
 # --- Endpoints ---
 
 @router.post("/summary", response_model=SummaryResponse)
-async def generate_summary(request: SummaryRequest):
+async def generate_summary(request: SummaryRequest, response: Response, bypass: bool = Depends(cache_bypass)):
     try:
-        print(f"Analyzing URL: {request.url}")
+        log.info("analysis.request", endpoint="summary", url=request.url)
         
         # 1. Extract Info
-        video_id = extract_video_id(request.url)
-        if not video_id:
-            raise HTTPException(status_code=400, detail="Invalid YouTube URL")
-        
-        print(f"Video ID extracted: {video_id}")
-        
-        metadata_dict = get_video_metadata(video_id)
-        print(f"Metadata fetched: {metadata_dict.get('title')}")
+        video_id = require_video_id(request.url)
         
-        transcript = get_transcript(video_id)
-        if not transcript:
-            print("Transcript extraction failed.")
-            raise HTTPException(status_code=404, detail="Could not extract transcript. The video might not have captions or is restricted.")
+        # Concurrent requests for the same video share one pipeline run
+        result, hit = await inflight.do(
+            summary_flight_key(video_id, request, bypass), lambda: run_summary_pipeline(video_id, request, bypass)
+        )
         
-        print(f"Transcript fetched (Length: {len(transcript)})")
+        response.headers["Server-Timing"] = StageTimer.format_server_timing(result.timings)
+        set_cache_header(response, hit)
+        return result
+    except Exception as e:
+        raise summary_error(e)
 
-        # 2. Generate Summary
-        print("Initializing LLM...")
-        llm = get_llm()
-        
-        print("Invoking Chain...")
-        chain = SUMMARY_PROMPT | llm | StrOutputParser()
-        
-        processed_transcript = transcript[:25000] 
-        
-        length_map = {
-            "SHORT": "Brief/Concise",
-            "MEDIUM": "Moderate/Standard",
-            "LONG": "Detailed/In-depth"
-        }
-        
-        summary_md = chain.invoke({
-            "transcript": processed_transcript,
-            "length_desc": length_map.get(request.length, "standard"),
-            "title": metadata_dict['title']
-        })
-        
-        print("Summary generated successfully.")
-        
-        return SummaryResponse(
-            metadata=VideoMetadata(**metadata_dict),
-            summary=summary_md,
-            transcript=transcript
-        )
-    except HTTPException as he:
-        raise he
-    except TranscriptsDisabled:
-        print("Error: Transcripts are disabled for this video.")
-        raise HTTPException(
-            status_code=400, 
-            detail={"code": "ERR_YT_TRANSCRIPT_DISABLED", "message": "이 동영상은 자막이 비활성화되어 있습니다. (Transcripts Disabled)"}
+
+@router.post("/summary/stream")
+async def stream_summary(request: SummaryRequest, bypass: bool = Depends(cache_bypass)):
+    """
+    Server-Sent Events variant of /summary. Events, in order:
+    metadata -> transcript (analysis_id, transcript, track) -> token* -> done,
+    or an error event ({status, detail}) at any point.
+    """
+    log.info("analysis.request", endpoint="summary_stream", url=request.url)
+    video_id = require_video_id(request.url)
+    registry = _require_llm_registry()
+
+    async def events():
+        timer = StageTimer()
+        metadata_task = asyncio.ensure_future(
+            timer.run("metadata", run_blocking(get_video_metadata, video_id))
         )
-    except NoTranscriptFound:
-        print("Error: No transcript found.")
-        raise HTTPException(
-            status_code=404, 
-            detail={"code": "ERR_YT_NO_TRANSCRIPT", "message": "이 동영상에서 자막을 찾을 수 없습니다. (No Transcript Found)"}
+        transcript_task = asyncio.ensure_future(
+            timer.run("transcript", run_blocking(get_transcript_with_track, video_id))
         )
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        error_msg = str(e)
-        if "429" in error_msg:
-             raise HTTPException(
-                status_code=429, 
-                detail={"code": "ERR_LLM_RATE_LIMIT", "message": "AI 모델 사용량이 초과되었습니다. 잠시 후 다시 시도해주세요. (Rate Limit Exceeded)"}
-            )
-        
-        print(f"General Error: {error_msg}")
+        try:
+            metadata_dict = await metadata_task
+            yield sse_event("metadata", {"metadata": metadata_dict})
+
+            transcript_result = await transcript_task
+            transcript = require_transcript(transcript_result)
+            session = open_session(video_id, metadata_dict, transcript_result)
+            yield sse_event("transcript", {
+                "analysis_id": session.id,
+                "transcript": transcript,
+                "transcript_track": transcript_result['track'],
+            })
+
+            cache = get_response_cache()
+            options = {"length": request.length, "language": request.language}
+            key = cache.key("summary", transcript, session.title, **options)
+            cached = await cache.aget(key, bypass)
+            if cached is not None:
+                yield sse_event("token", {"text": cached})
+            else:
+                processed_transcript = await timer.run("condense", fit_transcript("summary", session, registry))
+                chain = get_chain("summary")
+                tokens = []
+                with timer.stage("llm"):
+                    async for token in chain.astream(
+                        artifact_inputs("summary", processed_transcript, session.title, options)
+                    ):
+                        tokens.append(token)
+                        yield sse_event("token", {"text": token})
+                await cache.aset(key, "".join(tokens))
+
+            yield sse_event("done", {"timings": timer.as_dict()})
+        except Exception as e:
+            yield sse_event("error", error_payload(e))
+        finally:
+            metadata_task.cancel()
+            transcript_task.cancel()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.post("/jobs", response_model=JobSubmitResponse, status_code=202)
+async def submit_summary_job(request: SummaryRequest, bypass: bool = Depends(cache_bypass)):
+    """
+    Background variant of /summary: returns a job id at once and runs the
+    pipeline on the job workers. Poll GET /jobs/{job_id} or follow
+    GET /jobs/{job_id}/events; the result is the /summary response.
+    Resubmitting while the same video/options job is queued or running
+    returns that job.
+    """
+    log.info("analysis.request", endpoint="job", url=request.url)
+    video_id = require_video_id(request.url)
+    _require_llm_registry()
+    key = summary_flight_key(video_id, request, bypass)
+
+    async def run(job: Job) -> Dict[str, Any]:
+        timer = StageTimer(listener=job)
+        result, _ = await inflight.do(key, lambda: run_summary_pipeline(video_id, request, bypass, timer))
+        return result.model_dump()
+
+    return submit_job("summary", key, run)
+
+
+@router.post("/batch", response_model=JobSubmitResponse, status_code=202)
+async def submit_batch(request: BatchRequest):
+    """
+    Summarize a list of video and/or playlist URLs as one background job
+    (see /jobs). Playlists are expanded and video IDs deduplicated; besides
+    the job's stage events, the event stream carries "videos"
+    ({count, invalid}) once the list is resolved and an "item" per video as
+    it finishes. The result is a BatchResponse.
+    """
+    if not request.urls:
         raise HTTPException(
-            status_code=500, 
-            detail={"code": "ERR_INTERNAL_SERVER", "message": f"서버 내부 오류가 발생했습니다. 담당자에게 문의해주세요.\nDetails: {error_msg}"}
+            status_code=400,
+            detail={"code": "ERR_BATCH_EMPTY", "message": "분석할 URL이 없습니다. (No URLs)"}
         )
+    if len(request.urls) > batch_max_videos():
+        raise batch_too_large(len(request.urls))
+    _require_llm_registry()
+    log.info("analysis.request", endpoint="batch", urls=len(request.urls))
+    key = "batch:" + hashlib.sha256(json.dumps(request.model_dump(), sort_keys=True).encode("utf-8")).hexdigest()
+
+    async def run(job: Job) -> Dict[str, Any]:
+        timer = StageTimer(listener=job)
+        video_ids, invalid = await timer.run("expand", run_blocking(resolve_video_ids, request.urls))
+        if len(video_ids) > batch_max_videos():
+            raise batch_too_large(len(video_ids))
+        job.emit("videos", {"count": len(video_ids), "invalid": invalid})
+
+        results: List[Dict[str, Any]] = []
+
+        def on_result(record: Dict[str, Any]) -> None:
+            results.append(record)
+            job.emit("item", record)
+
+        stats = await timer.run("analyze", batch_runner(request).run(video_ids, on_result))
+        results.sort(key=lambda record: record["index"])
+        return BatchResponse(results=results, invalid=invalid, stats=stats).model_dump()
+
+    return submit_job("batch", key, run)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    return JobStatusResponse(**require_job(job_id).as_dict())
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Server-Sent Events for a job: status (queued, running) -> stage
+    ({stage, state: started|finished, ms})* -> done ({result, stages}) or
+    error ({status, detail}). Events already emitted are replayed first,
+    so subscribing late (or after completion) still sees the whole run.
+    """
+    job = require_job(job_id)
+
+    async def events():
+        async for event, data in job.follow():
+            yield sse_event(event, data)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
 
 
 @router.post("/mindmap", response_model=MindMapResponse)
-async def generate_mindmap(request: BaseAnalysisRequest):
-    llm = get_llm()
-    chain = MINDMAP_PROMPT | llm | StrOutputParser()
-    
-    processed_transcript = request.transcript[:20000] 
-    
-    mermaid_code = chain.invoke({
-        "transcript": processed_transcript,
-        "title": request.title
-    })
-    
-    # Cleanup code blocks if model insists on adding them
-    cleaned = mermaid_code.replace("```mermaid", "").replace("```", "").strip()
-    
-    return MindMapResponse(markdown_code=cleaned)
+async def generate_mindmap(request: BaseAnalysisRequest, response: Response, bypass: bool = Depends(cache_bypass)):
+    session = resolve_session(request.analysis_id, request.transcript, request.title)
+    data, hit = await generate_artifact("mindmap", session, bypass)
+    set_cache_header(response, hit)
+    return MindMapResponse(**data)
 
 
 @router.post("/quiz", response_model=QuizResponse)
-async def generate_quiz(request: BaseAnalysisRequest):
-    llm = get_llm()
-    chain = QUIZ_PROMPT | llm | JsonOutputParser()
-    
-    processed_transcript = request.transcript[:20000]
+async def generate_quiz(request: BaseAnalysisRequest, response: Response, bypass: bool = Depends(cache_bypass)):
+    session = resolve_session(request.analysis_id, request.transcript, request.title)
     
     try:
-        data = chain.invoke({
-            "transcript": processed_transcript,
-            "title": request.title
-        })
-        # data should be {"quizzes": [...]}
+        data, hit = await generate_artifact("quiz", session, bypass)
+        set_cache_header(response, hit)
         return QuizResponse(**data)
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Quiz generation error: {e}")
+        log.warning("analysis.artifact_failed", artifact="quiz", error=str(e))
+        if is_rate_limit(e):
+            raise rate_limit_error()
         raise HTTPException(status_code=500, detail="Failed to generate quiz")
 
 
 @router.post("/flashcards", response_model=FlashcardResponse)
-async def generate_flashcards(request: BaseAnalysisRequest):
-    llm = get_llm()
-    chain = FLASHCARD_PROMPT | llm | JsonOutputParser()
-    
-    processed_transcript = request.transcript[:20000]
+async def generate_flashcards(request: BaseAnalysisRequest, response: Response, bypass: bool = Depends(cache_bypass)):
+    session = resolve_session(request.analysis_id, request.transcript, request.title)
     
     try:
-        data = chain.invoke({
-            "transcript": processed_transcript,
-            "title": request.title
-        })
+        data, hit = await generate_artifact("flashcards", session, bypass)
+        set_cache_header(response, hit)
         return FlashcardResponse(**data)
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Flashcard generation error: {e}")
+        log.warning("analysis.artifact_failed", artifact="flashcards", error=str(e))
+        if is_rate_limit(e):
+            raise rate_limit_error()
         raise HTTPException(status_code=500, detail="Failed to generate flashcards")
+
+
+STUDY_PACK_ARTIFACTS = ("summary", "mindmap", "quiz", "flashcards")
+
+def artifact_event(name: str, value: Any) -> str:
+    return sse_event(name, {"summary": value} if name == "summary" else value)
+
+def artifact_error_event(name: str, e: Exception) -> str:
+    return sse_event("error", {"artifact": name, **error_payload(e)})
+
+
+@router.post("/all")
+async def generate_study_pack(request: StudyPackRequest, bypass: bool = Depends(cache_bypass)):
+    """
+    Full study pack from one URL, as Server-Sent Events:
+    metadata -> transcript -> summary / mindmap / quiz / flashcards in the
+    order they complete -> done. The transcript is fetched once and the four
+    chains run concurrently (or as one multi-output prompt with batched=true).
+    A failing artifact emits an error event naming it; the others continue.
+    """
+    log.info("analysis.request", endpoint="study_pack", url=request.url)
+    video_id = require_video_id(request.url)
+    _require_llm_registry()
+
+    async def events():
+        timer = StageTimer()
+        try:
+            metadata_dict, transcript_result = await asyncio.gather(
+                timer.run("metadata", run_blocking(get_video_metadata, video_id)),
+                timer.run("transcript", run_blocking(get_transcript_with_track, video_id)),
+            )
+            yield sse_event("metadata", {"metadata": metadata_dict})
+
+            transcript = require_transcript(transcript_result)
+            session = open_session(video_id, metadata_dict, transcript_result)
+            yield sse_event("transcript", {
+                "analysis_id": session.id,
+                "transcript": transcript,
+                "transcript_track": transcript_result['track'],
+            })
+        except Exception as e:
+            yield sse_event("error", error_payload(e))
+            return
+
+        timings = {"fetch": timer.as_dict()}
+        summary_options = {"length": request.length, "language": request.language}
+
+        if request.batched:
+            pack_timer = StageTimer()
+            try:
+                pack, _ = await generate_artifact("study_pack", session, bypass, pack_timer, **summary_options)
+                for name in STUDY_PACK_ARTIFACTS:
+                    yield artifact_event(name, pack[name])
+            except Exception as e:
+                yield artifact_error_event("study_pack", e)
+            timings["study_pack"] = pack_timer.as_dict()
+        else:
+            async def build(name: str):
+                artifact_timer = StageTimer()
+                options = summary_options if name == "summary" else {}
+                try:
+                    value, _ = await generate_artifact(name, session, bypass, artifact_timer, **options)
+                    return name, value, None, artifact_timer
+                except Exception as e:
+                    return name, None, e, artifact_timer
+
+            tasks = [asyncio.ensure_future(build(name)) for name in STUDY_PACK_ARTIFACTS]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    name, value, error, artifact_timer = await next_done
+                    timings[name] = artifact_timer.as_dict()
+                    yield artifact_event(name, value) if error is None else artifact_error_event(name, error)
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        timings["total"] = round(timer.total_ms(), 1)
+        yield sse_event("done", {"analysis_id": session.id, "timings": timings})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+def pipeline_stats() -> Dict[str, Any]:
+    registry = get_llm_registry()
+    return {
+        "transcript_cache": transcript_cache_stats(),
+        "metadata_cache": metadata_cache_stats(),
+        "sessions": get_session_store().stats(),
+        "response_cache": get_response_cache().stats(),
+        "coalescing": inflight.stats(),
+        "jobs": get_job_queue().stats(),
+        "llm_scheduler": get_llm_scheduler().stats(),
+        "llm_tiers": registry.tier_stats() if registry is not None else {},
+    }
+
+
+@REGISTRY.collector
+def pipeline_samples():
+    """The /stats counters as /metrics samples, read at scrape time."""
+    stats = pipeline_stats()
+    yield from cache_samples("transcript", stats["transcript_cache"])
+    yield from cache_samples("metadata", stats["metadata_cache"]["positive"])
+    yield from cache_samples("response", stats["response_cache"])
+    yield from cache_samples("session", stats["sessions"])
+
+    coalescing = stats["coalescing"]
+    yield Sample("coalesced_total", "counter", "Requests that joined an identical in-flight run", {}, coalescing["coalesced"])
+
+    jobs = stats["jobs"]
+    yield Sample("jobs_queued", "gauge", "Background jobs waiting for a worker", {}, jobs["queued"])
+    yield Sample("jobs_running", "gauge", "Background jobs running", {}, jobs["running"])
+    for outcome in ("succeeded", "failed", "rejected", "deduplicated"):
+        yield Sample("jobs_total", "counter", "Background job submissions by outcome", {"outcome": outcome}, jobs[outcome])
+
+    scheduler = stats["llm_scheduler"]
+    for priority, depth in scheduler["queue_depth_by_priority"].items():
+        yield Sample("llm_queue_depth", "gauge", "Model calls waiting for the scheduler", {"priority": priority}, depth)
+    yield Sample("llm_in_flight", "gauge", "Model calls running", {}, scheduler["in_flight"])
+    for event in ("completed", "failed", "retries", "rate_limited"):
+        yield Sample("llm_scheduler_events_total", "counter", "Scheduler call outcomes, retries and rate limits",
+                     {"event": event}, scheduler[event])
+    for tier, tier_stats in stats["llm_tiers"].items():
+        yield Sample("llm_fallbacks_total", "counter", "Calls moved from a tier's primary to its fallback model",
+                     {"tier": tier}, tier_stats["fallbacks"])
+
+
+@router.get("/stats")
+async def analysis_stats():
+    """Cache hit/miss counters for the analysis pipeline."""
+    # The disk tiers count their rows in SQLite
+    return await run_blocking(pipeline_stats)
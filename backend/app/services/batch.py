@@ -0,0 +1,161 @@
+"""
+Batch analysis of URL lists and playlists (POST /api/analyze/batch, batch.py CLI).
+
+Inputs are expanded (playlists via yt-dlp flat extraction) and deduplicated
+by video ID. Each video then goes through two stages with separate limits:
+fetching metadata + transcript (YouTube-bound) and generating the summary
+(LLM-bound, also subject to the shared scheduler). Transcripts for the next
+videos are fetched while earlier ones are being summarized, but only a
+bounded number of videos are in progress at once so a large playlist
+doesn't hold every transcript in memory waiting for the LLM.
+
+Results are records {"video_id", "index", "status": "ok" | "error", ...}
+reported in completion order; the CLI appends them to a JSONL file, which
+doubles as the checkpoint: videos already recorded as "ok" are skipped on
+the next run, failed ones are retried.
+
+Configuration (environment):
+    BATCH_FETCH_CONCURRENCY  videos fetching metadata/transcripts at once (default 8)
+    BATCH_LLM_CONCURRENCY    videos being summarized at once (default 4)
+    BATCH_MAX_VIDEOS         videos accepted by one API batch (default 500)
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.services.youtube import extract_video_id, get_playlist_video_ids, is_playlist_url
+
+# fetch(video_id) -> fetched; analyze(video_id, fetched) -> record fields
+FetchFn = Callable[[str], Awaitable[Any]]
+AnalyzeFn = Callable[[str, Any], Awaitable[Dict[str, Any]]]
+ErrorFn = Callable[[Exception], Dict[str, Any]]
+ResultFn = Callable[[Dict[str, Any]], None]
+
+
+def batch_fetch_concurrency() -> int:
+    return int(os.getenv("BATCH_FETCH_CONCURRENCY", "8"))
+
+
+def batch_llm_concurrency() -> int:
+    return int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+
+
+def batch_max_videos() -> int:
+    return int(os.getenv("BATCH_MAX_VIDEOS", "500"))
+
+
+def resolve_video_ids(inputs: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """
+    (unique video IDs in input order, inputs that yielded none).
+    Playlist URLs are expanded; blank lines and "#" comments are ignored.
+    Blocking (playlist pages are fetched): run it off the event loop.
+    """
+    video_ids: List[str] = []
+    invalid: List[str] = []
+    for item in inputs:
+        item = item.strip()
+        if not item or item.startswith("#"):
+            continue
+        if is_playlist_url(item):
+            found = get_playlist_video_ids(item)
+        else:
+            video_id = extract_video_id(item)
+            found = [video_id] if video_id else []
+        if not found:
+            invalid.append(item)
+        video_ids.extend(found)
+    return list(dict.fromkeys(video_ids)), invalid
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    """Video IDs already recorded as "ok" in a results JSONL file."""
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # line cut short by an interruption
+            if record.get("status") == "ok":
+                done.add(record["video_id"])
+    return done
+
+
+class JsonlWriter:
+    """Appends one JSON record per line, flushed immediately so an interrupted run keeps its results."""
+
+    def __init__(self, path: str, truncate: bool = False):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "w" if truncate else "a", encoding="utf-8")
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        fetch: FetchFn,
+        analyze: AnalyzeFn,
+        on_error: ErrorFn,
+        fetch_concurrency: Optional[int] = None,
+        llm_concurrency: Optional[int] = None,
+    ):
+        self.fetch = fetch
+        self.analyze = analyze
+        self.on_error = on_error
+        self.fetch_concurrency = fetch_concurrency or batch_fetch_concurrency()
+        self.llm_concurrency = llm_concurrency or batch_llm_concurrency()
+
+    async def run(
+        self,
+        video_ids: List[str],
+        on_result: ResultFn,
+        skip: Iterable[str] = (),
+    ) -> Dict[str, Any]:
+        """
+        Process `video_ids` (minus `skip`), calling `on_result(record)` as each
+        finishes. Returns counts and elapsed time.
+        """
+        skip = set(skip)
+        pending = [(index, video_id) for index, video_id in enumerate(video_ids) if video_id not in skip]
+        fetch_slots = asyncio.Semaphore(self.fetch_concurrency)
+        llm_slots = asyncio.Semaphore(self.llm_concurrency)
+        # Fetched-but-unsummarized videos are capped at one round of LLM work
+        in_progress = asyncio.Semaphore(self.fetch_concurrency + self.llm_concurrency)
+        counts = {"ok": 0, "error": 0}
+        started = time.perf_counter()
+
+        async def process(index: int, video_id: str) -> None:
+            async with in_progress:
+                video_started = time.perf_counter()
+                try:
+                    async with fetch_slots:
+                        fetched = await self.fetch(video_id)
+                    async with llm_slots:
+                        fields = await self.analyze(video_id, fetched)
+                    record = {"video_id": video_id, "index": index, "status": "ok", **fields}
+                except Exception as e:
+                    record = {"video_id": video_id, "index": index, "status": "error", "error": self.on_error(e)}
+                record["elapsed_ms"] = round((time.perf_counter() - video_started) * 1000, 1)
+                counts[record["status"]] += 1
+                on_result(record)
+
+        await asyncio.gather(*(process(index, video_id) for index, video_id in pending))
+        return {
+            "total": len(video_ids),
+            "skipped": len(video_ids) - len(pending),
+            **counts,
+            "elapsed_s": round(time.perf_counter() - started, 1),
+        }
@@ -0,0 +1,150 @@
+"""
+Server-side chat memory with a bounded prompt footprint.
+
+Each conversation keeps its most recent turns verbatim; once they exceed
+the token budget, the oldest turns are folded into a running summary by
+the LLM (in the background, after the answer is returned). The history
+section of the prompt therefore stays roughly constant in size however
+long the conversation runs.
+
+Conversation IDs are generated here and each conversation belongs to the
+analysis it was started on; an unknown, expired or foreign ID starts a new
+conversation rather than adopting the client's ID.
+
+Configuration (environment):
+    CHAT_HISTORY_TOKENS        budget for verbatim turns (default 1200)
+    CHAT_CONVERSATION_TTL      seconds an idle conversation is kept (default 6h)
+    CHAT_CONVERSATION_ENTRIES  maximum live conversations (default 4096)
+"""
+
+import asyncio
+import os
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.runnables import Runnable
+
+from app.services.cache import TTLCache
+from app.services.logger import get_logger
+from app.services.tokens import estimate_tokens, truncate_to_tokens
+
+log = get_logger(__name__)
+
+ROLE_LABELS = {"user": "User", "assistant": "Assistant"}
+
+# Turns that always stay verbatim, even over budget (the last exchange)
+MIN_VERBATIM_TURNS = 2
+
+
+def normalize_role(role: str) -> str:
+    # The frontend uses Gemini-style roles ("user" / "model")
+    return "user" if role == "user" else "assistant"
+
+
+def recent_lines(text: str, budget: int) -> str:
+    """The end of `text` that fits in `budget` tokens, starting on a line boundary where possible."""
+    lines = text.splitlines()
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > budget:
+        lines.pop(0)
+    return truncate_to_tokens("\n".join(lines), budget)
+
+
+@dataclass
+class Conversation:
+    id: str
+    # The analysis session the conversation is about ("" for an uploaded transcript)
+    analysis_id: str = ""
+    summary: str = ""
+    turns: List[Tuple[str, str]] = field(default_factory=list)
+    _compaction: Optional["asyncio.Task[None]"] = field(default=None, repr=False, compare=False)
+
+    def add(self, role: str, content: str) -> None:
+        self.turns.append((normalize_role(role), content))
+
+    def render(self) -> str:
+        """History section for the chat prompt ("" when there is none)."""
+        lines = []
+        if self.summary:
+            lines.append(f"(Summary of earlier conversation) {self.summary}")
+        lines.extend(f"{ROLE_LABELS[role]}: {content}" for role, content in self.turns)
+        return "\n".join(lines)
+
+    def turn_tokens(self) -> int:
+        return sum(estimate_tokens(content) for _, content in self.turns)
+
+    def trim(self, budget: int) -> None:
+        """Drop the oldest turns until the verbatim window fits `budget` (no summarizing)."""
+        while len(self.turns) > MIN_VERBATIM_TURNS and self.turn_tokens() > budget:
+            self.turns.pop(0)
+
+    async def compact(self, summarize_chain: Runnable, budget: int) -> None:
+        """Fold the oldest turns into the running summary until the window fits `budget`."""
+        overflow: List[Tuple[str, str]] = []
+        while len(self.turns) > MIN_VERBATIM_TURNS and self.turn_tokens() > budget:
+            overflow.append(self.turns.pop(0))
+        if not overflow:
+            return
+        lines = "\n".join(f"{ROLE_LABELS[role]}: {content}" for role, content in overflow)
+        try:
+            self.summary = (await summarize_chain.ainvoke({
+                "summary": self.summary or "(none)",
+                "lines": lines,
+            })).strip()
+        except Exception as e:
+            # Keep what fits rather than silently dropping it; the most recent lines win
+            log.warning("chat_memory.summarize_failed", error=str(e), turns=len(overflow))
+            self.summary = recent_lines(f"{self.summary}\n{lines}".strip(), budget)
+
+    def schedule_compaction(self, summarize_chain: Runnable, budget: int) -> None:
+        if self.turn_tokens() > budget and (self._compaction is None or self._compaction.done()):
+            self._compaction = asyncio.ensure_future(self.compact(summarize_chain, budget))
+
+    async def ready(self) -> None:
+        """Wait for a pending background compaction before building the next prompt."""
+        if self._compaction is not None and not self._compaction.done():
+            await self._compaction
+
+
+def history_budget() -> int:
+    return int(os.getenv("CHAT_HISTORY_TOKENS", "1200"))
+
+
+class ConversationStore:
+    def __init__(self, max_entries: int, ttl: float):
+        self._conversations = TTLCache(max_entries=max_entries, ttl=ttl)
+
+    def open(self, conversation_id: Optional[str], analysis_id: str) -> Conversation:
+        """
+        The conversation `conversation_id` on `analysis_id`, or a new one (with
+        a fresh server-side ID) when it is unknown, expired or belongs to
+        another analysis.
+        """
+        if conversation_id:
+            conversation = self._conversations.get(conversation_id)
+            if conversation is not None and conversation.analysis_id == analysis_id:
+                return conversation
+            log.info("chat_memory.conversation_restarted", reason="analysis_mismatch" if conversation else "unknown")
+        conversation = Conversation(id=uuid.uuid4().hex, analysis_id=analysis_id)
+        self._conversations.set(conversation.id, conversation)
+        return conversation
+
+    def touch(self, conversation: Conversation) -> None:
+        """Refresh the TTL of an active conversation."""
+        self._conversations.set(conversation.id, conversation)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._conversations.stats()
+
+
+_store: Optional[ConversationStore] = None
+
+
+def get_conversation_store() -> ConversationStore:
+    global _store
+    if _store is None:
+        _store = ConversationStore(
+            max_entries=int(os.getenv("CHAT_CONVERSATION_ENTRIES", "4096")),
+            ttl=float(os.getenv("CHAT_CONVERSATION_TTL", str(6 * 3600))),
+        )
+    return _store
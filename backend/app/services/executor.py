@@ -0,0 +1,51 @@
+"""
+Bounded thread pool for blocking I/O (yt-dlp, youtube-transcript-api).
+
+These libraries are synchronous, so calling them directly from an
+``async def`` handler stalls the event loop for every other request.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.services.metrics import add_queue_wait
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the shared pool, sized by BLOCKING_IO_WORKERS (default 32)."""
+    global _executor
+    if _executor is None:
+        max_workers = int(os.getenv("BLOCKING_IO_WORKERS", "32"))
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blocking-io")
+    return _executor
+
+
+async def run_blocking(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking callable in the shared pool and await its result."""
+    loop = asyncio.get_running_loop()
+    submitted = time.perf_counter()
+    started = submitted
+
+    def call() -> Any:
+        nonlocal started
+        started = time.perf_counter()
+        return func(*args, **kwargs)
+
+    try:
+        return await loop.run_in_executor(get_executor(), call)
+    finally:
+        # Time spent waiting for a free worker thread
+        add_queue_wait(started - submitted)
+
+
+def shutdown_executor() -> None:
+    """Stop the pool. Called from the app lifespan on shutdown."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,223 @@
+"""
+Background analysis jobs.
+
+POST /api/analyze/jobs returns a job id right away; a fixed pool of worker
+tasks runs the pipeline, so a long video (or a slow Groq queue) no longer
+holds the client's HTTP connection open past proxy timeouts. Clients poll
+GET /api/analyze/jobs/{id} or follow its stage progress over SSE.
+
+Workers are asyncio tasks in the API process: the pipeline is already async
+(blocking yt-dlp / transcript calls go to the shared thread pool, LLM calls
+through the scheduler), so a separate process or broker would only add
+serialization of the sessions and clients it shares. Finished jobs are kept
+for JOB_RESULT_TTL so late pollers still find their result.
+
+Configuration (environment):
+    JOB_WORKERS         jobs run concurrently (default 4)
+    JOB_MAX_QUEUED      jobs waiting for a worker before submit is refused (default 256)
+    JOB_RESULT_TTL      seconds a finished job stays retrievable (default 1h)
+    JOB_RESULT_ENTRIES  finished jobs kept, LRU evicted (default 1024)
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.services.cache import TTLCache
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class QueueFull(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    key: str
+    status: str = QUEUED
+    stage: Optional[str] = None
+    # Completed stage durations (ms), in completion order
+    stages: Dict[str, float] = field(default_factory=dict)
+    result: Any = None
+    error: Optional[Dict[str, Any]] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # Progress events for SSE subscribers: (event, data)
+    events: List[tuple] = field(default_factory=list, repr=False)
+    _changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def emit(self, event: str, data: Dict[str, Any]) -> None:
+        self.events.append((event, data))
+        # Wake current subscribers; later waits use a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def stage_started(self, name: str) -> None:
+        self.stage = name
+        self.emit("stage", {"stage": name, "state": "started"})
+
+    def stage_finished(self, name: str, ms: float) -> None:
+        self.stages[name] = round(ms, 1)
+        self.emit("stage", {"stage": name, "state": "finished", "ms": round(ms, 1)})
+
+    async def follow(self) -> AsyncIterator[tuple]:
+        """Every event so far, then new ones as they happen, until the job is done."""
+        sent = 0
+        while True:
+            changed = self._changed
+            while sent < len(self.events):
+                sent += 1
+                yield self.events[sent - 1]
+            if self.done:
+                return
+            await changed.wait()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "stages": self.stages,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+# A job's work: gets the job (to report stages), returns its JSON result
+JobFn = Callable[[Job], Awaitable[Any]]
+# Maps a failure to the error payload stored on the job
+ErrorFn = Callable[[Exception], Dict[str, Any]]
+
+
+class JobQueue:
+    def __init__(self, workers: int, max_queued: int, result_ttl: float, result_entries: int):
+        self.workers = workers
+        self.max_queued = max_queued
+        self._queue: "asyncio.Queue[tuple]" = asyncio.Queue()
+        self._tasks: List["asyncio.Task[None]"] = []
+        # Queued and running jobs; finished ones move to _finished
+        self._active: Dict[str, Job] = {}
+        self._active_keys: Dict[str, Job] = {}
+        self._finished = TTLCache(max_entries=result_entries, ttl=result_ttl)
+        self._running = 0
+
+        self.submitted = 0
+        self.deduplicated = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, kind: str, key: str, fn: JobFn, on_error: ErrorFn) -> Job:
+        """
+        Queue `fn` as a new job, or return the queued/running job already
+        submitted with the same `key`. Raises QueueFull when at capacity.
+        """
+        existing = self._active_keys.get(key)
+        if existing is not None:
+            self.deduplicated += 1
+            return existing
+        if self._queue.qsize() >= self.max_queued:
+            self.rejected += 1
+            raise QueueFull()
+        self._start()
+        job = Job(id=uuid.uuid4().hex, kind=kind, key=key)
+        self._active[job.id] = job
+        self._active_keys[key] = job
+        job.emit("status", {"status": QUEUED})
+        self._queue.put_nowait((job, fn, on_error))
+        self.submitted += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._active.get(job_id) or self._finished.get(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job, fn, on_error = await self._queue.get()
+            self._running += 1
+            job.status = RUNNING
+            job.started_at = time.time()
+            job.emit("status", {"status": RUNNING})
+            try:
+                job.result = await fn(job)
+                job.status = SUCCEEDED
+                self.succeeded += 1
+                job.emit("done", {"result": job.result, "stages": job.stages})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.error = on_error(e)
+                job.status = FAILED
+                self.failed += 1
+                job.emit("error", job.error)
+            finally:
+                job.finished_at = time.time()
+                self._running -= 1
+                self._active.pop(job.id, None)
+                if self._active_keys.get(job.key) is job:
+                    del self._active_keys[job.key]
+                self._finished.set(job.id, job)
+                self._queue.task_done()
+
+    async def aclose(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "running": self._running,
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "finished_kept": len(self._finished),
+        }
+
+
+_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    global _queue
+    if _queue is None:
+        _queue = JobQueue(
+            workers=int(os.getenv("JOB_WORKERS", "4")),
+            max_queued=int(os.getenv("JOB_MAX_QUEUED", "256")),
+            result_ttl=float(os.getenv("JOB_RESULT_TTL", "3600")),
+            result_entries=int(os.getenv("JOB_RESULT_ENTRIES", "1024")),
+        )
+    return _queue
+
+
+async def close_job_queue() -> None:
+    global _queue
+    if _queue is not None:
+        await _queue.aclose()
+        _queue = None
@@ -0,0 +1,217 @@
+"""
+Application-scoped LLM clients and prebuilt chains.
+
+One ChatGroq per (model, temperature, max_tokens), all sharing a pair of
+keep-alive httpx connection pools, so requests don't pay for a new client
+and TLS handshake each time. Created in the FastAPI lifespan.
+
+Chains pick a model tier rather than a model (see app.services.routing):
+each tier resolves to a RoutedLLM over a primary and a fallback model, and
+every model call goes through the shared scheduler (app.services.scheduler)
+for rate limits, priorities and retries. ChatGroq's own retries are disabled
+to leave backoff to the scheduler.
+
+Configuration (environment):
+    GROQ_API_KEY          required
+    LLM_MAX_CONNECTIONS   connection pool size (default 100)
+    LLM_TIMEOUT           request timeout in seconds (default 120)
+"""
+
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_groq import ChatGroq
+
+from app.services.prompts import (
+    CHAT_MEMORY_PROMPT,
+    CHAT_PROMPT,
+    FLASHCARD_PROMPT,
+    LONGDOC_MAP_PROMPT,
+    LONGDOC_REDUCE_PROMPT,
+    MINDMAP_PROMPT,
+    QUIZ_PROMPT,
+    STUDY_PACK_PROMPT,
+    SUMMARY_PROMPT,
+)
+from app.services.metrics import PARSE_ERRORS, PARSE_SECONDS
+from app.services.routing import QUALITY, RoutedLLM, TierStats, fallback_timeout, task_tier, tier_models
+from app.services.scheduler import BATCH, INTERACTIVE, NORMAL, ScheduledLLM, close_llm_scheduler, get_llm_scheduler
+from app.services.tokens import prompt_budget
+
+DEFAULT_LLM_PARAMS: Dict[str, Any] = {"temperature": 0.3, "max_tokens": 4096}
+
+# name -> (prompt, output parser, LLM params overriding DEFAULT_LLM_PARAMS)
+CHAIN_SPECS: Dict[str, Tuple[Any, type, Dict[str, Any]]] = {
+    "summary": (SUMMARY_PROMPT, StrOutputParser, {}),
+    "mindmap": (MINDMAP_PROMPT, StrOutputParser, {}),
+    "quiz": (QUIZ_PROMPT, JsonOutputParser, {}),
+    "flashcards": (FLASHCARD_PROMPT, JsonOutputParser, {}),
+    "chat": (CHAT_PROMPT, StrOutputParser, {"temperature": 0.5, "max_tokens": 1024}),
+    "chat_memory": (CHAT_MEMORY_PROMPT, StrOutputParser, {"temperature": 0.2, "max_tokens": 512}),
+    "study_pack": (STUDY_PACK_PROMPT, JsonOutputParser, {"max_tokens": 8192}),
+    # Long-transcript map-reduce (app.services.longdoc)
+    "map": (LONGDOC_MAP_PROMPT, StrOutputParser, {"max_tokens": 2048}),
+    "reduce": (LONGDOC_REDUCE_PROMPT, StrOutputParser, {}),
+}
+
+# Scheduler priority per chain (default NORMAL): a user waiting on a chat
+# answer goes ahead of queued artifact generation and background memory upkeep
+CHAIN_PRIORITIES: Dict[str, int] = {
+    "chat": INTERACTIVE,
+    "chat_memory": BATCH,
+}
+
+
+def chain_params(name: str) -> Dict[str, Any]:
+    """Effective LLM parameters of chain `name`, including its tier and primary model."""
+    _prompt, _parser, params = CHAIN_SPECS[name]
+    tier = task_tier(name)
+    return {**DEFAULT_LLM_PARAMS, **params, "tier": tier, "model": tier_models(tier)[0]}
+
+
+def chain_budget(name: str, target: Optional[int] = None, reserve: int = 0) -> int:
+    """
+    Tokens chain `name` can take for its variable input: sized to the
+    smallest context window of its tier's models, minus its template and
+    max_tokens (see app.services.tokens.prompt_budget).
+    """
+    prompt, _parser, _params = CHAIN_SPECS[name]
+    params = chain_params(name)
+    models = [model for model in tier_models(params["tier"]) if model]
+    return prompt_budget(models, prompt.template, params["max_tokens"], target, reserve)
+
+
+class TimedParser(Runnable):
+    """JSON output parser that records parse time and failures under its chain's name."""
+
+    def __init__(self, parser: Runnable, chain: str):
+        self.parser = parser
+        self.chain = chain
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        with PARSE_SECONDS.time(chain=self.chain):
+            try:
+                return self.parser.invoke(input, config, **kwargs)
+            except Exception:
+                PARSE_ERRORS.inc(chain=self.chain)
+                raise
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        with PARSE_SECONDS.time(chain=self.chain):
+            try:
+                return await self.parser.ainvoke(input, config, **kwargs)
+            except Exception:
+                PARSE_ERRORS.inc(chain=self.chain)
+                raise
+
+
+class LLMRegistry:
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=20,
+            keepalive_expiry=60,
+        )
+        timeout = httpx.Timeout(float(os.getenv("LLM_TIMEOUT", "120")), connect=10)
+        self.http_client = httpx.Client(limits=limits, timeout=timeout)
+        self.http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        self.scheduler = get_llm_scheduler()
+        self.tiers: Dict[str, TierStats] = {}
+        self._models: Dict[Tuple[str, float, int], ChatGroq] = {}
+        self._llms: Dict[Tuple[str, float, int, int], RoutedLLM] = {}
+        self._chains: Dict[Tuple[str, int], Runnable] = {}
+
+    def _model(self, model: str, temperature: float, max_tokens: int) -> ChatGroq:
+        key = (model, temperature, max_tokens)
+        if key not in self._models:
+            self._models[key] = ChatGroq(
+                groq_api_key=self.api_key,
+                model_name=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                max_retries=0,
+                http_client=self.http_client,
+                http_async_client=self.http_async_client,
+            )
+        return self._models[key]
+
+    def llm(
+        self,
+        tier: str = QUALITY,
+        temperature: float = 0.3,
+        max_tokens: int = 4096,
+        priority: int = NORMAL,
+    ) -> RoutedLLM:
+        key = (tier, temperature, max_tokens, priority)
+        if key not in self._llms:
+            primary, fallback = tier_models(tier)
+            stats = self.tiers.setdefault(tier, TierStats(tier))
+            if fallback is None:
+                self._llms[key] = RoutedLLM(stats, (primary, ScheduledLLM(
+                    self._model(primary, temperature, max_tokens), self.scheduler, priority,
+                )))
+            else:
+                # One quick try on the primary, then the fallback with full retries
+                self._llms[key] = RoutedLLM(
+                    stats,
+                    (primary, ScheduledLLM(
+                        self._model(primary, temperature, max_tokens), self.scheduler, priority,
+                        max_retries=0, timeout=fallback_timeout(),
+                    )),
+                    (fallback, ScheduledLLM(
+                        self._model(fallback, temperature, max_tokens), self.scheduler, priority,
+                    )),
+                )
+        return self._llms[key]
+
+    def chain(self, name: str, priority: Optional[int] = None) -> Runnable:
+        """Prebuilt `prompt | llm | parser` chain for one of CHAIN_SPECS, on its task's tier."""
+        priority = CHAIN_PRIORITIES.get(name, NORMAL) if priority is None else priority
+        key = (name, priority)
+        if key not in self._chains:
+            prompt, parser, params = CHAIN_SPECS[name]
+            llm = self.llm(task_tier(name), **{**DEFAULT_LLM_PARAMS, **params}, priority=priority)
+            # Only JSON parsing is worth timing; string chains keep their streaming parser
+            output = TimedParser(parser(), name) if parser is JsonOutputParser else parser()
+            self._chains[key] = prompt | llm | output
+        return self._chains[key]
+
+    def tier_stats(self) -> Dict[str, Any]:
+        return {
+            tier: {"primary": tier_models(tier)[0], "fallback": tier_models(tier)[1], **stats.as_dict()}
+            for tier, stats in self.tiers.items()
+        }
+
+    def prebuild(self) -> None:
+        for name in CHAIN_SPECS:
+            self.chain(name)
+
+    async def aclose(self) -> None:
+        self.http_client.close()
+        await self.http_async_client.aclose()
+
+
+_registry: Optional[LLMRegistry] = None
+
+
+def get_llm_registry() -> Optional[LLMRegistry]:
+    """The shared registry, or None when GROQ_API_KEY is not configured."""
+    global _registry
+    if _registry is None:
+        api_key = os.getenv("GROQ_API_KEY")
+        if api_key:
+            _registry = LLMRegistry(api_key)
+    return _registry
+
+
+async def close_llm_registry() -> None:
+    global _registry
+    if _registry is not None:
+        await _registry.aclose()
+        _registry = None
+    # Its timer and queued waiters are bound to this event loop
+    close_llm_scheduler()
@@ -0,0 +1,207 @@
+"""
+Map-reduce engine for transcripts longer than a prompt's budget.
+
+Instead of slicing the transcript at a fixed length, the text is chunked,
+each chunk is condensed concurrently (map), and the notes are merged
+hierarchically (reduce) until they fit the endpoint's budget. Map runs on
+the fast model tier, reduce on the quality tier (see app.services.routing).
+
+All sizes are in tokens (app.services.tokens), capped by what each chain's
+models and prompt template leave room for. When caption timings are known,
+map chunks end on caption boundaries and carry their time range, so the
+notes (and the timelines built from them) keep real timestamps.
+
+Configuration (environment):
+    LONG_TRANSCRIPT_STRATEGY  per-endpoint override, e.g. "quiz=truncate,chat=truncate"
+    LONGDOC_CHUNK_TOKENS      tokens per map chunk / reduce group (default 2000)
+    LONGDOC_MAX_CONCURRENCY   parallel map/reduce calls per document (default 4)
+"""
+
+import asyncio
+import os
+from typing import Dict, List, Optional
+
+from langchain_core.runnables import Runnable
+
+from app.services.chat_memory import history_budget
+from app.services.llm import LLMRegistry, chain_budget
+from app.services.metrics import STAGE_SECONDS
+from app.services.segments import TimedTranscript
+from app.services.sessions import AnalysisSession
+from app.services.singleflight import SingleFlight
+from app.services.tokens import count_tokens, split_by_tokens, truncate_to_tokens
+
+NOTES_SEPARATOR = "\n\n---\n\n"
+
+# Target tokens of transcript per endpoint prompt (further capped by the
+# chain's context window, template and max_tokens)
+TRANSCRIPT_TOKEN_TARGETS: Dict[str, int] = {
+    "summary": 6000,
+    "mindmap": 5000,
+    "quiz": 5000,
+    "flashcards": 5000,
+    "study_pack": 5000,
+    "chat": 4000,
+}
+
+# Endpoints whose prompt gets [m:ss] markers in the transcript; the mind map
+# and quiz/flashcard outputs have no use for timestamps
+TIMESTAMPED_ENDPOINTS = ("summary", "chat")
+
+DEFAULT_STRATEGIES: Dict[str, str] = {
+    "summary": "map_reduce",
+    "mindmap": "map_reduce",
+    "quiz": "map_reduce",
+    "flashcards": "map_reduce",
+    "study_pack": "map_reduce",
+    # "retrieval": top-k relevant chunks per question (see retrieval.py)
+    "chat": "retrieval",
+}
+
+
+def long_transcript_strategy(endpoint: str) -> str:
+    """Return "map_reduce", "truncate" or (chat only) "retrieval" for `endpoint`."""
+    overrides = {}
+    for item in os.getenv("LONG_TRANSCRIPT_STRATEGY", "").split(","):
+        if "=" in item:
+            name, strategy = item.split("=", 1)
+            overrides[name.strip()] = strategy.strip()
+    return overrides.get(endpoint, DEFAULT_STRATEGIES.get(endpoint, "truncate"))
+
+
+class LongDocumentEngine:
+    """Condenses a long text to a target token count with concurrent map-reduce."""
+
+    def __init__(
+        self,
+        map_chain: Runnable,
+        reduce_chain: Runnable,
+        chunk_tokens: Optional[int] = None,
+        chunk_overlap: int = 75,
+        max_concurrency: Optional[int] = None,
+    ):
+        target = chunk_tokens or int(os.getenv("LONGDOC_CHUNK_TOKENS", "2000"))
+        self.chunk_tokens = chain_budget("map", target)
+        self.group_tokens = chain_budget("reduce", target)
+        self.chunk_overlap = chunk_overlap
+        self.map_chain = map_chain
+        self.reduce_chain = reduce_chain
+        self._semaphore = asyncio.Semaphore(
+            max_concurrency or int(os.getenv("LONGDOC_MAX_CONCURRENCY", "4"))
+        )
+
+    def split(self, text: str, segments: Optional[TimedTranscript] = None) -> List[str]:
+        """Token-sized chunks; on caption boundaries and labeled with their time range given `segments`."""
+        if segments is None or not len(segments):
+            return split_by_tokens(text, self.chunk_tokens, self.chunk_overlap)
+        # Leave room for the "[m:ss-m:ss]" label
+        return [chunk.labeled() for chunk in segments.chunks(self.chunk_tokens - 16, count_tokens)]
+
+    async def _call(self, chain, inputs: dict) -> str:
+        async with self._semaphore:
+            return await chain.ainvoke(inputs)
+
+    async def map(self, chunks: List[str], title: str) -> List[str]:
+        """Condense every chunk; results keep chunk order."""
+        return await asyncio.gather(*[
+            self._call(self.map_chain, {
+                "chunk": chunk,
+                "chunk_num": i + 1,
+                "total_chunks": len(chunks),
+                "title": title,
+            })
+            for i, chunk in enumerate(chunks)
+        ])
+
+    def _group(self, notes: List[str]) -> List[List[str]]:
+        """Pack consecutive notes into groups of at most group_tokens (and at least two)."""
+        groups: List[List[str]] = []
+        current: List[str] = []
+        size = 0
+        separator_tokens = count_tokens(NOTES_SEPARATOR)
+        for note in notes:
+            tokens = count_tokens(note)
+            if len(current) >= 2 and size + tokens > self.group_tokens:
+                groups.append(current)
+                current, size = [], 0
+            current.append(note)
+            size += tokens + separator_tokens
+        if current:
+            if len(current) == 1 and groups:
+                groups[-1].append(current[0])
+            else:
+                groups.append(current)
+        return groups
+
+    async def reduce(self, notes: List[str], title: str, target_tokens: int) -> str:
+        """Merge notes level by level until they fit in target_tokens."""
+        while len(notes) > 1 and count_tokens(NOTES_SEPARATOR.join(notes)) > target_tokens:
+            notes = await asyncio.gather(*[
+                self._call(self.reduce_chain, {"notes": NOTES_SEPARATOR.join(group), "title": title})
+                for group in self._group(notes)
+            ])
+        return truncate_to_tokens(NOTES_SEPARATOR.join(notes), target_tokens)
+
+    async def condense(self, text: str, title: str, target_tokens: int) -> str:
+        if count_tokens(text) <= target_tokens:
+            return text
+        notes = await self.map(self.split(text), title)
+        return await self.reduce(notes, title, target_tokens)
+
+
+def transcript_budget(endpoint: str) -> int:
+    """
+    Transcript tokens for `endpoint`'s prompt: its TRANSCRIPT_TOKEN_TARGETS
+    entry, capped by what the chain's models leave room for. Chat also
+    reserves room for the conversation history.
+    """
+    reserve = history_budget() if endpoint == "chat" else 0
+    return chain_budget(endpoint, TRANSCRIPT_TOKEN_TARGETS.get(endpoint), reserve)
+
+
+# Map/reduce runs shared by concurrent endpoints on the same session
+_inflight = SingleFlight()
+
+
+async def fit_transcript(
+    endpoint: str,
+    session: AnalysisSession,
+    registry: LLMRegistry,
+    priority: Optional[int] = None,
+) -> str:
+    """
+    Return the session transcript sized for `endpoint`'s prompt, either
+    truncated or condensed with map-reduce. The map notes and each reduced
+    size are kept on the session, so other endpoints (including ones
+    running concurrently) reuse them instead of repeating LLM calls.
+    `priority` overrides the scheduler priority of the map/reduce calls.
+    """
+    limit = transcript_budget(endpoint)
+    transcript = session.transcript
+    timestamped = endpoint in TIMESTAMPED_ENDPOINTS
+    text = session.timestamped_transcript() if timestamped else transcript
+    # Measure what the prompt gets: the [m:ss] markers cost tokens too
+    if session.transcript_tokens(timestamped) <= limit:
+        return text
+    if long_transcript_strategy(endpoint) != "map_reduce":
+        return truncate_to_tokens(text, limit)
+
+    engine = LongDocumentEngine(registry.chain("map", priority), registry.chain("reduce", priority))
+
+    async def map_notes() -> List[str]:
+        if "map_notes" not in session.digests:
+            with STAGE_SECONDS.time(stage="chunking"):
+                chunks = engine.split(transcript, session.segments)
+            with STAGE_SECONDS.time(stage="map"):
+                session.digests["map_notes"] = await engine.map(chunks, session.title)
+        return session.digests["map_notes"]
+
+    async def reduced() -> str:
+        key = f"map_reduce:{limit}"
+        if key not in session.digests:
+            notes = await _inflight.do(f"{id(session)}:map_notes", map_notes)
+            with STAGE_SECONDS.time(stage="reduce"):
+                session.digests[key] = await engine.reduce(notes, session.title, limit)
+        return session.digests[key]
+
+    return await _inflight.do(f"{id(session)}:map_reduce:{limit}", reduced)
@@ -0,0 +1,288 @@
+"""
+In-process metrics with a Prometheus text exposition (GET /metrics).
+
+Counters and histograms are updated on the hot path (one lock and a dict
+lookup per update); everything that already keeps its own counters (caches,
+scheduler, job queue) is read by collectors only when /metrics is scraped.
+
+    STAGE_SECONDS.observe(0.42, stage="transcript")
+    with STAGE_SECONDS.time(stage="chunking"):
+        ...
+
+Configuration (environment):
+    EVENT_LOOP_PROBE_INTERVAL   seconds between event loop lag probes (default 0.5, 0 disables)
+"""
+
+import asyncio
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+PREFIX = "videoinsight_"
+
+# Seconds: sub-10ms cache hits up to multi-minute map-reduce runs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class Sample(NamedTuple):
+    """One collector value: name (without PREFIX), type ("counter" | "gauge"), help, labels, value."""
+    name: str
+    kind: str
+    help: str
+    labels: Dict[str, str]
+    value: float
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = PREFIX + name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+ overflow), sum, count]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the wall time of the block, in seconds (also when it raises)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: Any) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        lines = self.header()
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {round(total, 6)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn: Callable[[], Iterable[Sample]]) -> Callable[[], Iterable[Sample]]:
+        """Register `fn` to produce samples at scrape time (usable as a decorator)."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        # The exposition format wants each family's samples together
+        families: Dict[str, List[Sample]] = {}
+        for collect in self._collectors:
+            for sample in collect():
+                families.setdefault(sample.name, []).append(sample)
+        for samples in families.values():
+            name = PREFIX + samples[0].name
+            lines.append(f"# HELP {name} {samples[0].help}")
+            lines.append(f"# TYPE {name} {samples[0].kind}")
+            for sample in samples:
+                labels = _format_labels(tuple(sample.labels), tuple(sample.labels.values()))
+                lines.append(f"{name}{labels} {_format_value(sample.value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP handling time until the response starts (streaming responses: until headers are sent)",
+    ["method", "route", "status"],
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "stage_duration_seconds",
+    "Analysis pipeline stage wall time (metadata, transcript, chunking, map, reduce, llm, ...)",
+    ["stage"],
+)
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "llm_call_duration_seconds",
+    "One model call (one routing attempt), including scheduler retries",
+    ["model", "outcome"],
+)
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total",
+    "Model tokens by direction (provider usage when reported, else estimated)",
+    ["model", "direction"],
+)
+LLM_QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "llm_queue_wait_seconds",
+    "Time a model call waited for the scheduler (rate limits, concurrency)",
+    ["priority"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+PARSE_SECONDS = REGISTRY.histogram(
+    "llm_parse_duration_seconds",
+    "JSON output parsing time per chain",
+    ["chain"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1),
+)
+PARSE_ERRORS = REGISTRY.counter("llm_parse_errors_total", "Model outputs that failed to parse", ["chain"])
+ERRORS = REGISTRY.counter("errors_total", "Error responses and error events by code (ERR_*, or HTTP_<status>)", ["code"])
+REQUEST_QUEUE_SECONDS = REGISTRY.histogram(
+    "http_request_queue_seconds",
+    "Time a request waited for shared capacity (LLM scheduler, blocking-I/O threads) until the response started",
+    ["route"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+EVENT_LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop woke a periodic probe (time spent running other callbacks)",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+# Queue waits of the current request (see track_queue_waits)
+_queue_waits: ContextVar[Optional[List[float]]] = ContextVar("queue_waits", default=None)
+
+
+def error_code(status: int, detail: Any) -> str:
+    if isinstance(detail, dict) and detail.get("code"):
+        return detail["code"]
+    return f"HTTP_{status}"
+
+
+def count_error(status: int, detail: Any) -> None:
+    ERRORS.inc(code=error_code(status, detail))
+
+
+def cache_samples(name: str, stats: Dict[str, Any]) -> Iterator[Sample]:
+    """Hit/miss counters and hit ratio of a cache from its stats() dict."""
+    hits, misses = stats.get("hits", 0), stats.get("misses", 0)
+    labels = {"cache": name}
+    yield Sample("cache_hits_total", "counter", "Cache hits", labels, hits)
+    yield Sample("cache_misses_total", "counter", "Cache misses", labels, misses)
+    yield Sample("cache_hit_ratio", "gauge", "Cache hits / lookups since start", labels,
+                 round(hits / (hits + misses), 4) if hits + misses else 0.0)
+    if "entries" in stats:
+        yield Sample("cache_entries", "gauge", "Entries held", labels, stats["entries"])
+
+
+def track_queue_waits() -> List[float]:
+    """Collect add_queue_wait() calls made while handling the current request into the returned list."""
+    waits: List[float] = []
+    _queue_waits.set(waits)
+    return waits
+
+
+def add_queue_wait(seconds: float) -> None:
+    waits = _queue_waits.get()
+    if waits is not None:
+        waits.append(seconds)
+
+
+def event_loop_probe_interval() -> float:
+    return float(os.getenv("EVENT_LOOP_PROBE_INTERVAL", "0.5"))
+
+
+async def monitor_event_loop(interval: float) -> None:
+    """Observe EVENT_LOOP_LAG_SECONDS every `interval` seconds until cancelled."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG_SECONDS.observe(max(0.0, loop.time() - started - interval))
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
@@ -22,7 +22,8 @@ Output Format (Markdown):
 ...
 
 ## 📖 Detailed Notes
-[Structured notes with H3 headers, bullet points, and bold text for emphasis]
+[Structured notes with H3 headers, bullet points, and bold text for emphasis.
+If the transcript contains [m:ss] time markers, start each H3 header with the time its topic begins, e.g. "### [3:15] Topic".]
 
 ## 💡 Actionable Insights
 [Practical applications or lessons learned]
@@ -112,3 +113,107 @@ FLASHCARD_PROMPT = PromptTemplate(
     input_variables=["transcript", "title"],
     template=FLASHCARD_PROMPT_TEMPLATE
 )
+
+
+
+# Chat Prompt
+CHAT_PROMPT_TEMPLATE = """Based on this video transcript:
+{context}
+
+Conversation so far:
+{history}
+
+{lang_instruction}Answer this question concisely: {query}
+If the transcript has [m:ss] time markers, mention the time when you refer to a specific moment.
+
+Answer:"""
+
+CHAT_PROMPT = PromptTemplate(
+    input_variables=["context", "history", "query", "lang_instruction"],
+    template=CHAT_PROMPT_TEMPLATE
+)
+
+
+# Chat memory: fold older turns into a running summary
+CHAT_MEMORY_PROMPT_TEMPLATE = """Current summary of a conversation about a video:
+{summary}
+
+New lines of conversation:
+{lines}
+
+Update the summary to include the new lines. Keep the user's questions, the facts given in
+the answers, and any names or terms the user may refer back to. Be concise (at most 150 words)
+and write in the language of the conversation. Output ONLY the updated summary."""
+
+CHAT_MEMORY_PROMPT = PromptTemplate(
+    input_variables=["summary", "lines"],
+    template=CHAT_MEMORY_PROMPT_TEMPLATE
+)
+
+
+# Study Pack Prompt: summary, mind map, quiz and flashcards in one call
+STUDY_PACK_PROMPT_TEMPLATE = """
+Analyze the following video transcript titled "{title}".
+Transcript:
+{transcript}
+
+Produce a complete study pack in the following JSON format ONLY:
+
+{{
+    "summary": "Structured study notes in Markdown (Executive Summary, Key Takeaways, Detailed Notes, Actionable Insights) at the detail level '{length_desc}'",
+    "mindmap": "Mermaid.js mind map, graph TD, square nodes [ ] for main topics and rounded nodes ( ) for sub-topics, without code fences",
+    "quizzes": [
+        {{
+            "question": "Question text here?",
+            "options": ["Option A", "Option B", "Option C", "Option D"],
+            "answer_index": 0,
+            "explanation": "Explanation of why option A is correct."
+        }}
+    ],
+    "flashcards": [
+        {{
+            "term": "Key Term 1",
+            "definition": "Clear and concise definition based on the video."
+        }}
+    ]
+}}
+
+Include 3-5 quizzes and 5-8 flashcards. Escape newlines inside JSON strings.
+"""
+
+STUDY_PACK_PROMPT = PromptTemplate(
+    input_variables=["transcript", "length_desc", "title"],
+    template=STUDY_PACK_PROMPT_TEMPLATE
+)
+
+# Long-transcript map step: condense one chunk into dense notes
+LONGDOC_MAP_PROMPT_TEMPLATE = """
+The following is part {chunk_num} of {total_chunks} of the transcript of a video titled "{title}":
+{chunk}
+
+Condense this part into dense notes that keep every key fact, definition, number, example and argument.
+Keep the original order of topics. Write the notes in the same language as the transcript.
+If the part starts with a time range like [m:ss-m:ss], start the notes with that range.
+Output ONLY the notes, without any preamble.
+"""
+
+LONGDOC_MAP_PROMPT = PromptTemplate(
+    input_variables=["chunk", "chunk_num", "total_chunks", "title"],
+    template=LONGDOC_MAP_PROMPT_TEMPLATE
+)
+
+
+# Long-transcript reduce step: merge consecutive notes into one
+LONGDOC_REDUCE_PROMPT_TEMPLATE = """
+The following are consecutive notes taken from the transcript of a video titled "{title}":
+{notes}
+
+Merge them into a single set of notes, removing repetition but keeping every key fact,
+definition, number and example. Keep the original order of topics and any [m:ss] time references.
+Write in the same language as the notes. Output ONLY the merged notes.
+"""
+
+LONGDOC_REDUCE_PROMPT = PromptTemplate(
+    input_variables=["notes", "title"],
+    template=LONGDOC_REDUCE_PROMPT_TEMPLATE
+)
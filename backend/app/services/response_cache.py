@@ -0,0 +1,124 @@
+"""
+Content-addressed cache for generated artifacts (summary, mind map, quiz,
+flashcards).
+
+The key is a hash of everything that determines the output: prompt template,
+model parameters, transcript, title and endpoint-specific options (length,
+language). Repeat requests for the same video skip the LLM entirely.
+
+Configuration (environment):
+    RESPONSE_CACHE_TTL             seconds an entry stays valid (default 7 days)
+    RESPONSE_CACHE_MEMORY_ENTRIES  in-memory LRU size (default 512)
+    RESPONSE_CACHE_DISK_ENTRIES    on-disk size cap (default 20000)
+    RESPONSE_CACHE_PATH            SQLite file; empty disables the disk tier
+
+Clients can skip the cache with `Cache-Control: no-cache` or `X-Cache-Bypass: 1`.
+Async callers use aget/aset (and get_or_compute), which run the SQLite tier
+in the blocking-I/O pool rather than on the event loop.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import Request
+
+from app.services.cache import SQLiteStore, TieredCache, TTLCache
+from app.services.executor import run_blocking
+from app.services.llm import CHAIN_SPECS, chain_params
+
+
+class ResponseCache:
+    def __init__(self, store: TieredCache):
+        self.store = store
+        self.bypassed = 0
+        self.stored = 0
+
+    @staticmethod
+    def key(name: str, transcript: str, title: str, **options: Any) -> str:
+        prompt, _parser, _params = CHAIN_SPECS[name]
+        payload = json.dumps(
+            {
+                "name": name,
+                "template": prompt.template,
+                "params": chain_params(name),
+                "transcript": hashlib.sha256(transcript.encode("utf-8")).hexdigest(),
+                "title": title,
+                "options": options,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return f"response:{name}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+    def get(self, key: str, bypass: bool = False) -> Optional[Any]:
+        if bypass:
+            self.bypassed += 1
+            return None
+        return self.store.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self.store.set(key, value)
+        self.stored += 1
+
+    async def aget(self, key: str, bypass: bool = False) -> Optional[Any]:
+        # A disk hit is a SELECT plus an access-time UPDATE and commit
+        if self.store.disk is None:
+            return self.get(key, bypass)
+        return await run_blocking(self.get, key, bypass)
+
+    async def aset(self, key: str, value: Any) -> None:
+        if self.store.disk is None:
+            self.set(key, value)
+        else:
+            await run_blocking(self.set, key, value)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        bypass: bool = False,
+    ) -> Tuple[Any, bool]:
+        """
+        Return (value, hit). `compute` must return a JSON-serializable value
+        that is already validated; it is only stored once it succeeds.
+        """
+        value = await self.aget(key, bypass)
+        if value is not None:
+            return value, True
+        value = await compute()
+        await self.aset(key, value)
+        return value, False
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.store.stats(), "bypassed": self.bypassed, "stored": self.stored}
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        ttl = float(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+        memory = TTLCache(
+            max_entries=int(os.getenv("RESPONSE_CACHE_MEMORY_ENTRIES", "512")),
+            ttl=ttl,
+        )
+        path = os.getenv("RESPONSE_CACHE_PATH", ".cache/responses.sqlite3")
+        disk = None
+        if path:
+            disk = SQLiteStore(
+                path,
+                max_entries=int(os.getenv("RESPONSE_CACHE_DISK_ENTRIES", "20000")),
+                ttl=ttl,
+            )
+        _cache = ResponseCache(TieredCache(memory, disk))
+    return _cache
+
+
+def cache_bypass(request: Request) -> bool:
+    """FastAPI dependency: True when the client asked to skip the cache."""
+    cache_control = request.headers.get("cache-control", "").lower()
+    return "no-cache" in cache_control or request.headers.get("x-cache-bypass", "") in ("1", "true")
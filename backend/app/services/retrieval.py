@@ -0,0 +1,186 @@
+"""
+Per-video retrieval index for chat.
+
+The transcript is split into overlapping chunks and indexed once per
+analysis session with BM25. When RETRIEVAL_EMBEDDING_MODEL is set and
+sentence-transformers is installed, chunks are also embedded locally and
+the two rankings are fused (reciprocal rank fusion).
+Chat prompts then carry only the top-k chunks instead of a transcript prefix.
+With caption timings, chunks follow caption boundaries and are labeled with
+their time range, so answers can point at the moment in the video.
+
+Configuration (environment):
+    RETRIEVAL_CHUNK_TOKENS      tokens per chunk (default 250)
+    RETRIEVAL_TOP_K             chunks per chat prompt (default 6)
+    RETRIEVAL_EMBEDDING_MODEL   e.g. "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+"""
+
+import asyncio
+import heapq
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.executor import run_blocking
+from app.services.logger import get_logger
+from app.services.segments import TimedTranscript
+from app.services.sessions import AnalysisSession
+from app.services.tokens import count_tokens, split_by_tokens
+
+log = get_logger(__name__)
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+|[가-힣]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased words; Hangul words are expanded into character bigrams so
+    that particles/endings ("영상은", "영상을") still match the stem.
+    """
+    tokens: List[str] = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        if "가" <= word[0] <= "힣" and len(word) > 2:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for doc_id, document in enumerate(documents):
+            counts = Counter(tokenize(document))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((doc_id, tf))
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if documents else 0.0
+        n = len(documents)
+        self.idf = {
+            term: math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for term, posting in self.postings.items()
+        }
+
+    def scores(self, query: str) -> Dict[int, float]:
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                norm = 1 - self.b + self.b * self.doc_lengths[doc_id] / (self.avg_length or 1)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        return scores
+
+
+def retrieval_chunk_tokens() -> int:
+    return int(os.getenv("RETRIEVAL_CHUNK_TOKENS", "250"))
+
+
+_embedder: Optional[Any] = None
+
+
+def _load_embedder() -> Optional[Any]:
+    model_name = os.getenv("RETRIEVAL_EMBEDDING_MODEL")
+    if not model_name:
+        return None
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        log.warning("retrieval.embedder_unavailable", model=model_name, reason="sentence-transformers not installed; using BM25 only")
+        return None
+    global _embedder
+    if _embedder is None:
+        _embedder = SentenceTransformer(model_name)
+    return _embedder
+
+
+class RetrievalIndex:
+    """Chunked transcript with a BM25 index and optional dense embeddings."""
+
+    def __init__(
+        self,
+        transcript: str,
+        chunk_tokens: Optional[int] = None,
+        segments: Optional[TimedTranscript] = None,
+    ):
+        size = chunk_tokens or retrieval_chunk_tokens()
+        if segments is not None and len(segments):
+            self.chunks = [chunk.labeled() for chunk in segments.chunks(size, count_tokens)]
+        else:
+            self.chunks = split_by_tokens(transcript, size, size // 8)
+        self.bm25 = BM25Index(self.chunks)
+        self.embedder = _load_embedder()
+        self.embeddings = None
+        if self.embedder is not None and self.chunks:
+            self.embeddings = self.embedder.encode(self.chunks, normalize_embeddings=True)
+
+    def _dense_ranking(self, query: str) -> List[int]:
+        query_vector = self.embedder.encode([query], normalize_embeddings=True)[0]
+        similarities = self.embeddings @ query_vector
+        return sorted(range(len(self.chunks)), key=lambda i: -float(similarities[i]))
+
+    def search(self, query: str, k: int) -> List[int]:
+        """Indices of the top-k chunks for `query`, best first."""
+        bm25_scores = self.bm25.scores(query)
+        if self.embeddings is None:
+            return [i for i, _ in heapq.nlargest(k, bm25_scores.items(), key=lambda item: item[1])]
+
+        # Reciprocal rank fusion of the lexical and dense rankings
+        fused: Dict[int, float] = defaultdict(float)
+        lexical = sorted(bm25_scores, key=lambda i: -bm25_scores[i])
+        for rank, i in enumerate(lexical):
+            fused[i] += 1 / (60 + rank)
+        for rank, i in enumerate(self._dense_ranking(query)):
+            fused[i] += 1 / (60 + rank)
+        return [i for i, _ in heapq.nlargest(k, fused.items(), key=lambda item: item[1])]
+
+    def context(self, query: str, k: int) -> str:
+        """Top-k chunks joined in transcript order; the opening chunk if nothing matches."""
+        hits = sorted(self.search(query, k)) or [0]
+        return "\n\n[...]\n\n".join(self.chunks[i] for i in hits if i < len(self.chunks))
+
+
+async def _build_index(session: AnalysisSession) -> RetrievalIndex:
+    session.index = await run_blocking(RetrievalIndex, session.transcript, None, session.segments)
+    return session.index
+
+
+def _index_built(session: AnalysisSession, task: "asyncio.Task[RetrievalIndex]") -> None:
+    if not task.cancelled() and task.exception() is not None:
+        log.error("retrieval.index_failed", analysis_id=session.id, error=str(task.exception()), exc_info=task.exception())
+
+
+def start_retrieval_index(session: AnalysisSession) -> "asyncio.Task[RetrievalIndex]":
+    """
+    The task building the session's index (in the blocking-I/O pool), started
+    unless one is running or has succeeded; a failed build is logged and the
+    next call starts over.
+    """
+    task = session.index_task
+    if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+        task = session.index_task = asyncio.ensure_future(_build_index(session))
+        task.add_done_callback(lambda done: _index_built(session, done))
+    return task
+
+
+async def get_retrieval_index(session: AnalysisSession) -> RetrievalIndex:
+    """The session's index, waiting for (or starting) its build."""
+    if session.index is None:
+        # Shielded: a cancelled chat request doesn't cancel the shared build
+        return await asyncio.shield(start_retrieval_index(session))
+    return session.index
+
+
+async def retrieve_context(session: AnalysisSession, query: str) -> str:
+    """Top-k chunks relevant to `query`; the whole transcript if it is already that short."""
+    top_k = int(os.getenv("RETRIEVAL_TOP_K", "6"))
+    if session.transcript_tokens() <= top_k * retrieval_chunk_tokens():
+        return session.timestamped_transcript()
+    index = await get_retrieval_index(session)
+    return index.context(query, top_k)
@@ -0,0 +1,247 @@
+"""
+Model tiers and fallback routing.
+
+Each task declares a tier instead of a model: "fast" for work where a small
+model is good enough (map notes, flashcards, chat answers), "quality" for
+the outputs users read as a whole (summary, mind map, quiz, reduce).
+Every tier has a primary and an optional fallback model; a call goes to the
+fallback when the primary is rate-limited, fails transiently or is slower
+than LLM_FALLBACK_TIMEOUT. After a rate limit the primary is skipped for
+its Retry-After (or LLM_FALLBACK_COOLDOWN) so later calls don't pay for it
+again.
+
+Configuration (environment):
+    LLM_MODEL_FAST / LLM_MODEL_QUALITY        primary model per tier
+    LLM_FALLBACK_FAST / LLM_FALLBACK_QUALITY  fallback model ("" disables)
+    LLM_TASK_TIERS          per-task override, e.g. "chat=quality,flashcards=quality"
+    LLM_FALLBACK_TIMEOUT    seconds before a slow primary call is abandoned
+                            (time to first token for streams; default 45)
+    LLM_FALLBACK_COOLDOWN   seconds to skip a rate-limited primary (default 30)
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from app.services.logger import get_logger
+from app.services.metrics import LLM_CALL_SECONDS, LLM_TOKENS
+from app.services.scheduler import ScheduledLLM, is_rate_limit, is_retryable, prompt_text, retry_after
+from app.services.tokens import estimate_tokens
+
+log = get_logger(__name__)
+
+FAST = "fast"
+QUALITY = "quality"
+
+DEFAULT_TIER_MODELS: Dict[str, Tuple[str, str]] = {
+    FAST: ("llama-3.1-8b-instant", "meta-llama/llama-4-scout-17b-16e-instruct"),
+    QUALITY: ("llama-3.3-70b-versatile", "openai/gpt-oss-120b"),
+}
+
+TASK_TIERS: Dict[str, str] = {
+    "map": FAST,
+    "reduce": QUALITY,
+    "summary": QUALITY,
+    "mindmap": QUALITY,
+    "quiz": QUALITY,
+    "flashcards": FAST,
+    "chat": FAST,
+    "chat_memory": FAST,
+    "study_pack": QUALITY,
+}
+
+
+def task_tier(task: str) -> str:
+    overrides = {}
+    for item in os.getenv("LLM_TASK_TIERS", "").split(","):
+        if "=" in item:
+            name, tier = item.split("=", 1)
+            overrides[name.strip()] = tier.strip()
+    return overrides.get(task, TASK_TIERS.get(task, QUALITY))
+
+
+def tier_models(tier: str) -> Tuple[str, Optional[str]]:
+    """(primary, fallback or None) for `tier`."""
+    primary, fallback = DEFAULT_TIER_MODELS[tier]
+    primary = os.getenv(f"LLM_MODEL_{tier.upper()}", primary)
+    fallback = os.getenv(f"LLM_FALLBACK_{tier.upper()}", fallback)
+    return primary, (fallback if fallback and fallback != primary else None)
+
+
+def fallback_timeout() -> float:
+    return float(os.getenv("LLM_FALLBACK_TIMEOUT", "45"))
+
+
+def record_tokens(model: str, input: Any, usage: Optional[Dict[str, Any]], completion: str) -> None:
+    """Count a call's tokens: the provider's usage metadata when present, else estimates."""
+    if usage:
+        prompt_tokens, completion_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    else:
+        prompt_tokens, completion_tokens = estimate_tokens(prompt_text(input)), estimate_tokens(completion)
+    LLM_TOKENS.inc(prompt_tokens, model=model, direction="prompt")
+    LLM_TOKENS.inc(completion_tokens, model=model, direction="completion")
+
+
+def _content(message: Any) -> str:
+    content = getattr(message, "content", message)
+    return content if isinstance(content, str) else ""
+
+
+class LatencyStats:
+    """Call count, errors and latency percentiles over the most recent calls."""
+
+    def __init__(self, window: int = 512):
+        self.calls = 0
+        self.errors = 0
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    def record(self, ms: float, ok: bool = True) -> None:
+        self.calls += 1
+        if not ok:
+            self.errors += 1
+        self._recent.append(ms)
+
+    def as_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self._recent)
+
+        def percentile(p: float) -> Optional[float]:
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 1) if ordered else None
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(ordered[-1], 1) if ordered else None,
+        }
+
+
+class TierStats:
+    def __init__(self, tier: str):
+        self.tier = tier
+        self.latency = LatencyStats()
+        self.models: Dict[str, LatencyStats] = {}
+        self.fallbacks = 0
+        self.cooldown_until = 0.0
+
+    def model(self, name: str) -> LatencyStats:
+        if name not in self.models:
+            self.models[name] = LatencyStats()
+        return self.models[name]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            **self.latency.as_dict(),
+            "fallbacks": self.fallbacks,
+            "primary_cooldown_s": round(max(0.0, self.cooldown_until - time.monotonic()), 1),
+            "models": {name: stats.as_dict() for name, stats in self.models.items()},
+        }
+
+
+class RoutedLLM(Runnable):
+    """
+    Primary model with an optional fallback, both behind the scheduler.
+    The primary is tried once (no retries, bounded by the fallback timeout)
+    so a rate-limited or slow call moves on instead of backing off;
+    the fallback keeps the scheduler's full retry policy.
+    """
+
+    def __init__(
+        self,
+        stats: TierStats,
+        primary: Tuple[str, ScheduledLLM],
+        fallback: Optional[Tuple[str, ScheduledLLM]] = None,
+    ):
+        self.stats = stats
+        self.primary = primary
+        self.fallback = fallback
+
+    @property
+    def max_tokens(self) -> Optional[int]:
+        return getattr(self.primary[1].llm, "max_tokens", None)
+
+    def _route(self) -> Tuple[Tuple[str, ScheduledLLM], ...]:
+        if self.fallback is None:
+            return (self.primary,)
+        if time.monotonic() < self.stats.cooldown_until:
+            return (self.fallback,)
+        return (self.primary, self.fallback)
+
+    def _should_fall_back(self, e: Exception) -> bool:
+        if isinstance(e, asyncio.TimeoutError):
+            return True
+        if is_rate_limit(e):
+            cooldown = retry_after(e) or float(os.getenv("LLM_FALLBACK_COOLDOWN", "30"))
+            self.stats.cooldown_until = max(self.stats.cooldown_until, time.monotonic() + cooldown)
+            return True
+        return is_retryable(e)
+
+    def _attempt_done(self, model: str, started: float, outcome: str) -> None:
+        elapsed = time.perf_counter() - started
+        self.stats.model(model).record(elapsed * 1000, ok=outcome == "ok")
+        LLM_CALL_SECONDS.observe(elapsed, model=model, outcome=outcome)
+
+    def _fall_back(self, model: str, e: Exception, to: str) -> None:
+        self.stats.fallbacks += 1
+        log.warning("llm.fallback", model=model, error=type(e).__name__, fallback=to)
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return self.primary[1].invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        route = self._route()
+        started = time.perf_counter()
+        for i, (model, llm) in enumerate(route):
+            attempt_started = time.perf_counter()
+            try:
+                result = await llm.ainvoke(input, config, **kwargs)
+            except Exception as e:
+                if i == len(route) - 1 or not self._should_fall_back(e):
+                    self._attempt_done(model, attempt_started, "error")
+                    self.stats.latency.record((time.perf_counter() - started) * 1000, ok=False)
+                    raise
+                self._attempt_done(model, attempt_started, "fallback")
+                self._fall_back(model, e, route[i + 1][0])
+                continue
+            self._attempt_done(model, attempt_started, "ok")
+            self.stats.latency.record((time.perf_counter() - started) * 1000)
+            record_tokens(model, input, getattr(result, "usage_metadata", None), _content(result))
+            return result
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        route = self._route()
+        started = time.perf_counter()
+        for i, (model, llm) in enumerate(route):
+            attempt_started = time.perf_counter()
+            streamed = False
+            parts = []
+            usage = None
+            try:
+                async for chunk in llm.astream(input, config, **kwargs):
+                    streamed = True
+                    parts.append(_content(chunk))
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    yield chunk
+            except Exception as e:
+                if streamed or i == len(route) - 1 or not self._should_fall_back(e):
+                    self._attempt_done(model, attempt_started, "error")
+                    self.stats.latency.record((time.perf_counter() - started) * 1000, ok=False)
+                    raise
+                self._attempt_done(model, attempt_started, "fallback")
+                self._fall_back(model, e, route[i + 1][0])
+                continue
+            self._attempt_done(model, attempt_started, "ok")
+            self.stats.latency.record((time.perf_counter() - started) * 1000)
+            record_tokens(model, input, usage, "".join(parts))
+            return
+
+    async def atransform(self, input: AsyncIterator[Any], config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        final = None
+        async for chunk in input:
+            final = chunk if final is None else final + chunk
+        async for output in self.astream(final, config, **kwargs):
+            yield output
@@ -0,0 +1,350 @@
+"""
+Rate-limit aware scheduler for LLM calls.
+
+All LLM calls go through one scheduler that
+- admits calls within a requests-per-minute and tokens-per-minute budget,
+- serves waiting calls by priority (interactive chat before batch work),
+- retries rate-limited / transient failures with jittered exponential
+  backoff, honoring the provider's Retry-After header (which also pauses
+  every other queued call),
+- reports queue depth and counters for /api/analyze/stats.
+
+Configuration (environment):
+    LLM_RPM              requests per minute (default 30; 0 disables)
+    LLM_TPM              tokens per minute, prompt + max output (default 0 = unlimited)
+    LLM_MAX_CONCURRENCY  calls in flight (default 16)
+    LLM_MAX_RETRIES      retries per call (default 4)
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from app.services.logger import get_logger
+from app.services.metrics import LLM_QUEUE_WAIT_SECONDS, add_queue_wait
+from app.services.tokens import estimate_tokens
+
+log = get_logger(__name__)
+
+# Priorities: lower is served first
+INTERACTIVE = 0
+NORMAL = 1
+BATCH = 2
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", NORMAL: "normal", BATCH: "batch"}
+
+
+class TokenBucket:
+    """Continuous-refill bucket holding at most `per_minute` units."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.available = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.capacity / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if now). Oversized requests wait for a full bucket."""
+        if self.capacity <= 0:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) * 60 / self.capacity
+
+    def take(self, amount: float) -> None:
+        if self.capacity > 0:
+            self.available -= min(amount, self.capacity)
+
+
+def _status(e: Exception) -> Optional[int]:
+    return getattr(e, "status_code", None) or getattr(getattr(e, "response", None), "status_code", None)
+
+
+def is_rate_limit(e: Exception) -> bool:
+    return _status(e) == 429 or type(e).__name__ == "RateLimitError" or "429" in str(e)
+
+
+def is_retryable(e: Exception) -> bool:
+    if is_rate_limit(e) or _status(e) in (408, 409, 500, 502, 503, 504):
+        return True
+    return type(e).__name__ in ("APITimeoutError", "APIConnectionError", "InternalServerError")
+
+
+def prompt_text(input: Any) -> str:
+    """The text of a model input (prompt value, messages or string), for token estimates."""
+    return input.to_string() if hasattr(input, "to_string") else str(input)
+
+
+def retry_after(e: Exception) -> Optional[float]:
+    """Seconds from the provider's Retry-After header, if any."""
+    headers = getattr(getattr(e, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        rpm: float,
+        tpm: float,
+        max_concurrency: int,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+    ):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._queue: List[Tuple[int, int, int, "asyncio.Future[None]"]] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.queue_wait_ms = 0.0
+
+    # --- admission ---
+
+    def _pump(self) -> None:
+        self._wakeup = None
+        while self._queue and self._in_flight < self.max_concurrency:
+            priority, _seq, tokens, waiter = self._queue[0]
+            if waiter.done():  # cancelled while queued
+                heapq.heappop(self._queue)
+                continue
+            delay = max(
+                self._paused_until - time.monotonic(),
+                self.requests.wait_time(1),
+                self.tokens.wait_time(tokens),
+            )
+            if delay > 0:
+                # Head of the queue keeps its place; try again when budget allows
+                self._wakeup = asyncio.get_running_loop().call_later(delay, self._pump)
+                return
+            heapq.heappop(self._queue)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self._in_flight += 1
+            waiter.set_result(None)
+
+    async def _acquire(self, priority: int, tokens: int) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), tokens, waiter))
+        if self._wakeup is None:
+            self._pump()
+        started = time.perf_counter()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # admitted just as we were cancelled
+            raise
+        waited = time.perf_counter() - started
+        self.queue_wait_ms += waited * 1000
+        LLM_QUEUE_WAIT_SECONDS.observe(waited, priority=PRIORITY_NAMES.get(priority, str(priority)))
+        add_queue_wait(waited)
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        if self._wakeup is None:
+            self._pump()
+
+    def close(self) -> None:
+        """Drop the pending wakeup and queued calls; they belong to the event loop that is closing."""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        for _priority, _seq, _tokens, waiter in self._queue:
+            if not waiter.done() and not waiter.get_loop().is_closed():
+                waiter.cancel()
+        self._queue.clear()
+
+    @asynccontextmanager
+    async def slot(self, priority: int = NORMAL, tokens: int = 0) -> AsyncIterator[None]:
+        await self._acquire(priority, tokens)
+        try:
+            yield
+        finally:
+            self._release()
+
+    # --- retries ---
+
+    def backoff(self, attempt: int, e: Exception) -> float:
+        hinted = retry_after(e)
+        if hinted is not None:
+            # Provider told us when to come back: hold every queued call until then
+            self._paused_until = max(self._paused_until, time.monotonic() + hinted)
+            return hinted
+        return min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def _record_failure(self, e: Exception) -> None:
+        if is_rate_limit(e):
+            self.rate_limited += 1
+
+    async def run(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        priority: int = NORMAL,
+        tokens: int = 0,
+        max_retries: Optional[int] = None,
+    ) -> Any:
+        """Run `fn()` within the budget, retrying transient failures."""
+        max_retries = self.max_retries if max_retries is None else max_retries
+        for attempt in range(max_retries + 1):
+            async with self.slot(priority, tokens):
+                try:
+                    result = await fn()
+                    self.completed += 1
+                    return result
+                except Exception as e:
+                    self._record_failure(e)
+                    if not is_retryable(e) or attempt == max_retries:
+                        self.failed += 1
+                        raise
+                    delay = self.backoff(attempt, e)
+                    reason = type(e).__name__
+            self.retries += 1
+            log.warning("llm.retry", error=reason, attempt=attempt + 1, max_retries=max_retries, delay_s=round(delay, 1))
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        depth: Dict[str, int] = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _seq, _tokens, waiter in self._queue:
+            if not waiter.done():
+                depth[PRIORITY_NAMES.get(priority, str(priority))] += 1
+        return {
+            "queue_depth": sum(depth.values()),
+            "queue_depth_by_priority": depth,
+            "in_flight": self._in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "queue_wait_ms_total": round(self.queue_wait_ms, 1),
+            "paused_for_s": round(max(0.0, self._paused_until - time.monotonic()), 1),
+        }
+
+
+class ScheduledLLM(Runnable):
+    """
+    Wraps a chat model so every async call in a chain (`prompt | llm | parser`)
+    goes through the scheduler at a fixed priority. Streaming calls are only
+    retried if they fail before the first chunk. `max_retries` overrides the
+    scheduler's default; `timeout` bounds each attempt (for streams, the wait
+    for the first chunk).
+    """
+
+    def __init__(
+        self,
+        llm: Runnable,
+        scheduler: LLMScheduler,
+        priority: int = NORMAL,
+        max_retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.llm = llm
+        self.scheduler = scheduler
+        self.priority = priority
+        self.max_retries = scheduler.max_retries if max_retries is None else max_retries
+        self.timeout = timeout
+
+    def _estimate(self, input: Any) -> int:
+        return estimate_tokens(prompt_text(input)) + (getattr(self.llm, "max_tokens", None) or 0)
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return self.llm.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return await self.scheduler.run(
+            lambda: asyncio.wait_for(self.llm.ainvoke(input, config, **kwargs), self.timeout),
+            self.priority,
+            self._estimate(input),
+            self.max_retries,
+        )
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        scheduler = self.scheduler
+        for attempt in range(self.max_retries + 1):
+            started = False
+            async with scheduler.slot(self.priority, self._estimate(input)):
+                stream = self.llm.astream(input, config, **kwargs).__aiter__()
+                try:
+                    try:
+                        first = await asyncio.wait_for(stream.__anext__(), self.timeout)
+                    except StopAsyncIteration:
+                        scheduler.completed += 1
+                        return
+                    started = True
+                    yield first
+                    async for chunk in stream:
+                        yield chunk
+                    scheduler.completed += 1
+                    return
+                except Exception as e:
+                    scheduler._record_failure(e)
+                    if started or not is_retryable(e) or attempt == self.max_retries:
+                        scheduler.failed += 1
+                        raise
+                    delay = scheduler.backoff(attempt, e)
+                finally:
+                    if hasattr(stream, "aclose"):
+                        await stream.aclose()
+            scheduler.retries += 1
+            await asyncio.sleep(delay)
+
+    async def atransform(self, input: AsyncIterator[Any], config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        # Inside a streamed chain the prompt arrives as a single chunk
+        final = None
+        async for chunk in input:
+            final = chunk if final is None else final + chunk
+        async for output in self.astream(final, config, **kwargs):
+            yield output
+
+
+_scheduler: Optional[LLMScheduler] = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler(
+            rpm=float(os.getenv("LLM_RPM", "30")),
+            tpm=float(os.getenv("LLM_TPM", "0")),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "4")),
+        )
+    return _scheduler
+
+
+def close_llm_scheduler() -> None:
+    """Close the shared scheduler; the next get_llm_scheduler() starts a fresh one (e.g. on a new event loop)."""
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.close()
+        _scheduler = None
@@ -0,0 +1,181 @@
+"""
+Timestamped transcript model.
+
+A transcript is kept as one text buffer plus parallel arrays describing its
+caption segments: start time, duration and the character offset where each
+segment's text begins. Lookups (which segment covers a time or a character
+position) are binary searches, and time-range slices are two lookups and a
+string slice, so downstream steps don't re-scan the text or carry a list of
+per-segment dicts around.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format as m:ss, or h:mm:ss from one hour on."""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+
+class TimedChunk(NamedTuple):
+    start: float
+    end: float
+    text: str
+
+    def label(self) -> str:
+        return f"[{format_timestamp(self.start)}-{format_timestamp(self.end)}]"
+
+    def labeled(self) -> str:
+        """The chunk text prefixed with its time range, for prompts."""
+        return f"{self.label()}\n{self.text}"
+
+
+class TimedTranscript:
+    __slots__ = ("text", "starts", "durations", "offsets")
+
+    def __init__(self, text: str, starts: array, durations: array, offsets: array):
+        self.text = text
+        self.starts = starts
+        self.durations = durations
+        # offsets[i] is where segment i begins in text; offsets[-1] == len(text)
+        self.offsets = offsets
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Dict[str, Any]]) -> "TimedTranscript":
+        """Build from youtube-transcript-api raw data ({'text', 'start', 'duration'} dicts)."""
+        parts: List[str] = []
+        starts = array("d")
+        durations = array("d")
+        offsets = array("q")
+        position = 0
+        for entry in entries:
+            text = " ".join(entry["text"].split())
+            if not text:
+                continue
+            if parts:
+                position += 1  # joining space
+            offsets.append(position)
+            starts.append(float(entry["start"]))
+            durations.append(float(entry.get("duration") or 0.0))
+            parts.append(text)
+            position += len(text)
+        offsets.append(position)
+        return cls(" ".join(parts), starts, durations, offsets)
+
+    # --- serialization (transcript store, JSON) ---
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "starts": list(self.starts),
+            "durations": list(self.durations),
+            "offsets": list(self.offsets),
+        }
+
+    @classmethod
+    def from_dict(cls, text: str, data: Dict[str, Any]) -> "TimedTranscript":
+        return cls(text, array("d", data["starts"]), array("d", data["durations"]), array("q", data["offsets"]))
+
+    # --- lookups ---
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def duration(self) -> float:
+        if not self.starts:
+            return 0.0
+        return self.starts[-1] + self.durations[-1]
+
+    def end(self, i: int) -> float:
+        return self.starts[i] + self.durations[i]
+
+    def segment_text(self, i: int) -> str:
+        return self.text[self.offsets[i]:self.offsets[i + 1]].strip()
+
+    def index_at_time(self, seconds: float) -> int:
+        """Index of the segment playing at `seconds` (the last one started by then)."""
+        return max(bisect_right(self.starts, seconds) - 1, 0)
+
+    def index_at_offset(self, offset: int) -> int:
+        """Index of the segment containing character `offset` of the text."""
+        return min(max(bisect_right(self.offsets, offset) - 1, 0), max(len(self) - 1, 0))
+
+    def time_at_offset(self, offset: int) -> float:
+        return self.starts[self.index_at_offset(offset)] if len(self) else 0.0
+
+    def locate(self, quote: str) -> Optional[float]:
+        """Start time of the first segment containing `quote`, or None."""
+        offset = self.text.find(" ".join(quote.split()))
+        return None if offset < 0 else self.time_at_offset(offset)
+
+    def marked_text(self, every_seconds: float = 60.0) -> str:
+        """The text on one line per `every_seconds`, each starting with a [m:ss] marker."""
+        marks: List[int] = []
+        next_mark = 0.0
+        for i, start in enumerate(self.starts):
+            if start >= next_mark:
+                marks.append(i)
+                next_mark = start + every_seconds
+        bounds = marks + [len(self)]
+        return "\n".join(
+            f"[{format_timestamp(self.starts[a])}] {self.text[self.offsets[a]:self.offsets[b]].strip()}"
+            for a, b in zip(bounds, bounds[1:])
+        )
+
+    # --- slicing / chunking ---
+
+    def _span(self, first: int, last: int) -> TimedChunk:
+        return TimedChunk(
+            self.starts[first],
+            self.end(last),
+            self.text[self.offsets[first]:self.offsets[last + 1]].strip(),
+        )
+
+    def slice_time(self, start: float, end: float) -> TimedChunk:
+        """Segments overlapping [start, end)."""
+        if not len(self):
+            return TimedChunk(start, end, "")
+        first = self.index_at_time(start)
+        last = max(bisect_left(self.starts, end) - 1, first)
+        return self._span(first, last)
+
+    def chunks(
+        self,
+        max_tokens: int,
+        length_function: Callable[[str], int],
+        overlap_segments: int = 1,
+        max_seconds: Optional[float] = None,
+    ) -> List[TimedChunk]:
+        """
+        Greedy chunks that start and end on segment boundaries, each at most
+        `max_tokens` (a single oversized segment becomes its own chunk) and,
+        if given, at most `max_seconds` long. Consecutive chunks share
+        `overlap_segments` segments of context.
+        """
+        n = len(self)
+        counts = [length_function(self.segment_text(i)) for i in range(n)]
+        result: List[TimedChunk] = []
+        first = 0
+        while first < n:
+            last = first
+            tokens = counts[first]
+            while last + 1 < n:
+                next_tokens = counts[last + 1] + 1
+                if tokens + next_tokens > max_tokens:
+                    break
+                if max_seconds is not None and self.end(last + 1) - self.starts[first] > max_seconds:
+                    break
+                tokens += next_tokens
+                last += 1
+            result.append(self._span(first, last))
+            if last + 1 >= n:
+                break
+            first = max(last + 1 - overlap_segments, first + 1)
+        return result
@@ -0,0 +1,96 @@
+"""
+Server-side analysis sessions.
+
+/api/analyze/summary stores the transcript here and returns an analysis_id,
+so the derived endpoints and /api/chat don't need the transcript re-uploaded.
+
+Configuration (environment):
+    ANALYSIS_SESSION_TTL      seconds a session stays alive (default 6h)
+    ANALYSIS_SESSION_ENTRIES  maximum live sessions, LRU evicted (default 1024)
+"""
+
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from app.services.cache import TTLCache
+from app.services.segments import TimedTranscript
+from app.services.tokens import count_tokens
+
+
+@dataclass
+class AnalysisSession:
+    id: str
+    video_id: str
+    title: str
+    transcript: str
+    track: Optional[Dict[str, Any]] = None
+    # Caption timings over `transcript` (None when unknown)
+    segments: Optional[TimedTranscript] = None
+    created_at: float = field(default_factory=time.time)
+    # Map notes and condensed transcripts (see longdoc.fit_transcript)
+    digests: Dict[str, Any] = field(default_factory=dict)
+    # Chat retrieval index and the task building it (see retrieval.get_retrieval_index)
+    index: Optional[Any] = None
+    index_task: Optional[Any] = field(default=None, repr=False, compare=False)
+
+    def transcript_tokens(self, timestamped: bool = False) -> int:
+        """Tokens of the transcript, or of timestamped_transcript() when `timestamped`."""
+        key = "tokens:timestamped" if timestamped else "tokens"
+        if key not in self.digests:
+            text = self.timestamped_transcript() if timestamped else self.transcript
+            self.digests[key] = count_tokens(text)
+        return self.digests[key]
+
+    def timestamped_transcript(self) -> str:
+        """The transcript with a [m:ss] marker about every minute, when timings are known."""
+        if self.segments is None:
+            return self.transcript
+        if "timestamped" not in self.digests:
+            self.digests["timestamped"] = self.segments.marked_text()
+        return self.digests["timestamped"]
+
+
+class SessionStore:
+    def __init__(self, max_entries: int, ttl: float):
+        self._sessions = TTLCache(max_entries=max_entries, ttl=ttl)
+
+    def create(
+        self,
+        video_id: str,
+        title: str,
+        transcript: str,
+        track: Optional[Dict[str, Any]] = None,
+        segments: Optional[TimedTranscript] = None,
+    ) -> AnalysisSession:
+        session = AnalysisSession(
+            id=uuid.uuid4().hex,
+            video_id=video_id,
+            title=title,
+            transcript=transcript,
+            track=track,
+            segments=segments,
+        )
+        self._sessions.set(session.id, session)
+        return session
+
+    def get(self, analysis_id: str) -> Optional[AnalysisSession]:
+        return self._sessions.get(analysis_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._sessions.stats()
+
+
+_store: Optional[SessionStore] = None
+
+
+def get_session_store() -> SessionStore:
+    global _store
+    if _store is None:
+        _store = SessionStore(
+            max_entries=int(os.getenv("ANALYSIS_SESSION_ENTRIES", "1024")),
+            ttl=float(os.getenv("ANALYSIS_SESSION_TTL", str(6 * 3600))),
+        )
+    return _store
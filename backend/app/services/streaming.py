@@ -0,0 +1,17 @@
+"""
+Server-Sent Events helpers for the streaming endpoints.
+"""
+
+import json
+from typing import Any
+
+# Disable proxy buffering (nginx) so events reach the client as they are produced
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one SSE frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
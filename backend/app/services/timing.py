@@ -0,0 +1,61 @@
+"""
+Per-stage wall-clock timing for the analysis pipeline.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict, Iterator, Optional, Protocol
+
+from app.services.metrics import STAGE_SECONDS
+
+
+class StageListener(Protocol):
+    """Told when each stage starts and finishes (e.g. a background job's progress)."""
+
+    def stage_started(self, name: str) -> None: ...
+
+    def stage_finished(self, name: str, ms: float) -> None: ...
+
+
+class StageTimer:
+    """Records the duration of named stages, in milliseconds (and in the stage histogram)."""
+
+    def __init__(self, listener: Optional[StageListener] = None) -> None:
+        self._started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.listener = listener
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        if self.listener is not None:
+            self.listener.stage_started(name)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = elapsed * 1000
+            STAGE_SECONDS.observe(elapsed, stage=name)
+            if self.listener is not None:
+                self.listener.stage_finished(name, self.stages[name])
+
+    async def run(self, name: str, awaitable: Awaitable[Any]) -> Any:
+        """Await `awaitable` while timing it as stage `name`."""
+        with self.stage(name):
+            return await awaitable
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self._started) * 1000
+
+    def as_dict(self) -> Dict[str, float]:
+        timings = {name: round(ms, 1) for name, ms in self.stages.items()}
+        timings["total"] = round(self.total_ms(), 1)
+        return timings
+
+    def server_timing(self) -> str:
+        """Format as a Server-Timing header value (visible in browser devtools)."""
+        return self.format_server_timing(self.as_dict())
+
+    @staticmethod
+    def format_server_timing(timings: Dict[str, float]) -> str:
+        return ", ".join(f"{name};dur={ms}" for name, ms in timings.items())
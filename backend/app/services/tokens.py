@@ -0,0 +1,120 @@
+"""
+Token counting and prompt budgeting.
+
+Transcript slices and chunks are sized in tokens rather than characters:
+Korean text costs roughly four times as many tokens per character as
+English, so a character limit either overflows the context or wastes it.
+
+Counts come from tiktoken's cl100k_base encoding when tiktoken is installed
+(the Llama 3 tokenizer is built on the same BPE, so it is a close proxy),
+otherwise from a character-class estimate.
+
+Configuration (environment):
+    TOKEN_SAFETY_MARGIN   tokens kept free in every prompt (default 256)
+"""
+
+import os
+from typing import Dict, List, Optional
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# Context window (prompt + completion) per model, in tokens
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "llama-3.1-8b-instant": 131072,
+    "llama-3.3-70b-versatile": 131072,
+    "meta-llama/llama-4-scout-17b-16e-instruct": 131072,
+    "openai/gpt-oss-120b": 131072,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: ~1 token per Hangul syllable, ~4 ASCII chars per token."""
+    hangul = sum(1 for ch in text if "가" <= ch <= "힣")
+    return hangul + (len(text) - hangul) // 4 + 1
+
+
+_encoding: Optional[object] = None
+_encoding_loaded = False
+
+
+def _load_encoding() -> Optional[object]:
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            # Not installed, or the BPE file can't be fetched (offline)
+            _encoding = None
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _load_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """The longest prefix of `text` that fits in `max_tokens`."""
+    encoding = _load_encoding()
+    if encoding is not None:
+        ids = encoding.encode(text, disallowed_special=())
+        if len(ids) <= max_tokens:
+            return text
+        # Trailing replacement char if the cut lands inside a multi-byte character
+        return encoding.decode(ids[:max_tokens]).rstrip("�")
+    budget = max_tokens - 1
+    ascii_run = 0
+    for i, ch in enumerate(text):
+        if "가" <= ch <= "힣":
+            budget -= 1
+        else:
+            ascii_run += 1
+            if ascii_run == 4:
+                budget -= 1
+                ascii_run = 0
+        if budget < 0:
+            return text[:i]
+    return text
+
+
+def split_by_tokens(text: str, chunk_tokens: int, overlap_tokens: int = 0) -> List[str]:
+    """Split on paragraph/sentence/word boundaries into chunks of at most `chunk_tokens`."""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_tokens,
+        chunk_overlap=overlap_tokens,
+        length_function=count_tokens,
+        separators=SEPARATORS,
+    )
+    return splitter.split_text(text)
+
+
+def context_window(*models: str) -> int:
+    """The smallest context window among `models` (e.g. a primary and its fallback)."""
+    return min(MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW) for model in models if model)
+
+
+def prompt_budget(
+    models: List[str],
+    template: str,
+    max_tokens: int,
+    target: Optional[int] = None,
+    reserve: int = 0,
+) -> int:
+    """
+    Tokens available for the variable part of a prompt (transcript, notes):
+    the context window minus the template itself, the completion's
+    `max_tokens`, any other `reserve`d inputs and a safety margin,
+    capped at `target` when given.
+    """
+    margin = int(os.getenv("TOKEN_SAFETY_MARGIN", "256"))
+    available = context_window(*models) - count_tokens(template) - max_tokens - reserve - margin
+    if target is not None:
+        available = min(available, target)
+    return max(available, 0)
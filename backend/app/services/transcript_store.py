@@ -0,0 +1,52 @@
+"""
+Transcript store keyed by video ID and language preference.
+
+Configuration (environment):
+    TRANSCRIPT_CACHE_TTL             seconds an entry stays valid (default 7 days)
+    TRANSCRIPT_CACHE_MEMORY_ENTRIES  in-memory LRU size (default 256)
+    TRANSCRIPT_CACHE_DISK_ENTRIES    on-disk size cap (default 10000)
+    TRANSCRIPT_CACHE_PATH            SQLite file; empty disables the disk tier
+"""
+
+import os
+from typing import Any, Dict, Optional, Sequence
+
+from app.services.cache import SQLiteStore, TieredCache, TTLCache
+
+_store: Optional[TieredCache] = None
+
+
+def get_transcript_store() -> TieredCache:
+    global _store
+    if _store is None:
+        ttl = float(os.getenv("TRANSCRIPT_CACHE_TTL", str(7 * 24 * 3600)))
+        memory = TTLCache(
+            max_entries=int(os.getenv("TRANSCRIPT_CACHE_MEMORY_ENTRIES", "256")),
+            ttl=ttl,
+        )
+        path = os.getenv("TRANSCRIPT_CACHE_PATH", ".cache/transcripts.sqlite3")
+        disk = None
+        if path:
+            disk = SQLiteStore(
+                path,
+                max_entries=int(os.getenv("TRANSCRIPT_CACHE_DISK_ENTRIES", "10000")),
+                ttl=ttl,
+            )
+        _store = TieredCache(memory, disk)
+    return _store
+
+
+def transcript_key(video_id: str, languages: Sequence[str]) -> str:
+    return f"transcript:{video_id}:{','.join(languages)}"
+
+
+def load_transcript(video_id: str, languages: Sequence[str]) -> Optional[Any]:
+    return get_transcript_store().get(transcript_key(video_id, languages))
+
+
+def save_transcript(video_id: str, languages: Sequence[str], value: Any) -> None:
+    get_transcript_store().set(transcript_key(video_id, languages), value)
+
+
+def transcript_cache_stats() -> Dict[str, Any]:
+    return get_transcript_store().stats()
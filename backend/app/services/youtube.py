@@ -1,8 +1,16 @@
+import os
 import re
 import yt_dlp
-from typing import Optional, List
+from typing import Any, Optional, List, Sequence, Tuple
 from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
 
+from app.services.cache import TTLCache
+from app.services.logger import get_logger
+from app.services.segments import TimedTranscript
+from app.services.transcript_store import load_transcript, save_transcript
+
+log = get_logger(__name__)
+
 def extract_video_id(url: str) -> Optional[str]:
     """Extract YouTube video ID from various URL formats."""
     patterns = [
@@ -16,71 +24,237 @@ def extract_video_id(url: str) -> Optional[str]:
             return match.group(1)
     return None
 
+def is_playlist_url(url: str) -> bool:
+    """A playlist page (/playlist?list=...), as opposed to a video watched within a playlist."""
+    return "list=" in url and (extract_video_id(url) is None or "/playlist" in url)
+
+def get_playlist_video_ids(url: str) -> List[str]:
+    """Video IDs of a playlist, in order, via yt-dlp flat extraction (one page request, no per-video lookups)."""
+    opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'skip_download': True,
+        'extract_flat': 'in_playlist',
+    }
+    try:
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except Exception as e:
+        log.warning("youtube.playlist_failed", url=url, error=str(e))
+        return []
+    return [entry['id'] for entry in info.get('entries') or [] if entry and entry.get('id')]
+
 def format_duration(seconds: int) -> str:
     """Format seconds to MM:SS or HH:MM:SS."""
     if seconds < 3600:
         return f"{seconds // 60}:{seconds % 60:02d}"
     return f"{seconds // 3600}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
 
+# yt-dlp options for the metadata fast path: no format/manifest resolution,
+# no player JS (signature decryption is only needed for downloads).
+LIGHT_METADATA_OPTS = {
+    'quiet': True,
+    'no_warnings': True,
+    'skip_download': True,
+    'noplaylist': True,
+    'extractor_args': {
+        'youtube': {
+            'skip': ['dash', 'hls', 'translated_subs'],
+            'player_skip': ['configs', 'js'],
+        },
+    },
+}
+
+FULL_METADATA_OPTS = {
+    'quiet': True,
+    'no_warnings': True,
+    'extract_flat': False,
+}
+
+_metadata_cache: Optional[TTLCache] = None
+_metadata_failures: Optional[TTLCache] = None
+
+def _get_metadata_caches() -> Tuple[TTLCache, TTLCache]:
+    """
+    Positive cache (METADATA_CACHE_TTL, default 6h) and negative cache
+    for IDs whose extraction failed (METADATA_NEGATIVE_TTL, default 10min).
+    """
+    global _metadata_cache, _metadata_failures
+    if _metadata_cache is None:
+        max_entries = int(os.getenv("METADATA_CACHE_ENTRIES", "1024"))
+        _metadata_cache = TTLCache(max_entries, float(os.getenv("METADATA_CACHE_TTL", "21600")))
+        _metadata_failures = TTLCache(max_entries, float(os.getenv("METADATA_NEGATIVE_TTL", "600")))
+    return _metadata_cache, _metadata_failures
+
+def metadata_cache_stats() -> dict:
+    cache, failures = _get_metadata_caches()
+    return {"positive": cache.stats(), "negative": failures.stats()}
+
+def _default_thumbnail(video_id: str) -> str:
+    # hqdefault exists for every video; maxresdefault only for HD uploads
+    return f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+
+def _thumbnail(video_id: str, info: dict) -> str:
+    """yt-dlp's pick, else the best of the raw list (unprocessed extractions have no 'thumbnail')."""
+    if info.get('thumbnail'):
+        return info['thumbnail']
+    thumbnails = [t for t in info.get('thumbnails') or [] if t.get('url')]
+    if not thumbnails:
+        return _default_thumbnail(video_id)
+    # Same order yt-dlp sorts by: preference, then size
+    best = max(thumbnails, key=lambda t: (-1 if t.get('preference') is None else t['preference'], t.get('width') or 0, t.get('height') or 0))
+    return best['url']
+
+def _metadata_from_info(video_id: str, info: dict) -> dict:
+    return {
+        'id': video_id,
+        'url': f"https://www.youtube.com/watch?v={video_id}",
+        'title': info.get('title') or 'Unknown Title',
+        'thumbnail': _thumbnail(video_id, info),
+        'duration': format_duration(int(info.get('duration') or 0)),
+        'channelTitle': info.get('channel') or info.get('uploader') or 'Unknown Channel',
+        'publishedAt': info.get('upload_date') or 'Unknown',
+        'views': info.get('view_count') or 0,
+    }
+
+def _fallback_metadata(video_id: str) -> dict:
+    return {
+        'id': video_id,
+        'url': f"https://www.youtube.com/watch?v={video_id}",
+        'title': 'Video Analysis',
+        'thumbnail': _default_thumbnail(video_id),
+        'duration': '0:00',
+        'channelTitle': 'Unknown Channel',
+        'publishedAt': 'Unknown',
+        'views': 0,
+    }
+
+def _extract_metadata(video_id: str, light: bool) -> dict:
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    opts = LIGHT_METADATA_OPTS if light else FULL_METADATA_OPTS
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        # process=False skips format selection, which VideoMetadata never uses
+        info = ydl.extract_info(url, download=False, process=not light)
+    return _metadata_from_info(video_id, info)
+
 def get_video_metadata(video_id: str) -> dict:
-    """Get video metadata using yt-dlp."""
+    """
+    Get video metadata using yt-dlp.
+    Uses the lightweight extractor (METADATA_FETCH_MODE=light, the default)
+    and falls back to a full extraction once; failures are negatively cached.
+    """
+    cache, failures = _get_metadata_caches()
+    cached = cache.get(video_id)
+    if cached is not None:
+        return cached
+    if failures.get(video_id) is not None:
+        return _fallback_metadata(video_id)
+
+    light = os.getenv("METADATA_FETCH_MODE", "light") == "light"
     try:
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': False,
-        }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # Note: This might be slow for some videos as it fetches info
-            info = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
-            return {
-                'id': video_id,
-                'url': f"https://www.youtube.com/watch?v={video_id}",
-                'title': info.get('title', 'Unknown Title'),
-                'thumbnail': info.get('thumbnail', f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"),
-                'duration': format_duration(info.get('duration', 0)),
-                'channelTitle': info.get('channel', 'Unknown Channel'),
-                'publishedAt': info.get('upload_date', 'Unknown'),
-                'views': info.get('view_count', 0),
-            }
+        metadata = _extract_metadata(video_id, light=light)
     except Exception as e:
-        print(f"Metadata error: {e}")
-        return {
-            'id': video_id,
-            'url': f"https://www.youtube.com/watch?v={video_id}",
-            'title': 'Video Analysis',
-            'thumbnail': f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
-            'duration': '0:00',
-            'channelTitle': 'Unknown Channel',
-            'publishedAt': 'Unknown',
-            'views': 0,
-        }
+        log.warning("youtube.metadata_failed", video_id=video_id, light=light, error=str(e))
+        metadata = None
+        if light:
+            try:
+                metadata = _extract_metadata(video_id, light=False)
+            except Exception as e:
+                log.warning("youtube.metadata_failed", video_id=video_id, light=False, error=str(e))
+
+    if metadata is None:
+        failures.set(video_id, True)
+        return _fallback_metadata(video_id)
+
+    cache.set(video_id, metadata)
+    return metadata
+
+def transcript_languages() -> Tuple[str, ...]:
+    """Caption language preference order (TRANSCRIPT_LANGUAGES, default "ko,en")."""
+    raw = os.getenv("TRANSCRIPT_LANGUAGES", "ko,en")
+    return tuple(lang.strip() for lang in raw.split(",") if lang.strip())
+
+def _matches(language_code: str, lang: str) -> bool:
+    # "en" matches "en", "en-US", "en-GB", ...
+    return language_code == lang or language_code.split('-')[0] == lang
+
+def select_transcript_track(tracks: list, languages: Sequence[str]) -> Tuple[Optional[Any], Optional[str]]:
+    """
+    Pick the best caption track from an already-listed set.
+    Order: requested languages in preference order (manual before generated),
+    then a translatable track translated into the first preference,
+    then any track (manual first).
+    Returns (track, translate_to).
+    """
+    for lang in languages:
+        for generated in (False, True):
+            for track in tracks:
+                if track.is_generated == generated and _matches(track.language_code, lang):
+                    return track, None
+
+    if languages:
+        target = languages[0]
+        for track in sorted(tracks, key=lambda t: t.is_generated):
+            if track.is_translatable and any(
+                tl.language_code == target for tl in track.translation_languages
+            ):
+                return track, target
 
-def get_transcript(video_id: str) -> Optional[str]:
-    """Get transcript from YouTube video."""
+    if tracks:
+        return sorted(tracks, key=lambda t: t.is_generated)[0], None
+    return None, None
+
+def get_transcript_with_track(video_id: str, languages: Optional[Sequence[str]] = None) -> Optional[dict]:
+    """
+    Get transcript from the transcript store, fetching from YouTube on a miss.
+    Returns {'text': str, 'segments': {...}, 'track': {...}}: the joined text,
+    its caption timings (TimedTranscript.to_dict, see timed_transcript) and
+    the chosen caption track.
+    """
+    languages = tuple(languages or transcript_languages())
+    cached = load_transcript(video_id, languages)
+    if isinstance(cached, dict):
+        return cached
+
+    result = _fetch_transcript(video_id, languages)
+    if result:
+        save_transcript(video_id, languages, result)
+    return result
+
+def get_transcript(video_id: str, languages: Optional[Sequence[str]] = None) -> Optional[str]:
+    """Get transcript text only (see get_transcript_with_track)."""
+    result = get_transcript_with_track(video_id, languages)
+    return result['text'] if result else None
+
+def timed_transcript(result: dict) -> Optional[TimedTranscript]:
+    """The TimedTranscript of a get_transcript_with_track result (None for entries cached without timings)."""
+    segments = result.get('segments')
+    return TimedTranscript.from_dict(result['text'], segments) if segments else None
+
+def _fetch_transcript(video_id: str, languages: Sequence[str]) -> Optional[dict]:
+    """List the available tracks once, then fetch exactly one."""
     try:
         ytt_api = YouTubeTranscriptApi()
-        
-        languages_to_try = [['ko'], ['en'], ['ko', 'en']]
-        
-        for langs in languages_to_try:
-            try:
-                fetched = ytt_api.fetch(video_id, languages=langs)
-                transcript_data = fetched.to_raw_data()
-                return " ".join([entry['text'] for entry in transcript_data])
-            except Exception:
-                continue
-        
-        # Try any available
-        try:
-            transcript_list = ytt_api.list(video_id)
-            for transcript in transcript_list:
-                fetched = transcript.fetch()
-                return " ".join([entry['text'] for entry in fetched.to_raw_data()])
-        except:
-            pass
-            
+        tracks = list(ytt_api.list(video_id))
+        track, translate_to = select_transcript_track(tracks, languages)
+        if track is None:
+            return None
+
+        chosen = track.translate(translate_to) if translate_to else track
+        timed = TimedTranscript.from_entries(chosen.fetch().to_raw_data())
+        if not timed.text:
+            return None
+        return {
+            'text': timed.text,
+            'segments': timed.to_dict(),
+            'track': {
+                'language_code': chosen.language_code,
+                'language': chosen.language,
+                'is_generated': track.is_generated,
+                'translated_from': track.language_code if translate_to else None,
+            },
+        }
     except Exception as e:
-        print(f"Transcript error: {e}")
+        log.warning("youtube.transcript_failed", video_id=video_id, error=str(e))
     
     return None
@@ -0,0 +1,106 @@
+"""
+VideoInsight AI - batch summarizer (command line)
+
+Summarizes a list of YouTube video / playlist URLs with the same pipeline,
+caches and rate limits as the API, writing one JSON record per video to a
+JSONL file. Re-running with the same output file resumes: videos already
+recorded as "ok" are skipped, failed ones are retried.
+
+    python batch.py https://www.youtube.com/playlist?list=... -o results.jsonl
+    python batch.py -i urls.txt -o results.jsonl --llm-concurrency 2
+"""
+
+import argparse
+import asyncio
+import sys
+
+from dotenv import load_dotenv
+
+from app.api.endpoints.analysis import BatchRequest, batch_runner
+from app.services.batch import JsonlWriter, load_checkpoint, resolve_video_ids
+from app.services.executor import run_blocking, shutdown_executor
+from app.services.llm import close_llm_registry, get_llm_registry
+
+load_dotenv()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Summarize YouTube videos and playlists to JSONL.")
+    parser.add_argument("urls", nargs="*", help="video or playlist URLs")
+    parser.add_argument("-i", "--input", help="file with one URL per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", required=True, help="results JSONL (also the resume checkpoint)")
+    parser.add_argument("--length", default="MEDIUM", choices=["SHORT", "MEDIUM", "LONG"])
+    parser.add_argument("--language", default="ko")
+    parser.add_argument("--include-transcript", action="store_true", help="store each transcript in its record")
+    parser.add_argument("--fetch-concurrency", type=int, help="default BATCH_FETCH_CONCURRENCY (8)")
+    parser.add_argument("--llm-concurrency", type=int, help="default BATCH_LLM_CONCURRENCY (4)")
+    parser.add_argument("--restart", action="store_true", help="ignore and overwrite existing results")
+    return parser.parse_args()
+
+
+def read_urls(args: argparse.Namespace) -> list:
+    urls = list(args.urls)
+    if args.input:
+        stream = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        with stream:
+            urls.extend(stream.read().splitlines())
+    return urls
+
+
+async def run(args: argparse.Namespace) -> int:
+    if get_llm_registry() is None:
+        print("GROQ_API_KEY not configured", file=sys.stderr)
+        return 2
+
+    video_ids, invalid = await run_blocking(resolve_video_ids, read_urls(args))
+    for item in invalid:
+        print(f"Skipping (no video found): {item}", file=sys.stderr)
+    if not video_ids:
+        print("Nothing to analyze", file=sys.stderr)
+        return 1
+
+    done = set() if args.restart else load_checkpoint(args.output)
+    remaining = sum(1 for video_id in video_ids if video_id not in done)
+    print(f"{len(video_ids)} videos, {len(video_ids) - remaining} already done, {remaining} to analyze")
+
+    request = BatchRequest(
+        urls=[],
+        length=args.length,
+        language=args.language,
+        include_transcript=args.include_transcript,
+    )
+    runner = batch_runner(
+        request,
+        fetch_concurrency=args.fetch_concurrency,
+        llm_concurrency=args.llm_concurrency,
+    )
+    writer = JsonlWriter(args.output, truncate=args.restart)
+    finished = 0
+
+    def on_result(record: dict) -> None:
+        nonlocal finished
+        finished += 1
+        writer.write(record)
+        if record["status"] == "ok":
+            label = record["metadata"]["title"]
+        else:
+            detail = record["error"].get("detail")
+            label = detail.get("code") if isinstance(detail, dict) else detail
+        print(f"[{finished}/{remaining}] {record['status']:5} {record['video_id']} {label} ({record['elapsed_ms'] / 1000:.1f}s)")
+
+    try:
+        stats = await runner.run(video_ids, on_result, skip=done)
+    finally:
+        writer.close()
+        await close_llm_registry()
+        shutdown_executor()
+    print(f"Done: {stats}")
+    return 0 if stats["error"] == 0 else 1
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(asyncio.run(run(parse_args())))
+    except KeyboardInterrupt:
+        # Everything finished so far is in the output file; rerun to resume
+        sys.exit(130)
@@ -0,0 +1,16 @@
+"""
+Offline benchmarks for the analysis pipeline.
+
+Everything external is replaced: YouTube by transcript/metadata fixtures
+(benchmarks.fixtures), Groq by a deterministic fake chat model with a
+configurable first-token latency and token rate (benchmarks.fake_llm).
+The rest of the stack is real: FastAPI routing and validation, sessions,
+caches, the scheduler, tier routing, map-reduce and chat retrieval.
+
+    cd backend
+    python -m benchmarks.run --requests 40 --concurrency 8
+    python -m benchmarks.run --json bench.json            # save a run (refused if any request failed)
+    python -m benchmarks.run --baseline benchmarks/baseline.json   # fail on regressions
+    python -m benchmarks.record https://youtu.be/...      # record a real fixture
+    python -m benchmarks.load                             # ramp users to saturation
+"""
@@ -0,0 +1,156 @@
+"""
+Deterministic stand-in for ChatGroq.
+
+The response depends only on the prompt (seeded from its hash), so runs are
+comparable; its timing is `latency` to the first token plus one token every
+1/`tokens_per_second`. Prompts asking for the quiz / flashcard / study pack
+JSON or a mermaid mind map get output in that shape, so the parsers and
+response models do their real work; everything else gets plain notes.
+Usage metadata is reported like Groq's, so token metrics are exercised too.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict
+
+from app.services.tokens import estimate_tokens
+
+WORDS = [
+    "오늘은", "강의에서", "데이터를", "모델이", "학습", "과정을", "중요한", "개념", "예를", "들어",
+    "결과를", "확인하면", "그래서", "함수", "값이", "바뀌는", "이유는", "정리하면", "다음", "단계에서",
+    "the", "model", "gradient", "loss", "example", "result", "function", "value", "layer", "training",
+]
+
+# Words streamed per chunk: close to what Groq sends, without one timer per token
+STREAM_WORDS_PER_CHUNK = 4
+
+
+def _rng(prompt: str) -> random.Random:
+    return random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _notes(rng: random.Random, tokens: int) -> str:
+    lines: List[str] = []
+    used = 0
+    while used < tokens:
+        line = f"- {_sentence(rng, rng.randint(6, 14))}"
+        lines.append(line)
+        used += estimate_tokens(line)
+    return "\n".join(lines)
+
+
+def _quizzes(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "question": _sentence(rng, 8) + "?",
+            "options": [_sentence(rng, 3) for _ in range(4)],
+            "answer_index": rng.randrange(4),
+            "explanation": _sentence(rng, 12),
+        }
+        for _ in range(count)
+    ]
+
+
+def _flashcards(rng: random.Random, count: int) -> List[Dict[str, str]]:
+    return [{"term": _sentence(rng, 2), "definition": _sentence(rng, 10)} for _ in range(count)]
+
+
+def _mindmap(rng: random.Random) -> str:
+    lines = ["mindmap", f"  root(({_sentence(rng, 2)}))"]
+    for _ in range(4):
+        lines.append(f"    {_sentence(rng, 2)}")
+        lines.extend(f"      {_sentence(rng, 3)}" for _ in range(3))
+    return "\n".join(lines)
+
+
+def fake_response(prompt: str, tokens: int) -> str:
+    """The fake model's answer to `prompt`: shaped like the requested output, ~`tokens` long for free text."""
+    rng = _rng(prompt)
+    if "study pack" in prompt:
+        return json.dumps({
+            "summary": _notes(rng, tokens // 2),
+            "mindmap": _mindmap(rng),
+            "quizzes": _quizzes(rng, 4),
+            "flashcards": _flashcards(rng, 6),
+        }, ensure_ascii=False)
+    if '"quizzes"' in prompt:
+        return json.dumps({"quizzes": _quizzes(rng, 5)}, ensure_ascii=False)
+    if '"flashcards"' in prompt:
+        return json.dumps({"flashcards": _flashcards(rng, 6)}, ensure_ascii=False)
+    if "mermaid" in prompt:
+        return _mindmap(rng)
+    return _notes(rng, tokens)
+
+
+class FakeChatModel(BaseChatModel):
+    # Allows the model_name field, named as on ChatGroq
+    model_config = ConfigDict(protected_namespaces=())
+
+    model_name: str = "fake"
+    max_tokens: int = 4096
+    # Seconds until the first token, then tokens per second
+    latency: float = 0.2
+    tokens_per_second: float = 500.0
+    # Length of free-text answers (capped by max_tokens)
+    response_tokens: int = 300
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake"
+
+    def _respond(self, messages: List[BaseMessage]) -> Tuple[str, Dict[str, int]]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        text = fake_response(prompt, min(self.response_tokens, self.max_tokens))
+        usage = {"input_tokens": estimate_tokens(prompt), "output_tokens": estimate_tokens(text)}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return text, usage
+
+    def _duration(self, usage: Dict[str, int]) -> float:
+        return self.latency + usage["output_tokens"] / self.tokens_per_second
+
+    def _result(self, text: str, usage: Dict[str, int]) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text, usage_metadata=usage))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text, usage = self._respond(messages)
+        time.sleep(self._duration(usage))
+        return self._result(text, usage)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text, usage = self._respond(messages)
+        await asyncio.sleep(self._duration(usage))
+        return self._result(text, usage)
+
+    def _pieces(self, text: str) -> Iterator[str]:
+        words = text.split(" ")
+        for i in range(0, len(words), STREAM_WORDS_PER_CHUNK):
+            piece = " ".join(words[i:i + STREAM_WORDS_PER_CHUNK])
+            yield piece if i == 0 else " " + piece
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        text, usage = self._respond(messages)
+        await asyncio.sleep(self.latency)
+        for piece in self._pieces(text):
+            await asyncio.sleep(estimate_tokens(piece) / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text, usage = self._respond(messages)
+        time.sleep(self.latency)
+        for piece in self._pieces(text):
+            time.sleep(estimate_tokens(piece) / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
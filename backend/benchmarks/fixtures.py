@@ -0,0 +1,97 @@
+"""
+Transcript / metadata fixtures the benchmarks serve instead of YouTube.
+
+A fixture is one JSON file, written by `python -m benchmarks.record`:
+
+    {"metadata": <get_video_metadata result>,
+     "transcript": <get_transcript_with_track result>}
+
+Without recorded fixtures, deterministic synthetic ones stand in: captions
+of a Korean lecture's shape (a few seconds and 8-14 words each) for a short,
+a medium and a long video, the long one large enough to go through the
+map-reduce path.
+"""
+
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.services.segments import TimedTranscript
+from app.services.youtube import format_duration
+
+from benchmarks.fake_llm import WORDS
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures"
+
+# name -> video length in minutes
+SYNTHETIC_VIDEOS = {"short": 5, "medium": 30, "long": 120}
+
+
+class Fixture:
+    __slots__ = ("name", "metadata", "transcript")
+
+    def __init__(self, name: str, metadata: Dict[str, Any], transcript: Dict[str, Any]):
+        self.name = name
+        self.metadata = metadata
+        self.transcript = transcript
+
+    def for_video(self, video_id: str) -> "Fixture":
+        """This fixture served as `video_id`, so each benchmark request can be a distinct video."""
+        metadata = {**self.metadata, "id": video_id, "url": f"https://www.youtube.com/watch?v={video_id}"}
+        return Fixture(self.name, metadata, self.transcript)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"metadata": self.metadata, "transcript": self.transcript}
+
+
+def synthetic_fixture(name: str, minutes: int, seed: int = 0) -> Fixture:
+    rng = random.Random(f"{name}:{seed}")
+    entries: List[Dict[str, Any]] = []
+    position = 0.0
+    while position < minutes * 60:
+        duration = round(rng.uniform(2.5, 5.5), 2)
+        words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 14)))
+        entries.append({"text": words, "start": round(position, 2), "duration": duration})
+        position += duration
+    timed = TimedTranscript.from_entries(entries)
+    metadata = {
+        "id": name,
+        "url": "",
+        "title": f"Benchmark lecture ({name}, {minutes} min)",
+        "thumbnail": "",
+        "duration": format_duration(minutes * 60),
+        "channelTitle": "Benchmark",
+        "publishedAt": "20240101",
+        "views": 0,
+    }
+    transcript = {
+        "text": timed.text,
+        "segments": timed.to_dict(),
+        "track": {"language_code": "ko", "language": "Korean", "is_generated": True, "translated_from": None},
+    }
+    return Fixture(name, metadata, transcript)
+
+
+def load_fixture(path: Path) -> Fixture:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return Fixture(path.stem, data["metadata"], data["transcript"])
+
+
+def load_fixtures(directory: Optional[Path] = None, synthetic: bool = True) -> List[Fixture]:
+    """Recorded fixtures in `directory` (default benchmarks/fixtures), else the synthetic set."""
+    directory = directory or FIXTURE_DIR
+    fixtures = [load_fixture(path) for path in sorted(directory.glob("*.json"))] if directory.is_dir() else []
+    if not fixtures and synthetic:
+        fixtures = [synthetic_fixture(name, minutes) for name, minutes in SYNTHETIC_VIDEOS.items()]
+    return fixtures
+
+
+def save_fixture(fixture: Fixture, directory: Optional[Path] = None) -> Path:
+    directory = directory or FIXTURE_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{fixture.name}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fixture.to_dict(), f, ensure_ascii=False)
+    return path
@@ -0,0 +1,118 @@
+"""
+Run a workload at a fixed concurrency and summarize it: latency
+percentiles, throughput and peak memory.
+"""
+
+import asyncio
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Tuple
+
+# One request: index -> (label, e.g. the endpoint; ok)
+AsyncRequest = Callable[[int], Awaitable[Tuple[str, bool]]]
+SyncRequest = Callable[[int], Tuple[str, bool]]
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list (0 when empty)."""
+    if not ordered:
+        return 0.0
+    rank = max(1, min(len(ordered), round(q / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+
+def max_rss_bytes() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class Measurement:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.elapsed = 0.0
+        self.peak_traced = 0
+        self._lock = threading.Lock()
+
+    def record(self, label: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies.setdefault(label, []).append(seconds)
+            if not ok:
+                self.errors[label] = self.errors.get(label, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-label stats plus an "all" row; latencies in ms, throughput in requests/s."""
+        rows = {label: self._row(values, self.errors.get(label, 0)) for label, values in self.latencies.items()}
+        if len(rows) > 1:
+            everything = [value for values in self.latencies.values() for value in values]
+            rows["all"] = self._row(everything, sum(self.errors.values()))
+        return {
+            "elapsed_s": round(self.elapsed, 3),
+            "peak_traced_mb": round(self.peak_traced / 2**20, 1),
+            "max_rss_mb": round(max_rss_bytes() / 2**20, 1),
+            "endpoints": rows,
+        }
+
+    def _row(self, values: List[float], errors: int) -> Dict[str, Any]:
+        ordered = sorted(value * 1000 for value in values)
+        return {
+            "requests": len(ordered),
+            "errors": errors,
+            "p50_ms": round(percentile(ordered, 50), 1),
+            "p95_ms": round(percentile(ordered, 95), 1),
+            "p99_ms": round(percentile(ordered, 99), 1),
+            "max_ms": round(ordered[-1], 1) if ordered else 0.0,
+            "throughput_rps": round(len(ordered) / self.elapsed, 2) if self.elapsed else 0.0,
+        }
+
+
+@contextmanager
+def measuring(measurement: Measurement, trace_memory: bool) -> Iterator[None]:
+    """Time the block and (optionally) trace its peak Python heap usage."""
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        measurement.elapsed = time.perf_counter() - started
+        if trace_memory:
+            measurement.peak_traced = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+
+async def run_async(request: AsyncRequest, requests: int, concurrency: int, trace_memory: bool = True) -> Measurement:
+    """Issue `requests` requests, at most `concurrency` at a time."""
+    measurement = Measurement()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> None:
+        async with limit:
+            started = time.perf_counter()
+            label, ok = await request(index)
+            measurement.record(label, time.perf_counter() - started, ok)
+
+    with measuring(measurement, trace_memory):
+        await asyncio.gather(*(one(index) for index in range(requests)))
+    return measurement
+
+
+def run_threads(request: SyncRequest, requests: int, concurrency: int, trace_memory: bool = True) -> Measurement:
+    """run_async for blocking workloads: `concurrency` worker threads."""
+    measurement = Measurement()
+
+    def one(index: int) -> None:
+        started = time.perf_counter()
+        label, ok = request(index)
+        measurement.record(label, time.perf_counter() - started, ok)
+
+    with measuring(measurement, trace_memory):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, range(requests)))
+    return measurement
@@ -0,0 +1,436 @@
+"""
+Load test: how many simultaneous users one uvicorn worker sustains.
+
+Virtual users loop through what a user of the app does: analyze a video
+(summary), open the mind map, quiz and flashcards together, then ask a few
+chat questions in one conversation, with think time between steps. Users
+are added in stages (--users 1,2,4,...); each stage reports per endpoint
+the client-side latency and the server-side queueing delay (time spent
+waiting for the LLM scheduler and blocking-I/O threads), plus the
+server's event loop lag. Both server figures are read from /metrics
+deltas over the stage.
+
+A first stage with any failed request aborts the run: errors at the
+lowest load point to a broken setup (server, fixtures, stubs), not a
+capacity limit. Otherwise the ramp stops at the first saturated stage:
+- the error rate goes over --max-error-rate;
+- an endpoint's p95 goes past --latency-factor times its first-stage p95;
+- throughput grows less than --min-scaling of the user growth;
+- or the event loop lag p99 exceeds --max-loop-lag-ms.
+
+    python -m benchmarks.load                          # spawns benchmarks.serve
+    python -m benchmarks.load --url http://127.0.0.1:8765 --users 4,8,16
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.harness import Measurement
+from benchmarks.run import ARTIFACTS, CHAT_QUERIES
+from benchmarks.serve import add_backend_args
+from benchmarks.stubs import VideoCatalog
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+ROUTES = {
+    "summary": "/api/analyze/summary",
+    "mindmap": "/api/analyze/mindmap",
+    "quiz": "/api/analyze/quiz",
+    "flashcards": "/api/analyze/flashcards",
+    "chat": "/api/chat",
+}
+
+METRIC_PREFIX = "videoinsight_"
+CLIENT_LAG_WARNING_MS = 50
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Ramp virtual users against the API and find its saturation point.")
+    parser.add_argument("--url", help="target server (default: spawn benchmarks.serve on a free port)")
+    parser.add_argument("--users", default="1,2,4,8,16,32,64,128", help="virtual users per stage (default 1,2,4,...,128)")
+    parser.add_argument("--stage-seconds", type=float, default=30, help="duration of each stage (default 30)")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean seconds between a user's steps (default 1)")
+    parser.add_argument("--chat-turns", type=int, default=3, help="chat questions per flow (default 3)")
+    parser.add_argument("--video-pool", type=int, default=0, help="cycle over this many videos (cache hits, coalescing); 0: every flow a new video")
+    parser.add_argument("--timeout", type=float, default=300, help="per-request timeout in seconds (default 300)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="saturated above this error rate (default 0.01)")
+    parser.add_argument("--latency-factor", type=float, default=3.0, help="saturated when an endpoint's p95 exceeds this multiple of its first-stage p95 (default 3)")
+    parser.add_argument("--min-scaling", type=float, default=0.5, help="saturated when throughput grows by less than this share of the user growth (default 0.5)")
+    parser.add_argument("--max-loop-lag-ms", type=float, default=100, help="saturated when event loop lag p99 exceeds this (default 100)")
+    parser.add_argument("--full-ramp", action="store_true", help="keep ramping after saturation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="write the stage reports here")
+    add_backend_args(parser)
+    args = parser.parse_args()
+    args.users = sorted({int(users) for users in args.users.split(",") if users.strip()})
+    if not args.users or args.users[0] < 1:
+        parser.error("--users needs positive counts")
+    return args
+
+
+# --- /metrics deltas ---
+
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_SAMPLE = re.compile(r'^([a-zA-Z_:][\w:]*)(?:\{(.*)\})?\s+(\S+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_metrics(text: str) -> Dict[MetricKey, float]:
+    """Prometheus text exposition -> {(name, sorted labels): value}."""
+    samples: Dict[MetricKey, float] = {}
+    for line in text.splitlines():
+        match = _SAMPLE.match(line)
+        if not match or line.startswith("#"):
+            continue
+        name, labels, value = match.groups()
+        samples[(name, tuple(sorted(_LABEL.findall(labels or ""))))] = float(value)
+    return samples
+
+
+def histogram_delta(
+    before: Dict[MetricKey, float], after: Dict[MetricKey, float], name: str, **labels: str
+) -> Dict[str, Any]:
+    """
+    Count, mean and bucket-resolution p95/p99 (ms) of histogram `name` over
+    the interval between two scrapes, summed over series matching `labels`.
+    A percentile in the overflow bucket is None.
+    """
+    name = METRIC_PREFIX + name
+    buckets: Dict[float, float] = {}
+    total = count = 0.0
+    for (sample, sample_labels), value in after.items():
+        if not sample.startswith(name):
+            continue
+        label_map = dict(sample_labels)
+        if any(label_map.get(key) != wanted for key, wanted in labels.items()):
+            continue
+        delta = value - before.get((sample, sample_labels), 0.0)
+        if sample == name + "_bucket":
+            bound = float(label_map["le"].replace("+Inf", "inf"))
+            buckets[bound] = buckets.get(bound, 0.0) + delta
+        elif sample == name + "_sum":
+            total += delta
+        elif sample == name + "_count":
+            count += delta
+
+    def quantile(q: float) -> Optional[float]:
+        for bound, cumulative in sorted(buckets.items()):
+            if cumulative >= q * count:
+                return None if bound == float("inf") else round(bound * 1000, 1)
+        return None
+
+    if not count:
+        return {"count": 0, "mean_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    return {"count": int(count), "mean_ms": round(total / count * 1000, 1), "p95_ms": quantile(0.95), "p99_ms": quantile(0.99)}
+
+
+# --- virtual users ---
+
+class Recorder:
+    """Results of the stage in progress; requests count in the stage they finish in."""
+
+    def __init__(self) -> None:
+        self.stage = Measurement()
+        self.flows = 0
+        # First failure of the run, for the abort message
+        self.first_error: Optional[str] = None
+
+    def fail(self, label: str, detail: str) -> None:
+        if self.first_error is None:
+            self.first_error = f"{label}: {detail[:500]}"
+
+    def next_stage(self) -> Tuple[Measurement, int]:
+        finished = (self.stage, self.flows)
+        self.stage, self.flows = Measurement(), 0
+        return finished
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, videos: Iterator[int], args: argparse.Namespace, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.videos = videos
+        self.args = args
+        self.rng = rng
+
+    async def think(self) -> None:
+        await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.args.think_time)
+
+    async def call(self, label: str, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.post(ROUTES[label], json=body)
+            ok = response.status_code == 200
+            if not ok:
+                self.recorder.fail(label, f"HTTP {response.status_code}: {response.text}")
+        except httpx.HTTPError as exc:
+            response, ok = None, False
+            self.recorder.fail(label, f"{type(exc).__name__}: {exc}")
+        self.recorder.stage.record(label, time.perf_counter() - started, ok)
+        return response.json() if ok else None
+
+    async def flow(self) -> None:
+        url = f"https://www.youtube.com/watch?v={VideoCatalog.video_id(next(self.videos))}"
+        summary = await self.call("summary", {"url": url})
+        if summary is None:
+            return
+        analysis_id = summary["analysis_id"]
+        await self.think()
+        # The result page loads all three artifacts at once
+        await asyncio.gather(*(self.call(name, {"analysis_id": analysis_id}) for name in ARTIFACTS))
+        conversation_id = None
+        for turn in range(self.args.chat_turns):
+            await self.think()
+            answer = await self.call("chat", {
+                "query": CHAT_QUERIES[turn % len(CHAT_QUERIES)],
+                "analysis_id": analysis_id,
+                "conversation_id": conversation_id,
+            })
+            if answer is None:
+                return
+            conversation_id = answer.get("conversation_id")
+        self.recorder.flows += 1
+
+    async def run(self) -> None:
+        # Spread out the users a stage adds
+        await asyncio.sleep(self.rng.uniform(0, self.args.think_time))
+        while True:
+            await self.flow()
+            await self.think()
+
+
+def video_indexes(pool: int) -> Iterator[int]:
+    return itertools.cycle(range(pool)) if pool > 0 else itertools.count()
+
+
+class ClientLag:
+    """The load generator's own event loop lag: when high, latencies are the client's, not the server's."""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.max_lag = 0.0
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.max_lag = max(self.max_lag, loop.time() - started - self.interval)
+
+    def take(self) -> float:
+        lag, self.max_lag = self.max_lag, 0.0
+        return lag
+
+
+# --- stages ---
+
+def stage_report(
+    users: int, measurement: Measurement, flows: int, before: Dict[MetricKey, float], after: Dict[MetricKey, float], client_lag: float
+) -> Dict[str, Any]:
+    summary = measurement.summary()
+    endpoints = summary["endpoints"]
+    for label, row in endpoints.items():
+        if label in ROUTES:
+            queue = histogram_delta(before, after, "http_request_queue_seconds", route=ROUTES[label])
+            row["queue_mean_ms"], row["queue_p95_ms"] = queue["mean_ms"], queue["p95_ms"]
+    total = endpoints.get("all") or next(iter(endpoints.values()), {"requests": 0, "errors": 0, "throughput_rps": 0.0})
+    return {
+        "users": users,
+        "requests": total["requests"],
+        "errors": total["errors"],
+        "error_rate": round(total["errors"] / total["requests"], 4) if total["requests"] else 0.0,
+        "throughput_rps": total["throughput_rps"],
+        "flows_per_min": round(flows * 60 / measurement.elapsed, 1) if measurement.elapsed else 0.0,
+        "event_loop_lag": histogram_delta(before, after, "event_loop_lag_seconds"),
+        "client_lag_max_ms": round(client_lag * 1000, 1),
+        "endpoints": endpoints,
+    }
+
+
+def saturation(stages: List[Dict[str, Any]], args: argparse.Namespace) -> Optional[str]:
+    """Why the last stage is saturated, or None."""
+    current, first = stages[-1], stages[0]
+    if not current["requests"]:
+        return "no request completed within the stage"
+    if current["error_rate"] > args.max_error_rate:
+        return f"error rate {current['error_rate']:.1%}"
+    for label, row in current["endpoints"].items():
+        baseline = first["endpoints"].get(label)
+        if label != "all" and baseline and baseline["p95_ms"] and row["p95_ms"] > args.latency_factor * baseline["p95_ms"]:
+            return f"{label} p95 {row['p95_ms']:.0f} ms, over {args.latency_factor:g}x its {first['users']}-user {baseline['p95_ms']:.0f} ms"
+    if len(stages) > 1:
+        previous = stages[-2]
+        user_growth = current["users"] / previous["users"] - 1
+        throughput_growth = current["throughput_rps"] / previous["throughput_rps"] - 1 if previous["throughput_rps"] else 0.0
+        if throughput_growth < args.min_scaling * user_growth:
+            return (
+                f"throughput {previous['throughput_rps']} -> {current['throughput_rps']} req/s "
+                f"for {previous['users']} -> {current['users']} users"
+            )
+    lag_p99 = current["event_loop_lag"]["p99_ms"]
+    if current["event_loop_lag"]["count"] and (lag_p99 is None or lag_p99 > args.max_loop_lag_ms):
+        return f"event loop lag p99 {'over the largest bucket' if lag_p99 is None else f'{lag_p99:g} ms'}"
+    return None
+
+
+def _ms(value: Optional[float]) -> str:
+    return "overflow" if value is None else f"{value:g}"
+
+
+def print_stage(stage: Dict[str, Any]) -> None:
+    lag = stage["event_loop_lag"]
+    print(
+        f"\n{stage['users']} users: {stage['throughput_rps']} req/s, {stage['flows_per_min']} flows/min, "
+        f"{stage['errors']} errors, event loop lag mean {lag['mean_ms']} ms p99 {_ms(lag['p99_ms'])} ms"
+    )
+    print(f"  {'endpoint':<11} {'req':>5} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queue mean':>11} {'queue p95':>10}")
+    for label, row in stage["endpoints"].items():
+        queue = f"{row['queue_mean_ms']:>11} {_ms(row['queue_p95_ms']):>10}" if "queue_mean_ms" in row else ""
+        print(f"  {label:<11} {row['requests']:>5} {row['errors']:>4} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9} {queue}".rstrip())
+    if stage["client_lag_max_ms"] > CLIENT_LAG_WARNING_MS:
+        print(f"  note: load generator lagged up to {stage['client_lag_max_ms']} ms; latencies include client overhead")
+
+
+async def scrape(client: httpx.AsyncClient) -> Dict[MetricKey, float]:
+    response = await client.get("/metrics")
+    response.raise_for_status()
+    return parse_metrics(response.text)
+
+
+async def ramp(args: argparse.Namespace, base_url: str) -> List[Dict[str, Any]]:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    videos = video_indexes(args.video_pool)
+    client_lag = ClientLag()
+    stages: List[Dict[str, Any]] = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        users: List[asyncio.Task] = [asyncio.create_task(client_lag.run())]
+        try:
+            for count in args.users:
+                while len(users) - 1 < count:
+                    user = VirtualUser(client, recorder, videos, args, random.Random(rng.random()))
+                    users.append(asyncio.create_task(user.run()))
+                before = await scrape(client)
+                recorder.next_stage()
+                client_lag.take()
+                started = time.perf_counter()
+                await asyncio.sleep(args.stage_seconds)
+                measurement, flows = recorder.next_stage()
+                measurement.elapsed = time.perf_counter() - started
+                stage = stage_report(count, measurement, flows, before, await scrape(client), client_lag.take())
+                stages.append(stage)
+                print_stage(stage)
+                if len(stages) == 1 and (stage["errors"] or not stage["requests"]):
+                    stage["aborted"] = recorder.first_error or "no request completed within the stage"
+                    break
+                reason = saturation(stages, args)
+                if reason:
+                    stage["saturated"] = reason
+                    if not args.full_ramp:
+                        break
+        finally:
+            for task in users:
+                task.cancel()
+            await asyncio.gather(*users, return_exceptions=True)
+    return stages
+
+
+def conclusion(stages: List[Dict[str, Any]]) -> str:
+    if "aborted" in stages[0]:
+        return (
+            f"Aborted: the {stages[0]['users']}-user stage already failed "
+            f"({stages[0]['errors']} of {stages[0]['requests']} requests); first error: {stages[0]['aborted']}"
+        )
+    saturated = next((index for index, stage in enumerate(stages) if "saturated" in stage), None)
+    if saturated is None:
+        return f"No saturation up to {stages[-1]['users']} users."
+    stage = stages[saturated]
+    line = f"Saturated at {stage['users']} users: {stage['saturated']}."
+    if saturated > 0:
+        sustained = stages[saturated - 1]
+        line += (
+            f" One worker sustains about {sustained['users']} users "
+            f"({sustained['throughput_rps']} req/s, {sustained['flows_per_min']} flows/min)."
+        )
+    return line
+
+
+# --- local server ---
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def local_server(args: argparse.Namespace) -> AsyncIterator[str]:
+    """Run benchmarks.serve in a subprocess (its own event loop and GIL) for the duration."""
+    port = free_port()
+    command = [
+        sys.executable, "-m", "benchmarks.serve", "--port", str(port),
+        "--latency", str(args.latency),
+        "--tokens-per-second", str(args.tokens_per_second),
+        "--response-tokens", str(args.response_tokens),
+        "--fetch-latency", str(args.fetch_latency),
+    ]
+    if args.fixtures:
+        command += ["--fixtures", str(args.fixtures.resolve())]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            deadline = time.monotonic() + 60
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"benchmarks.serve exited with {process.returncode}")
+                try:
+                    if (await client.get("/metrics")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("benchmarks.serve did not start within 60s")
+                await asyncio.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+async def main_async(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    if args.url:
+        return await ramp(args, args.url.rstrip("/"))
+    async with local_server(args) as base_url:
+        return await ramp(args, base_url)
+
+
+def main() -> int:
+    args = parse_args()
+    stages = asyncio.run(main_async(args))
+    print("\n" + conclusion(stages))
+    if "aborted" in stages[0]:
+        return 1
+    if args.json:
+        config = {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items() if key != "json"}
+        args.json.write_text(json.dumps({"config": config, "stages": stages}, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""
+Record benchmark fixtures from live YouTube (metadata + transcript with timings).
+
+    python -m benchmarks.record https://youtu.be/VIDEO_ID [...] [-o DIR]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from app.services.youtube import extract_video_id, get_transcript_with_track, get_video_metadata
+
+from benchmarks.fixtures import FIXTURE_DIR, Fixture, save_fixture
+
+
+def main() -> int:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Record benchmark fixtures from YouTube.")
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("-o", "--output", type=Path, default=FIXTURE_DIR, help=f"fixture directory (default {FIXTURE_DIR})")
+    args = parser.parse_args()
+
+    failed = 0
+    for url in args.urls:
+        video_id = extract_video_id(url)
+        transcript = get_transcript_with_track(video_id) if video_id else None
+        if not transcript:
+            print(f"Skipping (no video or transcript): {url}", file=sys.stderr)
+            failed += 1
+            continue
+        path = save_fixture(Fixture(video_id, get_video_metadata(video_id), transcript), args.output)
+        print(f"{path} ({len(transcript['text'])} chars)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
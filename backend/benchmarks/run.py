@@ -0,0 +1,268 @@
+"""
+Offline pipeline benchmarks (see the benchmarks package docstring).
+
+Scenarios, each `--requests` requests at `--concurrency`:
+    summary     POST /api/analyze/summary, one distinct video per request
+    artifacts   POST /api/analyze/{mindmap,quiz,flashcards} on stored sessions
+    chat        POST /api/chat on stored sessions
+    summarizer  python-summarizer's process_video (map-reduce on a thread pool)
+
+The API runs in-process behind httpx's ASGI transport, so routing,
+validation, middleware and serialization are all measured.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks.fixtures import load_fixtures
+from benchmarks.harness import run_async, run_threads
+from benchmarks.stubs import VideoCatalog, configure_environment, install
+
+SCENARIOS = ("summary", "artifacts", "chat", "summarizer")
+ARTIFACTS = ("mindmap", "quiz", "flashcards")
+CHAT_QUERIES = (
+    "이 영상의 핵심 내용을 세 줄로 정리해 주세요.",
+    "두 번째로 설명한 개념은 무엇인가요?",
+    "What example does the lecture use for the loss function?",
+    "강의에서 강조한 주의사항이 있나요?",
+)
+
+SUMMARIZER_APP = Path(__file__).resolve().parents[2] / "python-summarizer" / "app.py"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline against fixtures and a fake LLM.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=30, help="requests per scenario (default 30)")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight (default 8)")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake model seconds to first token (default 0.2)")
+    parser.add_argument("--tokens-per-second", type=float, default=500, help="fake model output rate (default 500)")
+    parser.add_argument("--response-tokens", type=int, default=300, help="fake model free-text answer length (default 300)")
+    parser.add_argument("--fetch-latency", type=float, default=0.05, help="seconds per fixture metadata/transcript fetch (default 0.05)")
+    parser.add_argument("--fixtures", type=Path, help="directory of recorded fixtures (default benchmarks/fixtures, else synthetic)")
+    parser.add_argument("--cache", action="store_true", help="allow response cache hits (default: every request bypasses it)")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="skip heap tracing (lower overhead; RSS only)")
+    parser.add_argument("--json", type=Path, help="write results here (usable as a --baseline)")
+    parser.add_argument("--baseline", type=Path, help="earlier --json results; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 / throughput change vs baseline (default 0.2)")
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def note_failure(failures: Dict[str, str], label: str, detail: str) -> None:
+    """Keep the first failure per endpoint for the report."""
+    failures.setdefault(label, detail[:500])
+
+
+def check_response(failures: Dict[str, str], label: str, response: Any) -> bool:
+    if response.status_code == 200:
+        return True
+    note_failure(failures, label, f"HTTP {response.status_code}: {response.text}")
+    return False
+
+
+def model_options(args: argparse.Namespace) -> Dict[str, Any]:
+    return {"latency": args.latency, "tokens_per_second": args.tokens_per_second, "response_tokens": args.response_tokens}
+
+
+async def run_backend(args: argparse.Namespace, catalog: VideoCatalog, failures: Dict[str, str]) -> Dict[str, Any]:
+    import httpx
+
+    from app.api.endpoints import analysis
+    from app.services.executor import shutdown_executor
+    from app.services.llm import close_llm_registry
+    from main import app
+
+    install(catalog, **model_options(args))
+    headers = {} if args.cache else {"X-Cache-Bypass": "1"}
+    trace = not args.no_tracemalloc
+    results: Dict[str, Any] = {}
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        if "summary" in args.scenarios:
+            async def summary(index: int):
+                response = await client.post("/api/analyze/summary", json={"url": catalog.url(index)}, headers=headers)
+                return "summary", check_response(failures, "summary", response)
+
+            results["summary"] = await run_async(summary, args.requests, args.concurrency, trace)
+
+        sessions: List[str] = []
+        if "artifacts" in args.scenarios or "chat" in args.scenarios:
+            # Stored sessions as /summary leaves them (untimed); video ids after the summary scenario's
+            for index in range(args.requests, args.requests + max(1, args.requests // len(ARTIFACTS))):
+                fixture = catalog.fixture(catalog.video_id(index))
+                sessions.append(analysis.open_session(fixture.metadata["id"], fixture.metadata, fixture.transcript).id)
+
+        if "artifacts" in args.scenarios:
+            async def artifact(index: int):
+                # Each session gets all three artifacts, as the frontend requests them
+                name = ARTIFACTS[index % len(ARTIFACTS)]
+                session = sessions[index // len(ARTIFACTS) % len(sessions)]
+                response = await client.post(f"/api/analyze/{name}", json={"analysis_id": session}, headers=headers)
+                return name, check_response(failures, name, response)
+
+            results["artifacts"] = await run_async(artifact, args.requests, args.concurrency, trace)
+
+        if "chat" in args.scenarios:
+            async def chat(index: int):
+                body = {"query": CHAT_QUERIES[index % len(CHAT_QUERIES)], "analysis_id": sessions[index % len(sessions)]}
+                response = await client.post("/api/chat", json=body)
+                return "chat", check_response(failures, "chat", response)
+
+            results["chat"] = await run_async(chat, args.requests, args.concurrency, trace)
+
+    await close_llm_registry()
+    shutdown_executor()
+    return {name: measurement.summary() for name, measurement in results.items()}
+
+
+def load_summarizer() -> Any:
+    spec = importlib.util.spec_from_file_location("summarizer_app", SUMMARIZER_APP)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_summarizer(args: argparse.Namespace, catalog: VideoCatalog, failures: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """process_video with the Streamlit UI calls running bare (no-ops) and the same fakes as the API."""
+    try:
+        summarizer = load_summarizer()
+    except ImportError as e:
+        print(f"Skipping summarizer: {e}", file=sys.stderr)
+        return None
+    # Streamlit warns about the missing script context on every UI call
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    tiers = {
+        tier: [
+            (model, FakeChatModel(model_name=model, max_tokens=summarizer.LLM_MAX_TOKENS, **model_options(args)))
+            for model in dict.fromkeys(models) if model
+        ]
+        for tier, models in summarizer.MODEL_TIERS.items()
+    }
+
+    def metadata(video_id: str) -> Dict[str, Any]:
+        fixture = catalog.fixture(video_id)
+        segments = fixture.transcript["segments"]
+        time.sleep(catalog.fetch_latency)
+        return {
+            "title": fixture.metadata["title"],
+            "thumbnail": fixture.metadata["thumbnail"],
+            "duration": int(segments["starts"][-1] + segments["durations"][-1]) if segments["starts"] else 0,
+            "channel": fixture.metadata["channelTitle"],
+            "view_count": fixture.metadata["views"],
+        }
+
+    def transcript(video_id: str):
+        result = catalog.transcript(video_id)
+        return result["text"], "subtitle", result["track"], result["segments"]
+
+    summarizer.get_tier_llms = lambda api_key, tier: tiers[tier]
+    summarizer.get_video_metadata = metadata
+    summarizer.get_transcript = transcript
+
+    def process(index: int):
+        try:
+            results = summarizer.process_video(catalog.video_id(index), "benchmark")
+        except Exception as e:
+            note_failure(failures, "process_video", repr(e))
+            return "process_video", False
+        if results["summary"] is None or results["error"]:
+            note_failure(failures, "process_video", str(results["error"] or "no summary"))
+            return "process_video", False
+        return "process_video", True
+
+    return run_threads(process, args.requests, args.concurrency, not args.no_tracemalloc).summary()
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    print(f"{'scenario':<11} {'endpoint':<14} {'req':>5} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'req/s':>7} {'heap MB':>8} {'rss MB':>7}")
+    for scenario, result in results.items():
+        for label, row in result["endpoints"].items():
+            print(
+                f"{scenario:<11} {label:<14} {row['requests']:>5} {row['errors']:>4} {row['p50_ms']:>9} {row['p95_ms']:>9} "
+                f"{row['p99_ms']:>9} {row['max_ms']:>9} {row['throughput_rps']:>7} {result['peak_traced_mb']:>8} {result['max_rss_mb']:>7}"
+            )
+
+
+def regressions(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Rows slower at p95, lower in throughput (beyond `tolerance`) or with more errors than the baseline."""
+    found = []
+    for scenario, result in results.items():
+        base = baseline.get("scenarios", {}).get(scenario, {}).get("endpoints", {})
+        for label, row in result["endpoints"].items():
+            before = base.get(label)
+            if not before:
+                continue
+            name = f"{scenario}/{label}"
+            if before["p95_ms"] and row["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                found.append(f"{name}: p95 {before['p95_ms']} -> {row['p95_ms']} ms")
+            if row["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+                found.append(f"{name}: throughput {before['throughput_rps']} -> {row['throughput_rps']} req/s")
+            if row["errors"] > before["errors"]:
+                found.append(f"{name}: errors {before['errors']} -> {row['errors']}")
+    return found
+
+
+def main() -> int:
+    args = parse_args()
+    configure_environment()
+    catalog = VideoCatalog(load_fixtures(args.fixtures), fetch_latency=args.fetch_latency)
+    config = {key: value for key, value in vars(args).items() if key not in ("json", "baseline", "fixtures")}
+    config["fixtures"] = [fixture.name for fixture in catalog.fixtures]
+
+    results: Dict[str, Any] = {}
+    failures: Dict[str, str] = {}
+    if set(args.scenarios) & {"summary", "artifacts", "chat"}:
+        results.update(asyncio.run(run_backend(args, catalog, failures)))
+    if "summarizer" in args.scenarios:
+        summary = run_summarizer(args, catalog, failures)
+        if summary is not None:
+            results["summarizer"] = summary
+
+    print_results(results)
+    # Latencies of failed requests measure the failure, not the pipeline: a
+    # run with errors is never a valid result (or baseline)
+    failed = [
+        (f"{scenario}/{label}", row)
+        for scenario, result in results.items()
+        for label, row in result["endpoints"].items()
+        if label != "all" and row["errors"]
+    ]
+    if failed:
+        for name, row in failed:
+            label = name.split("/", 1)[1]
+            print(f"FAILED {name}: {row['errors']}/{row['requests']} requests; first: {failures.get(label, '?')}", file=sys.stderr)
+        if args.json:
+            print(f"Not writing {args.json}: the run had errors", file=sys.stderr)
+        return 1
+
+    if args.json:
+        args.json.write_text(json.dumps({"config": config, "scenarios": results}, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("config") != config:
+            print("Note: baseline was recorded with different settings", file=sys.stderr)
+        found = regressions(results, baseline, args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if found:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
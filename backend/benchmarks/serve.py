@@ -0,0 +1,48 @@
+"""
+Serve the API from one uvicorn worker with the offline backends
+(fixtures for YouTube, the fake chat model for Groq), as the load
+generator's target.
+
+    python -m benchmarks.serve --port 8765 --latency 0.3
+"""
+
+import argparse
+from pathlib import Path
+
+from benchmarks.fixtures import load_fixtures
+from benchmarks.stubs import VideoCatalog, configure_environment, install
+
+
+def add_backend_args(parser: argparse.ArgumentParser) -> None:
+    """Options of the fake backends (shared with benchmarks.load, which passes them through)."""
+    parser.add_argument("--latency", type=float, default=0.3, help="fake model seconds to first token (default 0.3)")
+    parser.add_argument("--tokens-per-second", type=float, default=300, help="fake model output rate (default 300)")
+    parser.add_argument("--response-tokens", type=int, default=300, help="fake model free-text answer length (default 300)")
+    parser.add_argument("--fetch-latency", type=float, default=0.3, help="seconds per fixture metadata/transcript fetch (default 0.3)")
+    parser.add_argument("--fixtures", type=Path, help="directory of recorded fixtures (default benchmarks/fixtures, else synthetic)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the API with stubbed YouTube and LLM backends.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_backend_args(parser)
+    args = parser.parse_args()
+
+    configure_environment()
+    import uvicorn
+
+    from main import app
+
+    catalog = VideoCatalog(load_fixtures(args.fixtures), fetch_latency=args.fetch_latency)
+    install(
+        catalog,
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, workers=1, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,27 +2,68 @@
 VideoInsight AI - FastAPI Backend (Refactored)
 """
 
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
+from fastapi.exception_handlers import http_exception_handler
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from typing import List, Optional
 import os
+import time
 from dotenv import load_dotenv
 
-# LangChain imports for Chat
-from langchain_groq import ChatGroq
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-
 # Import new Analysis Router
 from app.api.endpoints import analysis
+from app.services.chat_memory import Conversation, get_conversation_store, history_budget
+from app.services.executor import get_executor, run_blocking, shutdown_executor
+from app.services.jobs import close_job_queue
+from app.services.llm import close_llm_registry, get_llm_registry
+from app.services.logger import get_logger
+from app.services.longdoc import fit_transcript, long_transcript_strategy
+from app.services.metrics import (
+    ERRORS,
+    HTTP_SECONDS,
+    REQUEST_QUEUE_SECONDS,
+    count_error,
+    event_loop_probe_interval,
+    monitor_event_loop,
+    render_metrics,
+    track_queue_waits,
+)
+from app.services.retrieval import retrieve_context
+from app.services.scheduler import INTERACTIVE, is_rate_limit
+from app.services.sessions import AnalysisSession
+from app.services.streaming import SSE_HEADERS, sse_event
 
 load_dotenv()
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
-app = FastAPI(title="VideoInsight AI API", version="2.0.0")
+log = get_logger("app.main")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Thread pool for yt-dlp / transcript calls (size: BLOCKING_IO_WORKERS)
+    get_executor()
+    # Shared LLM clients / connection pools and prebuilt chains
+    registry = get_llm_registry()
+    if registry is not None:
+        registry.prebuild()
+    # Event loop lag probe (see EVENT_LOOP_PROBE_INTERVAL)
+    interval = event_loop_probe_interval()
+    loop_monitor = asyncio.create_task(monitor_event_loop(interval)) if interval > 0 else None
+    yield
+    if loop_monitor is not None:
+        loop_monitor.cancel()
+    # Background analysis jobs still running are abandoned with the process
+    await close_job_queue()
+    await close_llm_registry()
+    shutdown_executor()
+
+app = FastAPI(title="VideoInsight AI API", version="2.0.0", lifespan=lifespan)
 
 # CORS configuration
 origins = ["*"]
@@ -49,6 +90,56 @@ async def options_handler(request: Request, full_path: str):
         }
     )
 
+def route_template(scope: dict) -> str:
+    """
+    The matched route's path template with its router prefix, e.g.
+    "/api/analyze/jobs/{job_id}" ("unmatched" when no route matched).
+    Routes of included routers may carry only their own path, so the
+    prefix is taken from the concrete path.
+    """
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    template = getattr(route, "path_format", route.path)
+    try:
+        concrete = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    path = scope["path"]
+    return path[:-len(concrete)] + template if concrete and path.endswith(concrete) else template
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    queue_waits = track_queue_waits()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route template, not the raw path, to keep label cardinality bounded
+        route_path = route_template(request.scope)
+        HTTP_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=route_path,
+            status=status,
+        )
+        REQUEST_QUEUE_SECONDS.observe(sum(queue_waits), route=route_path)
+
+@app.exception_handler(StarletteHTTPException)
+async def count_http_errors(request: Request, exc: StarletteHTTPException):
+    """Count error responses by ERR_* code, then respond as FastAPI would."""
+    count_error(exc.status_code, exc.detail)
+    return await http_exception_handler(request, exc)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of the pipeline metrics."""
+    # Collectors read the SQLite cache tiers' sizes: keep that off the event loop
+    return PlainTextResponse(await run_blocking(render_metrics), media_type="text/plain; version=0.0.4")
+
 # Include the Analysis Router
 # Endpoints will be /api/analyze/summary, /api/analyze/quiz, etc.
 app.include_router(analysis.router, prefix="/api/analyze", tags=["analysis"])
@@ -56,28 +147,67 @@ app.include_router(analysis.router, prefix="/api/analyze", tags=["analysis"])
 
 # --- Chat Functionality (Kept in main.py for now) ---
 
+class ChatTurn(BaseModel):
+    role: str
+    content: str
+
 class ChatRequest(BaseModel):
     query: str
-    context: str
+    # Either analysis_id (from /api/analyze/summary) or the transcript as context
+    analysis_id: Optional[str] = None
+    context: Optional[str] = None
     language: str = "ko"
-    # history: List[dict] = [] # Optional
+    # Server-side memory; omitted on the first turn, returned in the response
+    # (an unknown or expired ID starts a new conversation with a new ID)
+    conversation_id: Optional[str] = None
+    # Client-managed history, used only when no conversation_id is sent
+    history: List[ChatTurn] = []
 
 class ChatResponse(BaseModel):
     response: str
+    conversation_id: Optional[str] = None
 
-@app.post("/api/chat", response_model=ChatResponse)
-async def chat_with_video(request: ChatRequest):
-    """Chat with video context using Groq LLM."""
-    
-    if not GROQ_API_KEY:
-         return ChatResponse(response="Server Error: GROQ_API_KEY not configured.")
+MISSING_KEY_MESSAGE = "Server Error: GROQ_API_KEY not configured."
 
-    llm = ChatGroq(
-        groq_api_key=GROQ_API_KEY,
-        model_name="llama-3.3-70b-versatile",
-        temperature=0.5,
-        max_tokens=1024
-    )
+def chat_error_message(e: Exception) -> str:
+    """User-facing answer for a failed chat turn (chat errors are replies, not HTTP errors)."""
+    if is_rate_limit(e):
+        ERRORS.inc(code="ERR_LLM_RATE_LIMIT")
+        log.warning("chat.rate_limited", error=str(e))
+        return "AI 모델 사용량이 초과되었습니다. 잠시 후 다시 시도해주세요."
+    ERRORS.inc(code="ERR_CHAT")
+    log.error("chat.failed", error=str(e), exc_info=e)
+    return "죄송합니다. 오류가 발생했습니다."
+
+def open_conversation(request: ChatRequest) -> Conversation:
+    if request.history and not request.conversation_id:
+        # Stateless client: keep only the most recent turns that fit the budget
+        conversation = Conversation(id="")
+        for turn in request.history:
+            conversation.add(turn.role, turn.content)
+        conversation.trim(history_budget())
+        return conversation
+    return get_conversation_store().open(request.conversation_id, request.analysis_id or "")
+
+def record_turn(conversation: Conversation, query: str, answer: str) -> None:
+    """Append the exchange and summarize older turns in the background if over budget."""
+    if not conversation.id:
+        return
+    conversation.add("user", query)
+    conversation.add("assistant", answer)
+    get_conversation_store().touch(conversation)
+    conversation.schedule_compaction(get_llm_registry().chain("chat_memory"), history_budget())
+
+async def build_chat(request: ChatRequest, session: AnalysisSession):
+    """
+    Return the chat chain, its inputs and the conversation for `request`.
+    Fitting or retrieving the transcript may call the LLM, so callers run
+    this inside their chat error handling.
+    """
+    conversation = open_conversation(request)
+    await conversation.ready()
+
+    registry = get_llm_registry()
     
     # Language instruction based on request
     language_instruction = ""
@@ -86,28 +216,65 @@ async def chat_with_video(request: ChatRequest):
     else:
         language_instruction = "Answer in English. "
     
-    chat_prompt = PromptTemplate(
-        input_variables=["context", "query", "lang_instruction"],
-        template="""Based on this video transcript:
-{context}
-
-{lang_instruction}Answer this question concisely: {query}
+    chain = registry.chain("chat")
+    if long_transcript_strategy("chat") == "retrieval":
+        # Only the transcript chunks relevant to this question
+        context = await retrieve_context(session, request.query)
+    else:
+        context = await fit_transcript("chat", session, registry, INTERACTIVE)
+    inputs = {
+        "context": context,
+        "history": conversation.render() or "(none)",
+        "query": request.query,
+        "lang_instruction": language_instruction
+    }
+    return chain, inputs, conversation
 
-Answer:"""
-    )
-    
-    chain = chat_prompt | llm | StrOutputParser()
+@app.post("/api/chat", response_model=ChatResponse)
+async def chat_with_video(request: ChatRequest):
+    """Chat with video context using Groq LLM."""
     
+    if not GROQ_API_KEY:
+         return ChatResponse(response=MISSING_KEY_MESSAGE)
+
+    # An unknown analysis_id is a 404, not a chat reply
+    session = analysis.resolve_session(request.analysis_id, request.context)
+
     try:
-        response = chain.invoke({
-            "context": request.context[:15000], # Limit context
-            "query": request.query,
-            "lang_instruction": language_instruction
-        })
-        return ChatResponse(response=response)
+        chain, inputs, conversation = await build_chat(request, session)
+        response = await chain.ainvoke(inputs)
+        record_turn(conversation, request.query, response)
+        return ChatResponse(response=response, conversation_id=conversation.id or None)
     except Exception as e:
-        print(f"Chat error: {e}")
-        return ChatResponse(response="죄송합니다. 오류가 발생했습니다.")
+        return ChatResponse(response=chat_error_message(e))
+
+
+@app.post("/api/chat/stream")
+async def stream_chat_with_video(request: ChatRequest):
+    """Server-Sent Events variant of /api/chat: token* -> done, or error."""
+    
+    if not GROQ_API_KEY:
+        async def missing_key():
+            yield sse_event("error", {"message": MISSING_KEY_MESSAGE})
+
+        return StreamingResponse(missing_key(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    # Resolved before the stream starts, so an unknown analysis_id is still a 404
+    session = analysis.resolve_session(request.analysis_id, request.context)
+
+    async def events():
+        try:
+            chain, inputs, conversation = await build_chat(request, session)
+            tokens = []
+            async for token in chain.astream(inputs):
+                tokens.append(token)
+                yield sse_event("token", {"text": token})
+            record_turn(conversation, request.query, "".join(tokens))
+            yield sse_event("done", {"conversation_id": conversation.id or None})
+        except Exception as e:
+            yield sse_event("error", {"message": chat_error_message(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
 
 
 @app.get("/")
@@ -0,0 +1,53 @@
+"""
+Shared fixtures: the app runs against the benchmarks' offline backends
+(fixture transcripts for YouTube, the deterministic fake model for Groq)
+with memory-only caches, so tests need no network or API key.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.stubs import configure_environment  # noqa: E402
+
+configure_environment()
+
+# Fast fake model: tests exercise the pipeline, not model latency
+FAST_MODEL = {"latency": 0.0, "tokens_per_second": 1e6, "response_tokens": 300}
+
+
+@pytest.fixture
+def registry():
+    """The fake-model LLMRegistry, installed as the app's shared registry."""
+    from app.services import llm
+    from benchmarks.stubs import fake_registry
+
+    llm._registry = fake_registry(**FAST_MODEL)
+    yield llm._registry
+    asyncio.run(llm.close_llm_registry())
+
+
+def make_session(name: str = "long"):
+    """An unstored AnalysisSession over the synthetic `name` fixture ("short", "medium", "long")."""
+    from app.services.sessions import AnalysisSession
+    from app.services.youtube import timed_transcript
+    from benchmarks.fixtures import SYNTHETIC_VIDEOS, synthetic_fixture
+
+    fixture = synthetic_fixture(name, SYNTHETIC_VIDEOS[name])
+    return AnalysisSession(
+        id=f"test-{name}",
+        video_id=name,
+        title=fixture.metadata["title"],
+        transcript=fixture.transcript["text"],
+        track=fixture.transcript["track"],
+        segments=timed_transcript(fixture.transcript),
+    )
+
+
+@pytest.fixture(name="make_session")
+def make_session_fixture():
+    return make_session
@@ -0,0 +1,18 @@
+import asyncio
+
+from app.api.endpoints.analysis import generate_artifact
+
+
+def test_bypass_never_joins_a_cached_flight(registry, make_session):
+    session = make_session("short")
+    asyncio.run(generate_artifact("mindmap", session))
+
+    async def together():
+        return await asyncio.gather(
+            generate_artifact("mindmap", session),
+            generate_artifact("mindmap", session, bypass=True),
+        )
+
+    (_, cached), (_, bypassed) = asyncio.run(together())
+    assert cached is True
+    assert bypassed is False
@@ -0,0 +1,168 @@
+"""
+Smoke test through the ASGI app: real routing, validation and lifespan,
+with the benchmarks' offline backends (fixture videos, fake model).
+"""
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+import pytest
+
+from benchmarks.fixtures import load_fixtures
+from benchmarks.stubs import VideoCatalog, install
+from conftest import FAST_MODEL
+
+CATALOG = VideoCatalog(load_fixtures(None))
+
+
+def serve(scenario: Callable[[httpx.AsyncClient], Awaitable[Any]]) -> Any:
+    """Run `scenario(client)` against main.app inside its lifespan."""
+    from main import app
+
+    async def run():
+        async with app.router.lifespan_context(app):
+            install(CATALOG, **FAST_MODEL)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+                return await scenario(client)
+
+    return asyncio.run(run())
+
+
+def parse_sse(text: str) -> List[Tuple[str, Dict[str, Any]]]:
+    events = []
+    for frame in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_summary_artifacts_and_chat():
+    async def scenario(client):
+        summary = await client.post("/api/analyze/summary", json={"url": CATALOG.url(1)})
+        assert summary.status_code == 200, summary.text
+        body = summary.json()
+        assert body["summary"] and body["analysis_id"]
+        assert summary.headers["X-Cache"] == "MISS"
+
+        again = await client.post("/api/analyze/summary", json={"url": CATALOG.url(1)})
+        assert again.headers["X-Cache"] == "HIT"
+
+        artifacts = await asyncio.gather(*(
+            client.post(f"/api/analyze/{name}", json={"analysis_id": body["analysis_id"]})
+            for name in ("mindmap", "quiz", "flashcards")
+        ))
+        assert [response.status_code for response in artifacts] == [200, 200, 200]
+        assert artifacts[0].json()["markdown_code"].startswith("mindmap")
+        assert artifacts[1].json()["quizzes"]
+        assert artifacts[2].json()["flashcards"]
+
+        first = await client.post("/api/chat", json={"query": "핵심이 뭐야?", "analysis_id": body["analysis_id"]})
+        conversation_id = first.json()["conversation_id"]
+        second = await client.post("/api/chat", json={
+            "query": "예를 들어줘", "analysis_id": body["analysis_id"], "conversation_id": conversation_id,
+        })
+        assert second.json()["conversation_id"] == conversation_id
+        assert second.json()["response"]
+
+    serve(scenario)
+
+
+def test_unknown_analysis_is_404():
+    async def scenario(client):
+        return await client.post("/api/analyze/quiz", json={"analysis_id": "missing"})
+
+    response = serve(scenario)
+    assert response.status_code == 404
+    assert response.json()["detail"]["code"] == "ERR_ANALYSIS_NOT_FOUND"
+
+
+def test_study_pack_streams_every_artifact():
+    async def scenario(client):
+        return await client.post("/api/analyze/all", json={"url": CATALOG.url(2)})
+
+    response = serve(scenario)
+    assert response.status_code == 200
+    names = [name for name, _ in parse_sse(response.text)]
+    assert names[:2] == ["metadata", "transcript"]
+    assert sorted(names[2:-1]) == ["flashcards", "mindmap", "quiz", "summary"]
+    assert names[-1] == "done"
+
+
+def test_summary_job_and_batch():
+    async def scenario(client):
+        job = await client.post("/api/analyze/jobs", json={"url": CATALOG.url(3)})
+        assert job.status_code == 202
+        events = await client.get(job.json()["events_url"])
+        assert parse_sse(events.text)[-1][0] == "done"
+        status = await client.get(job.json()["status_url"])
+        assert status.json()["status"] == "succeeded"
+
+        batch = await client.post("/api/analyze/batch", json={"urls": [CATALOG.url(4), CATALOG.url(5), CATALOG.url(4), "nonsense"]})
+        assert batch.status_code == 202
+        events = parse_sse((await client.get(batch.json()["events_url"])).text)
+        return events[-1]
+
+    event, data = serve(scenario)
+    assert event == "done"
+    result = data["result"]
+    assert [record["status"] for record in result["results"]] == ["ok", "ok"]
+    assert result["invalid"] == ["nonsense"]
+
+
+def test_metrics_label_requests_by_route_template():
+    async def scenario(client):
+        await client.post("/api/analyze/summary", json={"url": CATALOG.url(6)})
+        job = await client.post("/api/analyze/jobs", json={"url": CATALOG.url(6)})
+        await client.get(job.json()["status_url"])
+        return await client.get("/metrics")
+
+    response = serve(scenario)
+    assert response.status_code == 200
+    assert 'route="/api/analyze/summary",status="200"' in response.text
+    # One series per route, not per job ID
+    assert 'route="/api/analyze/jobs/{job_id}"' in response.text
+
+
+@pytest.fixture
+def failing_context(monkeypatch):
+    """Make building the chat context fail the way a rate-limited fit does."""
+    import main
+
+    async def fail(*args, **kwargs):
+        raise RuntimeError("429 Too Many Requests: rate limit exceeded")
+
+    monkeypatch.setattr(main, "fit_transcript", fail)
+    monkeypatch.setattr(main, "retrieve_context", fail)
+
+
+def test_chat_context_failures_are_chat_replies(failing_context):
+    async def scenario(client):
+        query = {"query": "핵심이 뭐야?", "context": "강의 자막"}
+        return (
+            await client.post("/api/chat", json=query),
+            await client.post("/api/chat/stream", json=query),
+            await client.post("/api/chat/stream", json={**query, "analysis_id": "missing"}),
+        )
+
+    chat, stream, unknown = serve(scenario)
+    assert chat.status_code == 200
+    assert "사용량이 초과" in chat.json()["response"]
+    assert stream.headers["content-type"].startswith("text/event-stream")
+    [(event, data)] = parse_sse(stream.text)
+    assert event == "error" and "사용량이 초과" in data["message"]
+    assert unknown.status_code == 404
+
+
+def test_chat_stream_without_api_key_is_an_sse_error(monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "GROQ_API_KEY", None)
+
+    async def scenario(client):
+        return await client.post("/api/chat/stream", json={"query": "핵심이 뭐야?", "context": "강의 자막"})
+
+    response = serve(scenario)
+    assert parse_sse(response.text) == [("error", {"message": main.MISSING_KEY_MESSAGE})]
@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+from app.services import batch
+from app.services.batch import BatchRunner, JsonlWriter, load_checkpoint, resolve_video_ids
+
+
+def error_payload(e: Exception) -> dict:
+    return {"code": "ERR_TEST", "message": str(e)}
+
+
+def test_resolve_expands_playlists_and_deduplicates(monkeypatch):
+    monkeypatch.setattr(batch, "get_playlist_video_ids", lambda url: ["aaaaaaaaaaa", "bbbbbbbbbbb"])
+    video_ids, invalid = resolve_video_ids([
+        "# weekly lectures",
+        "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+        "https://www.youtube.com/playlist?list=PL123",
+        "",
+        "not a url",
+        "https://youtu.be/ccccccccccc",
+    ])
+    assert video_ids == ["bbbbbbbbbbb", "aaaaaaaaaaa", "ccccccccccc"]
+    assert invalid == ["not a url"]
+
+
+def test_runner_bounds_each_stage_and_reports_failures():
+    fetching = analyzing = 0
+    peaks = {"fetch": 0, "analyze": 0}
+
+    async def fetch(video_id):
+        nonlocal fetching
+        fetching += 1
+        peaks["fetch"] = max(peaks["fetch"], fetching)
+        await asyncio.sleep(0.005)
+        fetching -= 1
+        if video_id == "broken":
+            raise RuntimeError("no transcript")
+        return video_id.upper()
+
+    async def analyze(video_id, fetched):
+        nonlocal analyzing
+        analyzing += 1
+        peaks["analyze"] = max(peaks["analyze"], analyzing)
+        await asyncio.sleep(0.01)
+        analyzing -= 1
+        return {"summary": fetched}
+
+    records = []
+    runner = BatchRunner(fetch, analyze, error_payload, fetch_concurrency=3, llm_concurrency=2)
+    video_ids = [f"video{i}" for i in range(12)] + ["broken", "done"]
+    counts = asyncio.run(runner.run(video_ids, records.append, skip={"done"}))
+
+    assert {key: counts[key] for key in ("total", "skipped", "ok", "error")} == {"total": 14, "skipped": 1, "ok": 12, "error": 1}
+    assert peaks == {"fetch": 3, "analyze": 2}
+    failed = [record for record in records if record["status"] == "error"]
+    assert failed == [{**failed[0], "video_id": "broken", "index": 12, "error": {"code": "ERR_TEST", "message": "no transcript"}}]
+    assert {record["summary"] for record in records if record["status"] == "ok"} == {f"VIDEO{i}" for i in range(12)}
+
+
+def test_checkpoint_skips_only_successes(tmp_path):
+    path = str(tmp_path / "out" / "results.jsonl")
+    writer = JsonlWriter(path)
+    writer.write({"video_id": "a", "status": "ok"})
+    writer.write({"video_id": "b", "status": "error"})
+    writer.close()
+    # A line cut short by an interruption is ignored
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"video_id": "c", "status": "ok"})[:10])
+    assert load_checkpoint(path) == {"a"}
+    assert load_checkpoint(str(tmp_path / "missing.jsonl")) == set()
@@ -0,0 +1,63 @@
+import time
+
+from app.services import youtube
+from app.services.cache import SQLiteStore, TieredCache, TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(max_entries=4, ttl=60)
+    cache.set("short", 1, ttl=0.01)
+    cache.set("long", 2)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_sqlite_store_survives_reopening(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SQLiteStore(path).set("key", {"text": "자막", "n": 1})
+    assert SQLiteStore(path).get("key") == {"text": "자막", "n": 1}
+
+
+def test_sqlite_store_prunes_oldest(tmp_path):
+    store = SQLiteStore(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    for key in ("a", "b", "c"):
+        store.set(key, key)
+        time.sleep(0.01)
+    assert len(store) == 2
+    assert store.get("a") is None
+
+
+def test_tiered_cache_promotes_disk_hits(tmp_path):
+    disk = SQLiteStore(str(tmp_path / "cache.sqlite3"))
+    disk.set("key", "value")
+    cache = TieredCache(TTLCache(max_entries=4, ttl=60), disk)
+    assert cache.get("key") == "value"
+    assert cache.memory.get("key") == "value"
+    assert cache.get("missing") is None
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+def test_transcript_is_fetched_once(monkeypatch):
+    fetched = []
+
+    def fetch(video_id, languages):
+        fetched.append(video_id)
+        return {"text": "hello", "segments": None, "track": {"language_code": "en"}}
+
+    monkeypatch.setattr(youtube, "_fetch_transcript", fetch)
+    first = youtube.get_transcript_with_track("cachetest01", ["en"])
+    assert youtube.get_transcript_with_track("cachetest01", ["en"]) == first
+    assert fetched == ["cachetest01"]
@@ -0,0 +1,62 @@
+import asyncio
+
+from langchain_core.runnables import RunnableLambda
+
+from app.services.chat_memory import Conversation, ConversationStore, recent_lines
+from app.services.tokens import estimate_tokens
+
+
+def make_store() -> ConversationStore:
+    return ConversationStore(max_entries=16, ttl=60)
+
+
+def test_new_conversation_gets_a_server_id():
+    conversation = make_store().open(None, "analysis-a")
+    assert len(conversation.id) == 32
+    assert conversation.analysis_id == "analysis-a"
+
+
+def test_known_conversation_is_resumed():
+    store = make_store()
+    conversation = store.open(None, "analysis-a")
+    assert store.open(conversation.id, "analysis-a") is conversation
+
+
+def test_unknown_id_is_not_adopted():
+    conversation = make_store().open("chosen-by-client", "analysis-a")
+    assert conversation.id != "chosen-by-client"
+
+
+def test_conversation_is_bound_to_its_analysis():
+    store = make_store()
+    conversation = store.open(None, "analysis-a")
+    conversation.add("user", "private question")
+    other = store.open(conversation.id, "analysis-b")
+    assert other is not conversation
+    assert other.render() == ""
+    # The original is untouched
+    assert store.open(conversation.id, "analysis-a") is conversation
+
+
+def test_recent_lines_keeps_the_end():
+    text = "\n".join(f"line {i} " + "x" * 40 for i in range(100))
+    kept = recent_lines(text, 50)
+    assert estimate_tokens(kept) <= 50
+    assert kept.endswith("line 99 " + "x" * 40)
+
+
+def test_failed_compaction_keeps_summary_within_budget():
+    def fail(_):
+        raise RuntimeError("model down")
+
+    conversation = Conversation(id="c")
+    lines = []
+    for i in range(40):
+        for role, label, text in (("user", "User", f"question {i} " + "q" * 200), ("model", "Assistant", f"answer {i} " + "a" * 200)):
+            conversation.add(role, text)
+            lines.append(f"{label}: {text}")
+        asyncio.run(conversation.compact(RunnableLambda(fail), 200))
+    assert estimate_tokens(conversation.summary) <= 200
+    # The summary ends with the newest folded turn, just before the verbatim window
+    folded = len(lines) - len(conversation.turns)
+    assert conversation.summary.splitlines()[-1] == lines[folded - 1]
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from app.services.jobs import FAILED, SUCCEEDED, JobQueue, QueueFull
+
+
+def make_queue(**options) -> JobQueue:
+    settings = {"workers": 2, "max_queued": 8, "result_ttl": 60, "result_entries": 16, **options}
+    return JobQueue(**settings)
+
+
+def error_payload(e: Exception) -> dict:
+    return {"code": "ERR_TEST", "message": str(e)}
+
+
+def run_with(queue: JobQueue, main):
+    async def wrapper():
+        try:
+            return await main()
+        finally:
+            await queue.aclose()
+
+    return asyncio.run(wrapper())
+
+
+def test_job_reports_stages_and_result():
+    queue = make_queue()
+
+    async def work(job):
+        job.stage_started("transcript")
+        job.stage_finished("transcript", 12.34)
+        return {"summary": "done"}
+
+    async def main():
+        job = queue.submit("summary", "video-1", work, error_payload)
+        events = [event async for event in job.follow()]
+        return job, events
+
+    job, events = run_with(queue, main)
+    assert job.status == SUCCEEDED
+    assert job.result == {"summary": "done"}
+    assert job.stages == {"transcript": 12.3}
+    assert [name for name, _ in events] == ["status", "status", "stage", "stage", "done"]
+    assert queue.get(job.id) is job
+
+
+def test_failed_job_keeps_the_error_payload():
+    queue = make_queue()
+
+    async def work(job):
+        raise RuntimeError("transcript unavailable")
+
+    async def main():
+        job = queue.submit("summary", "video-1", work, error_payload)
+        events = [event async for event in job.follow()]
+        return job, events
+
+    job, events = run_with(queue, main)
+    assert job.status == FAILED
+    assert job.error == {"code": "ERR_TEST", "message": "transcript unavailable"}
+    assert events[-1] == ("error", job.error)
+    assert queue.stats()["failed"] == 1
+
+
+def test_resubmitting_an_active_key_returns_the_same_job():
+    queue = make_queue()
+    release = None
+
+    async def work(job):
+        await release.wait()
+        return "ok"
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        first = queue.submit("summary", "video-1", work, error_payload)
+        second = queue.submit("summary", "video-1", work, error_payload)
+        release.set()
+        [event async for event in first.follow()]
+        # Finished jobs don't absorb new submissions
+        third = queue.submit("summary", "video-1", work, error_payload)
+        [event async for event in third.follow()]
+        return first, second, third
+
+    first, second, third = run_with(queue, main)
+    assert second is first
+    assert third is not first
+    assert queue.stats()["deduplicated"] == 1
+
+
+def test_full_queue_refuses_submissions():
+    queue = make_queue(workers=1, max_queued=1)
+    release = None
+
+    async def work(job):
+        await release.wait()
+        return "ok"
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        running = queue.submit("summary", "video-1", work, error_payload)
+        await asyncio.sleep(0)  # the worker picks it up
+        queue.submit("summary", "video-2", work, error_payload)
+        with pytest.raises(QueueFull):
+            queue.submit("summary", "video-3", work, error_payload)
+        release.set()
+        [event async for event in running.follow()]
+
+    run_with(queue, main)
+    assert queue.stats()["rejected"] == 1
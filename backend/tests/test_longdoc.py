@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from app.services.chat_memory import history_budget
+from app.services.llm import chain_budget
+from app.services.longdoc import TIMESTAMPED_ENDPOINTS, TRANSCRIPT_TOKEN_TARGETS, fit_transcript, transcript_budget
+from app.services.tokens import count_tokens
+
+
+@pytest.mark.parametrize("endpoint", sorted(TRANSCRIPT_TOKEN_TARGETS))
+def test_transcript_budget_is_capped_by_target(endpoint):
+    assert 0 < transcript_budget(endpoint) <= TRANSCRIPT_TOKEN_TARGETS[endpoint]
+
+
+def test_chat_budget_reserves_history(monkeypatch):
+    # A small unknown model, so the context window rather than the target binds
+    monkeypatch.setenv("LLM_MODEL_FAST", "small-test-model")
+    monkeypatch.setenv("LLM_FALLBACK_FAST", "")
+    monkeypatch.setitem(TRANSCRIPT_TOKEN_TARGETS, "chat", 100000)
+    assert transcript_budget("chat") == chain_budget("chat") - history_budget()
+
+
+@pytest.mark.parametrize("endpoint", sorted(TRANSCRIPT_TOKEN_TARGETS))
+def test_short_transcript_is_returned_whole(endpoint, registry, make_session):
+    session = make_session("short")
+    text = asyncio.run(fit_transcript(endpoint, session, registry))
+    expected = session.timestamped_transcript() if endpoint in TIMESTAMPED_ENDPOINTS else session.transcript
+    assert text == expected
+
+
+@pytest.mark.parametrize("endpoint", sorted(TRANSCRIPT_TOKEN_TARGETS))
+def test_long_transcript_fits_budget(endpoint, registry, make_session):
+    session = make_session("long")
+    assert session.transcript_tokens() > transcript_budget(endpoint)
+    text = asyncio.run(fit_transcript(endpoint, session, registry))
+    assert 0 < count_tokens(text) <= transcript_budget(endpoint)
+
+
+def test_map_notes_are_shared_between_endpoints(registry, make_session):
+    session = make_session("long")
+
+    async def both():
+        return await asyncio.gather(
+            fit_transcript("quiz", session, registry),
+            fit_transcript("flashcards", session, registry),
+        )
+
+    asyncio.run(both())
+    assert len(session.digests["map_notes"]) > 1
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.cache import SQLiteStore, TieredCache, TTLCache
+from app.services.response_cache import ResponseCache
+from app.services.singleflight import SingleFlight
+
+
+def make_cache() -> ResponseCache:
+    return ResponseCache(TieredCache(TTLCache(max_entries=16, ttl=60)))
+
+
+def test_key_depends_on_everything_that_shapes_the_output():
+    key = ResponseCache.key("summary", "transcript", "title", length="MEDIUM", language="ko")
+    assert key == ResponseCache.key("summary", "transcript", "title", language="ko", length="MEDIUM")
+    assert key != ResponseCache.key("summary", "transcript!", "title", length="MEDIUM", language="ko")
+    assert key != ResponseCache.key("summary", "transcript", "title", length="LONG", language="ko")
+    assert key != ResponseCache.key("mindmap", "transcript", "title")
+
+
+def test_get_or_compute_stores_results():
+    cache = make_cache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    assert asyncio.run(cache.get_or_compute("k", compute)) == ({"value": 1}, False)
+    assert asyncio.run(cache.get_or_compute("k", compute)) == ({"value": 1}, True)
+    # Bypass recomputes and refreshes the entry
+    assert asyncio.run(cache.get_or_compute("k", compute, bypass=True)) == ({"value": 2}, False)
+    assert asyncio.run(cache.get_or_compute("k", compute)) == ({"value": 2}, True)
+    assert cache.stats()["bypassed"] == 1
+
+
+def test_disk_tier_runs_off_the_event_loop(tmp_path, monkeypatch):
+    disk = SQLiteStore(str(tmp_path / "responses.db"))
+    cache = ResponseCache(TieredCache(TTLCache(max_entries=16, ttl=60), disk))
+    threads = []
+    for name in ("get", "set"):
+        original = getattr(disk, name)
+        monkeypatch.setattr(disk, name, lambda *args, _original=original: threads.append(threading.current_thread()) or _original(*args))
+
+    async def compute():
+        return "summary"
+
+    async def run():
+        loop_thread = threading.current_thread()
+        await cache.get_or_compute("k", compute)
+        cache.store.memory.clear()
+        return loop_thread, await cache.aget("k")
+
+    loop_thread, value = asyncio.run(run())
+    assert value == "summary"
+    assert len(threads) == 3 and loop_thread not in threads
+
+
+def test_failures_are_not_cached():
+    cache = make_cache()
+
+    async def fail():
+        raise RuntimeError("model down")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_compute("k", fail))
+    assert cache.get("k") is None
+
+
+def test_single_flight_shares_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", slow) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert calls == [1]
+    assert flight.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_single_flight_survives_a_cancelled_caller():
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "result"
+
+    async def run():
+        first = asyncio.ensure_future(flight.do("k", slow))
+        second = asyncio.ensure_future(flight.do("k", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "result"
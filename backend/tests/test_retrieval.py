@@ -0,0 +1,62 @@
+import asyncio
+
+from app.services import retrieval
+from app.services.retrieval import RetrievalIndex, get_retrieval_index, retrieve_context, start_retrieval_index
+from app.services.sessions import AnalysisSession
+from app.services.tokens import count_tokens
+
+
+def test_index_is_built_once(make_session, monkeypatch):
+    session = make_session("long")
+    builds = []
+    build = retrieval._build_index
+
+    async def counted(session):
+        builds.append(session.id)
+        return await build(session)
+
+    monkeypatch.setattr(retrieval, "_build_index", counted)
+
+    async def concurrent():
+        start_retrieval_index(session)
+        return await asyncio.gather(*(get_retrieval_index(session) for _ in range(5)))
+
+    indexes = asyncio.run(concurrent())
+    assert builds == [session.id]
+    assert all(index is session.index for index in indexes)
+
+
+def test_failed_build_is_logged_and_retried(make_session, monkeypatch, caplog):
+    session = make_session("long")
+
+    async def broken(session):
+        raise RuntimeError("index build failed")
+
+    async def run():
+        monkeypatch.setattr(retrieval, "_build_index", broken)
+        task = start_retrieval_index(session)
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+        monkeypatch.setattr(retrieval, "_build_index", build)
+        return await get_retrieval_index(session)
+
+    build = retrieval._build_index
+    index = asyncio.run(run())
+    assert [record.getMessage() for record in caplog.records] == ["retrieval.index_failed"]
+    assert isinstance(index, RetrievalIndex)
+
+
+def test_context_holds_the_matching_chunk():
+    filler = "오늘은 강의에서 데이터를 정리하고 다음 단계에서 결과를 확인합니다. " * 40
+    paragraphs = [f"{i}. {filler}" for i in range(30)]
+    paragraphs[17] = "광합성은 엽록소가 빛 에너지를 화학 에너지로 바꾸는 과정입니다. " * 5
+    session = AnalysisSession(id="test", video_id="", title="", transcript="\n\n".join(paragraphs))
+    context = asyncio.run(retrieve_context(session, "광합성에서 엽록소의 역할은?"))
+    assert "엽록소" in context
+    assert count_tokens(context) < session.transcript_tokens() / 2
+
+
+def test_short_transcript_skips_the_index():
+    session = AnalysisSession(id="test", video_id="", title="", transcript="짧은 자막입니다.")
+    assert asyncio.run(retrieve_context(session, "anything")) == session.transcript
+    assert session.index_task is None
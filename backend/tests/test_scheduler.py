@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from app.services import llm
+from app.services.scheduler import BATCH, INTERACTIVE, NORMAL, LLMScheduler, close_llm_scheduler, get_llm_scheduler
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__("429 Too Many Requests")
+        self.response = type("Response", (), {"status_code": 429, "headers": {"retry-after": str(retry_after)}})()
+
+
+def test_waiting_calls_are_served_by_priority():
+    scheduler = LLMScheduler(rpm=0, tpm=0, max_concurrency=1)
+    order = []
+
+    async def call(name):
+        order.append(name)
+
+    async def run():
+        async with scheduler.slot():
+            # Queued while the only slot is taken, in reverse priority order
+            waiting = [
+                asyncio.create_task(scheduler.run(lambda name=name: call(name), priority))
+                for name, priority in (("batch", BATCH), ("normal", NORMAL), ("interactive", INTERACTIVE))
+            ]
+            await asyncio.sleep(0)
+            assert scheduler.stats()["queue_depth"] == 3
+        await asyncio.gather(*waiting)
+
+    asyncio.run(run())
+    assert order == ["interactive", "normal", "batch"]
+
+
+def test_concurrency_is_capped():
+    scheduler = LLMScheduler(rpm=0, tpm=0, max_concurrency=2)
+    running = peak = 0
+
+    async def call():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    async def run():
+        await asyncio.gather(*(scheduler.run(call) for _ in range(8)))
+
+    asyncio.run(run())
+    assert peak == 2
+    assert scheduler.stats()["completed"] == 8
+
+
+def test_rate_limit_is_retried_after_the_hinted_delay():
+    scheduler = LLMScheduler(rpm=0, tpm=0, max_concurrency=4, max_retries=2)
+    attempts = []
+
+    async def call():
+        attempts.append(asyncio.get_running_loop().time())
+        if len(attempts) == 1:
+            raise RateLimited(retry_after=0.05)
+        return "ok"
+
+    assert asyncio.run(scheduler.run(call)) == "ok"
+    assert attempts[1] - attempts[0] >= 0.05
+    stats = scheduler.stats()
+    assert (stats["retries"], stats["rate_limited"], stats["failed"]) == (1, 1, 0)
+
+
+def test_non_retryable_errors_fail_at_once():
+    scheduler = LLMScheduler(rpm=0, tpm=0, max_concurrency=4)
+
+    async def call():
+        raise ValueError("bad prompt")
+
+    with pytest.raises(ValueError):
+        asyncio.run(scheduler.run(call))
+    assert (scheduler.stats()["retries"], scheduler.stats()["failed"]) == (0, 1)
+
+
+def test_scheduler_survives_a_new_event_loop(monkeypatch):
+    # One request per minute: the second call leaves a wakeup timer on the first loop
+    monkeypatch.setenv("LLM_RPM", "1")
+    close_llm_scheduler()
+    first = get_llm_scheduler()
+
+    async def call():
+        return "ok"
+
+    async def on_first_loop():
+        await first.run(call)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(first.run(call), 0.05)
+
+    asyncio.run(on_first_loop())
+    assert first._wakeup is not None
+    asyncio.run(llm.close_llm_registry())
+    assert first._wakeup is None
+
+    monkeypatch.setenv("LLM_RPM", "0")
+    second = get_llm_scheduler()
+    assert second is not first
+    assert asyncio.run(asyncio.wait_for(second.run(call), 1)) == "ok"
+    asyncio.run(llm.close_llm_registry())
@@ -0,0 +1,42 @@
+from app.services.tokens import (
+    DEFAULT_CONTEXT_WINDOW,
+    context_window,
+    count_tokens,
+    estimate_tokens,
+    prompt_budget,
+    split_by_tokens,
+    truncate_to_tokens,
+)
+
+KOREAN = "오늘 강의에서는 경사 하강법으로 모델을 학습시키는 과정을 살펴봅니다. " * 50
+
+
+def test_estimate_counts_hangul_per_syllable():
+    assert estimate_tokens("가나다") == 4
+    assert estimate_tokens("abcdefgh") == 3
+
+
+def test_truncate_fits_the_limit():
+    text = truncate_to_tokens(KOREAN, 100)
+    assert count_tokens(text) <= 100
+    assert KOREAN.startswith(text)
+    assert truncate_to_tokens("short", 100) == "short"
+
+
+def test_split_chunks_fit_the_limit():
+    chunks = split_by_tokens(KOREAN, 120)
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 120 for chunk in chunks)
+
+
+def test_unknown_models_get_the_default_window():
+    assert context_window("llama-3.1-8b-instant", "unknown-model") == DEFAULT_CONTEXT_WINDOW
+
+
+def test_prompt_budget_subtracts_template_completion_and_reserve(monkeypatch):
+    monkeypatch.setenv("TOKEN_SAFETY_MARGIN", "100")
+    template = "Summarize: {transcript}"
+    budget = prompt_budget(["unknown-model"], template, max_tokens=1000, reserve=500)
+    assert budget == DEFAULT_CONTEXT_WINDOW - count_tokens(template) - 1000 - 500 - 100
+    assert prompt_budget(["unknown-model"], template, max_tokens=1000, target=2000) == 2000
+    assert prompt_budget(["unknown-model"], template, max_tokens=DEFAULT_CONTEXT_WINDOW) == 0
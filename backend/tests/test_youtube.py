@@ -0,0 +1,58 @@
+from dataclasses import dataclass, field
+from typing import List
+
+from youtube_transcript_api._transcripts import _TranslationLanguage
+
+from app.services.youtube import _metadata_from_info, select_transcript_track
+
+
+@dataclass
+class FakeTrack:
+    language_code: str
+    is_generated: bool = False
+    is_translatable: bool = False
+    translation_languages: List[_TranslationLanguage] = field(default_factory=list)
+
+
+KOREAN = _TranslationLanguage(language="Korean", language_code="ko")
+
+
+def test_thumbnail_from_processed_info():
+    info = {"thumbnail": "https://i.ytimg.com/vi/abc/maxresdefault.jpg"}
+    assert _metadata_from_info("abc", info)["thumbnail"] == "https://i.ytimg.com/vi/abc/maxresdefault.jpg"
+
+
+def test_thumbnail_from_unprocessed_list():
+    # extract_info(process=False) leaves only the raw, unsorted list
+    info = {"thumbnails": [
+        {"url": "https://i.ytimg.com/vi/abc/hq720.jpg", "preference": -2, "width": 1280, "height": 720},
+        {"url": "https://i.ytimg.com/vi/abc/maxresdefault.jpg", "preference": 0, "width": 1920, "height": 1080},
+        {"url": "https://i.ytimg.com/vi/abc/sddefault.jpg", "preference": -5, "width": 640, "height": 480},
+    ]}
+    assert _metadata_from_info("abc", info)["thumbnail"] == "https://i.ytimg.com/vi/abc/maxresdefault.jpg"
+
+
+def test_thumbnail_default_exists_for_every_video():
+    assert _metadata_from_info("abc", {})["thumbnail"] == "https://i.ytimg.com/vi/abc/hqdefault.jpg"
+
+
+def test_track_exact_match_prefers_manual_and_language_order():
+    generated_ko = FakeTrack("ko", is_generated=True)
+    manual_en = FakeTrack("en-US")
+    manual_ko = FakeTrack("ko")
+    assert select_transcript_track([generated_ko, manual_en, manual_ko], ("ko", "en")) == (manual_ko, None)
+    assert select_transcript_track([manual_en, generated_ko], ("ko", "en")) == (generated_ko, None)
+    assert select_transcript_track([manual_en], ("ko", "en")) == (manual_en, None)
+
+
+def test_track_is_translated_into_the_first_preference():
+    untranslatable = FakeTrack("ja")
+    translatable = FakeTrack("fr", is_translatable=True, translation_languages=[KOREAN])
+    assert select_transcript_track([untranslatable, translatable], ("ko", "en")) == (translatable, "ko")
+
+
+def test_any_track_is_the_last_resort():
+    generated = FakeTrack("ja", is_generated=True, is_translatable=True, translation_languages=[_TranslationLanguage("German", "de")])
+    manual = FakeTrack("fr")
+    assert select_transcript_track([generated, manual], ("ko", "en")) == (manual, None)
+    assert select_transcript_track([], ("ko", "en")) == (None, None)
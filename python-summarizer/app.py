@@ -6,12 +6,20 @@ and uses Groq Cloud for AI-powered summarization.
 """
 
 import streamlit as st
+import logging
 import os
 import re
 import uuid
 import tempfile
-from typing import Optional, Tuple, List
-from datetime import datetime
+import json
+import random
+import subprocess
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional, Tuple, List
 
 # Groq and LangChain imports
 from groq import Groq
@@ -24,6 +32,9 @@ from langchain_core.output_parsers import StrOutputParser
 from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
 import yt_dlp
 
+# Background work (map threads, Whisper windows) can't write to the page; it logs
+logger = logging.getLogger(__name__)
+
 # Page configuration
 st.set_page_config(
     page_title="YouTube AI 요약기 - Groq Cloud",
@@ -108,47 +119,199 @@ def get_video_metadata(video_id: str) -> dict:
         }
 
 
-def get_transcript(video_id: str) -> Tuple[Optional[str], str]:
+class TranscriptStore:
+    """
+    Transcript cache keyed by (video_id, languages).
+    In-memory LRU tier in front of a SQLite file tier, both with a TTL.
+    """
+
+    def __init__(self, path: str, ttl: float, memory_entries: int, disk_entries: int):
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS transcripts ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[0] > now:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM transcripts WHERE key = ?", (key,)
+            ).fetchone()
+            if row and row[1] > now:
+                value = json.loads(row[0])
+                self._conn.execute("UPDATE transcripts SET accessed_at = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+                self._remember(key, value, row[1])
+                self.hits += 1
+                return value
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value) -> None:
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, now),
+            )
+            self._conn.execute("DELETE FROM transcripts WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "DELETE FROM transcripts WHERE key NOT IN"
+                " (SELECT key FROM transcripts ORDER BY accessed_at DESC LIMIT ?)",
+                (self.disk_entries,),
+            )
+            self._conn.commit()
+
+    def _remember(self, key: str, value, expires_at: float) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+
+@st.cache_resource
+def get_transcript_store() -> TranscriptStore:
+    """Process-wide transcript store shared by all Streamlit sessions."""
+    return TranscriptStore(
+        path=os.getenv("TRANSCRIPT_CACHE_PATH", ".cache/transcripts.sqlite3"),
+        ttl=float(os.getenv("TRANSCRIPT_CACHE_TTL", str(7 * 24 * 3600))),
+        memory_entries=int(os.getenv("TRANSCRIPT_CACHE_MEMORY_ENTRIES", "256")),
+        disk_entries=int(os.getenv("TRANSCRIPT_CACHE_DISK_ENTRIES", "10000")),
+    )
+
+
+# Parallel map-step LLM calls; keep within the provider's requests-per-minute limit
+MAP_CONCURRENCY = int(os.getenv("MAP_CONCURRENCY", "4"))
+
+TRANSCRIPT_LANGUAGES = tuple(
+    lang.strip() for lang in os.getenv("TRANSCRIPT_LANGUAGES", "ko,en").split(",") if lang.strip()
+)
+
+
+def get_transcript(video_id: str) -> Tuple[Optional[str], str, Optional[dict], Optional[dict]]:
     """
     Step A: Try to get existing transcript from YouTube.
-    Returns (transcript_text, source) where source is 'subtitle' or 'none'.
+    Returns (transcript_text, source, track, segments) where source is 'subtitle'
+    or 'none', track describes the chosen caption track and segments holds the
+    caption timings (see build_segments).
+    Cached transcripts are served from the transcript store.
+    """
+    store = get_transcript_store()
+    key = f"transcript:{video_id}:{','.join(TRANSCRIPT_LANGUAGES)}"
+    cached = store.get(key)
+    if isinstance(cached, dict):
+        return cached['text'], 'subtitle', cached['track'], cached.get('segments')
+
+    result = fetch_transcript(video_id, TRANSCRIPT_LANGUAGES)
+    if result:
+        store.set(key, result)
+        return result['text'], 'subtitle', result['track'], result['segments']
+    return None, 'none', None, None
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format as m:ss, or h:mm:ss from one hour on."""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+def build_segments(entries: List[dict]) -> Tuple[str, dict]:
+    """
+    Join timed entries ({'text', 'start', 'duration'}) into one text buffer.
+    Returns (text, segments) where segments holds parallel lists: 'starts' and
+    'durations' in seconds, and 'offsets' where each entry's text begins in the
+    buffer (plus a final offset equal to len(text)).
+    """
+    parts, starts, durations, offsets = [], [], [], []
+    position = 0
+    for entry in entries:
+        text = " ".join(entry['text'].split())
+        if not text:
+            continue
+        if parts:
+            position += 1  # joining space
+        offsets.append(position)
+        starts.append(float(entry['start']))
+        durations.append(float(entry.get('duration') or 0.0))
+        parts.append(text)
+        position += len(text)
+    offsets.append(position)
+    return " ".join(parts), {'starts': starts, 'durations': durations, 'offsets': offsets}
+
+
+def _language_matches(language_code: str, lang: str) -> bool:
+    return language_code == lang or language_code.split('-')[0] == lang
+
+
+def select_transcript_track(tracks: list, languages: Tuple[str, ...]):
+    """
+    Pick the best caption track from an already-listed set.
+    Order: requested languages (manual before generated), then a translatable
+    track translated into the first preference, then any track.
+    Returns (track, translate_to).
+    """
+    for lang in languages:
+        for generated in (False, True):
+            for track in tracks:
+                if track.is_generated == generated and _language_matches(track.language_code, lang):
+                    return track, None
+    
+    if languages:
+        for track in sorted(tracks, key=lambda t: t.is_generated):
+            if track.is_translatable and any(
+                tl.language_code == languages[0] for tl in track.translation_languages
+            ):
+                return track, languages[0]
+    
+    if tracks:
+        return sorted(tracks, key=lambda t: t.is_generated)[0], None
+    return None, None
+
+
+def fetch_transcript(video_id: str, languages: Tuple[str, ...]) -> Optional[dict]:
+    """
+    Fetch a transcript from YouTube: list the tracks once, fetch exactly one.
     Uses youtube-transcript-api v1.x API.
     """
     try:
-        # Create API instance
         ytt_api = YouTubeTranscriptApi()
+        tracks = list(ytt_api.list(video_id))
+        track, translate_to = select_transcript_track(tracks, languages)
         
-        # Try to fetch with Korean first, then English
-        languages_to_try = [
-            ['ko'],           # Korean
-            ['en'],           # English
-            ['ko', 'en'],     # Either
-        ]
-        
-        transcript_data = None
-        
-        for langs in languages_to_try:
-            try:
-                fetched = ytt_api.fetch(video_id, languages=langs)
-                transcript_data = fetched.to_raw_data()
-                break
-            except Exception:
-                continue
-        
-        # If no transcript found with preferred languages, try to list and get any available
-        if transcript_data is None:
-            try:
-                transcript_list = ytt_api.list(video_id)
-                for transcript in transcript_list:
-                    fetched = transcript.fetch()
-                    transcript_data = fetched.to_raw_data()
-                    break
-            except Exception:
-                pass
-        
-        if transcript_data:
-            full_text = " ".join([entry['text'] for entry in transcript_data])
-            return full_text, 'subtitle'
+        if track is not None:
+            chosen = track.translate(translate_to) if translate_to else track
+            text, segments = build_segments(chosen.fetch().to_raw_data())
+            if text:
+                return {
+                    'text': text,
+                    'segments': segments,
+                    'track': {
+                        'language_code': chosen.language_code,
+                        'language': chosen.language,
+                        'is_generated': track.is_generated,
+                        'translated_from': track.language_code if translate_to else None,
+                    },
+                }
             
     except TranscriptsDisabled:
         st.info("이 영상은 자막이 비활성화되어 있습니다. 오디오 분석을 시도합니다.")
@@ -157,13 +320,34 @@ def get_transcript(video_id: str) -> Tuple[Optional[str], str]:
     except Exception as e:
         st.warning(f"자막 추출 중 오류: {e}")
     
-    return None, 'none'
+    return None
+
+
+def audio_stream(video_id: str) -> Optional[Tuple[str, dict]]:
+    """
+    Step B: Resolve the direct URL (and the HTTP headers it needs) of the
+    video's best audio-only stream, so it can be decoded while downloading.
+    """
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'quiet': True,
+        'no_warnings': True,
+    }
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
+        if info.get('url'):
+            return info['url'], info.get('http_headers') or {}
+    except Exception as e:
+        logger.warning("Audio stream lookup failed: %s", e)
+    return None
 
 
 def download_audio(video_id: str, output_dir: str) -> Optional[str]:
     """
-    Step B: Download audio from YouTube using yt-dlp.
-    Returns path to downloaded audio file.
+    Step B (fallback): Download audio from YouTube using yt-dlp.
+    Returns path to downloaded audio file. It is not transcoded here:
+    transcribe_audio_stream decodes any container/codec itself.
     """
     unique_id = str(uuid.uuid4())[:8]
     output_path = os.path.join(output_dir, f"audio_{video_id}_{unique_id}")
@@ -173,12 +357,6 @@ def download_audio(video_id: str, output_dir: str) -> Optional[str]:
         'outtmpl': output_path + '.%(ext)s',
         'quiet': True,
         'no_warnings': True,
-        'extract_audio': True,
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '128',
-        }],
     }
     
     try:
@@ -186,12 +364,6 @@ def download_audio(video_id: str, output_dir: str) -> Optional[str]:
             ydl.download([f"https://www.youtube.com/watch?v={video_id}"])
         
         # Find the downloaded file
-        for ext in ['mp3', 'm4a', 'webm', 'opus']:
-            file_path = output_path + '.' + ext
-            if os.path.exists(file_path):
-                return file_path
-                
-        # Check if any file was created with the prefix
         for f in os.listdir(output_dir):
             if f.startswith(f"audio_{video_id}_{unique_id}"):
                 return os.path.join(output_dir, f)
@@ -202,72 +374,377 @@ def download_audio(video_id: str, output_dir: str) -> Optional[str]:
     return None
 
 
-def transcribe_audio_with_groq(audio_path: str, api_key: str) -> Optional[str]:
+@st.cache_resource
+def get_groq_client(api_key: str) -> Groq:
+    """One Groq client (and HTTP connection pool) per API key."""
+    return Groq(api_key=api_key)
+
+
+# tier -> (primary model, fallback model). The map step is cheap enough for
+# the small model; the final analysis stays on the large one.
+MODEL_TIERS = {
+    "fast": (
+        os.getenv("LLM_MODEL_FAST", "llama-3.1-8b-instant"),
+        os.getenv("LLM_FALLBACK_FAST", "meta-llama/llama-4-scout-17b-16e-instruct"),
+    ),
+    "quality": (
+        os.getenv("LLM_MODEL_QUALITY", "llama-3.3-70b-versatile"),
+        os.getenv("LLM_FALLBACK_QUALITY", "openai/gpt-oss-120b"),
+    ),
+}
+
+
+LLM_MAX_TOKENS = 4096
+
+
+@st.cache_resource
+def get_chat_llm(api_key: str, model: str = "llama-3.3-70b-versatile") -> ChatGroq:
+    """One ChatGroq client per API key and model, reused across analyses and sessions."""
+    return ChatGroq(
+        groq_api_key=api_key,
+        model_name=model,
+        temperature=0.3,
+        max_tokens=LLM_MAX_TOKENS,
+        max_retries=0,  # invoke_with_retry owns backoff
+    )
+
+
+def get_tier_llms(api_key: str, tier: str) -> List[Tuple[str, ChatGroq]]:
+    """[(model, client)] for `tier`: the primary, then the fallback if configured."""
+    return [(model, get_chat_llm(api_key, model)) for model in dict.fromkeys(MODEL_TIERS[tier]) if model]
+
+
+class TierLatency:
+    """Thread-safe per-tier call latencies (the map step runs on a thread pool)."""
+
+    def __init__(self, window: int = 256):
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._window = window
+        self.fallbacks = 0
+
+    def record(self, tier: str, ms: float) -> None:
+        with self._lock:
+            recent = self._latencies.setdefault(tier, [])
+            recent.append(ms)
+            del recent[:-self._window]
+
+    def record_fallback(self) -> None:
+        with self._lock:
+            self.fallbacks += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            result = {}
+            for tier, recent in self._latencies.items():
+                ordered = sorted(recent)
+                result[tier] = {
+                    "calls": len(ordered),
+                    "p50_ms": ordered[len(ordered) // 2],
+                    "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                }
+            return result
+
+
+@st.cache_resource
+def get_tier_latency() -> TierLatency:
+    return TierLatency()
+
+
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+
+
+def _is_retryable(e: Exception) -> bool:
+    status = getattr(e, "status_code", None)
+    return status in (408, 409, 429, 500, 502, 503, 504) or type(e).__name__ in (
+        "RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError"
+    ) or "429" in str(e)
+
+
+def call_with_retry(fn: Callable[[], object], max_retries: int = LLM_MAX_RETRIES):
     """
-    Step 2: Use Groq Whisper API for speech-to-text.
+    fn() with jittered exponential backoff on rate limits and transient
+    errors, honoring the provider's Retry-After header. Keeps the parallel
+    map step (and concurrent Whisper calls) from failing outright when they
+    burst into the limit.
     """
-    try:
-        client = Groq(api_key=api_key)
-        
-        # Check file size (Groq has limits)
-        file_size = os.path.getsize(audio_path)
-        if file_size > 25 * 1024 * 1024:  # 25MB limit
-            st.warning("오디오 파일이 25MB를 초과합니다. 처음 25MB만 처리합니다.")
-        
-        with open(audio_path, "rb") as audio_file:
-            transcription = client.audio.transcriptions.create(
-                file=(os.path.basename(audio_path), audio_file.read()),
-                model="whisper-large-v3",
-                language="ko",  # Try Korean first
-                response_format="text"
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if not _is_retryable(e) or attempt == max_retries:
+                raise
+            headers = getattr(getattr(e, "response", None), "headers", None) or {}
+            try:
+                delay = float(headers.get("retry-after"))
+            except (TypeError, ValueError):
+                delay = min(30.0, 2 ** attempt) * random.uniform(0.5, 1.0)
+            logger.warning(
+                "Groq call failed (%s), retry %d/%d in %.1fs", type(e).__name__, attempt + 1, max_retries, delay
             )
-        
-        return transcription
+            time.sleep(delay)
+
+
+def invoke_with_retry(chain, inputs: dict, max_retries: int = LLM_MAX_RETRIES):
+    """chain.invoke(inputs) under call_with_retry."""
+    return call_with_retry(lambda: chain.invoke(inputs), max_retries)
+
+
+def invoke_tiered(prompt: PromptTemplate, inputs: dict, llms: List[Tuple[str, ChatGroq]], tier: str) -> str:
+    """
+    Run `prompt | llm | parser` on the tier's primary model. A rate-limited or
+    failing primary is tried once, then the fallback model takes over with
+    the full retry policy.
+    """
+    started = time.perf_counter()
+    for i, (model, llm) in enumerate(llms):
+        last = i == len(llms) - 1
+        try:
+            result = invoke_with_retry(
+                prompt | llm | StrOutputParser(), inputs, max_retries=LLM_MAX_RETRIES if last else 0
+            )
+            break
+        except Exception as e:
+            if last or not _is_retryable(e):
+                raise
+            get_tier_latency().record_fallback()
+            logger.warning("LLM %s unavailable (%s), falling back to %s", model, type(e).__name__, llms[i + 1][0])
+    get_tier_latency().record(tier, (time.perf_counter() - started) * 1000)
+    return result
+
+
+# Whisper pipeline: audio is decoded to 16 kHz mono PCM as it streams in,
+# cut into overlapping windows, and each window is encoded at a low bitrate
+# and transcribed while the rest is still downloading.
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "whisper-large-v3")
+WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "ko")
+WHISPER_CONCURRENCY = int(os.getenv("WHISPER_CONCURRENCY", "3"))
+WHISPER_WINDOW_SECONDS = int(os.getenv("WHISPER_WINDOW_SECONDS", "600"))
+WHISPER_OVERLAP_SECONDS = int(os.getenv("WHISPER_OVERLAP_SECONDS", "5"))
+WHISPER_BITRATE_KBPS = int(os.getenv("WHISPER_BITRATE_KBPS", "32"))
+WHISPER_MAX_UPLOAD_BYTES = 24 * 1024 * 1024  # Groq's limit is 25 MB
+SAMPLE_RATE = 16000
+PCM_BYTES_PER_SECOND = SAMPLE_RATE * 2  # s16le mono
+
+
+def whisper_window_seconds() -> int:
+    """Window length, shrunk if needed so an encoded window stays under the upload limit."""
+    max_seconds = WHISPER_MAX_UPLOAD_BYTES * 8 // (WHISPER_BITRATE_KBPS * 1000) - WHISPER_OVERLAP_SECONDS
+    return max(min(WHISPER_WINDOW_SECONDS, max_seconds), WHISPER_OVERLAP_SECONDS * 2)
+
+
+def encode_window(pcm: bytes) -> bytes:
+    """Encode raw PCM as low-bitrate mono MP3 for upload."""
+    return subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-loglevel", "error",
+            "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1", "-i", "pipe:0",
+            "-c:a", "libmp3lame", "-b:a", f"{WHISPER_BITRATE_KBPS}k", "-f", "mp3", "pipe:1",
+        ],
+        input=pcm, capture_output=True, check=True,
+    ).stdout
+
+
+def _field(item, name: str, default=None):
+    return item.get(name, default) if isinstance(item, dict) else getattr(item, name, default)
+
+
+def transcribe_window(client: Groq, pcm: bytes, offset: float, index: int) -> List[dict]:
+    """Transcribe one window; returns timed entries with absolute start times."""
+    audio = encode_window(pcm)
+    result = call_with_retry(lambda: client.audio.transcriptions.create(
+        file=(f"window_{index}.mp3", audio),
+        model=WHISPER_MODEL,
+        language=WHISPER_LANGUAGE,
+        response_format="verbose_json",
+    ))
+    segments = _field(result, "segments") or []
+    if not segments:
+        text = _field(result, "text", "") or ""
+        return [{'text': text, 'start': offset, 'duration': len(pcm) / PCM_BYTES_PER_SECOND}] if text.strip() else []
+    return [
+        {
+            'text': _field(seg, "text", ""),
+            'start': offset + float(_field(seg, "start", 0.0)),
+            'duration': float(_field(seg, "end", 0.0)) - float(_field(seg, "start", 0.0)),
+        }
+        for seg in segments
+    ]
+
+
+def stitch_windows(windows: List[Tuple[float, List[dict]]]) -> List[dict]:
+    """
+    Merge per-window entries, cutting each overlap at its midpoint: a window
+    keeps the entries starting in [its start + overlap/2, next start + overlap/2).
+    """
+    half = WHISPER_OVERLAP_SECONDS / 2
+    entries = []
+    for i, (start, window_entries) in enumerate(windows):
+        low = start + half if i else float("-inf")
+        high = windows[i + 1][0] + half if i + 1 < len(windows) else float("inf")
+        entries.extend(e for e in window_entries if low <= e['start'] < high)
+    return entries
+
+
+def pcm_windows(stream, window: int, overlap: int):
+    """
+    Yield (start_seconds, pcm) windows of `window + overlap` bytes, each
+    starting `window` bytes after the previous one, as soon as the stream
+    has delivered them. The tail is yielded unless the previous window's
+    overlap already covers it.
+    """
+    buffer = bytearray()
+    position = 0  # bytes of audio before buffer[0]
+    eof = False
+    while not eof:
+        data = stream.read(PCM_BYTES_PER_SECOND * 4)
+        eof = not data
+        buffer.extend(data)
+        while len(buffer) >= window + overlap or (eof and len(buffer) > (overlap if position else 0)):
+            yield position / PCM_BYTES_PER_SECOND, bytes(buffer[:window + overlap])
+            del buffer[:window]
+            position += window
+
+
+def transcribe_audio_stream(
+    source: str,
+    api_key: str,
+    http_headers: Optional[dict] = None,
+    on_progress: Optional[Callable[[float], None]] = None,
+) -> Optional[Tuple[str, dict]]:
+    """
+    Step 2: Speech-to-text with Groq Whisper over a URL or file, while it downloads.
+    ffmpeg decodes `source` to PCM; every full window (plus overlap) is
+    submitted for transcription right away, at most WHISPER_CONCURRENCY at
+    a time. Returns (text, segments) like build_segments, or None, also when
+    ffmpeg fails part-way (a cut-off stream is not passed off as the transcript).
+    `on_progress(seconds_transcribed)` is called from this (the Streamlit) thread.
+    """
+    client = get_groq_client(api_key)
+    window = whisper_window_seconds() * PCM_BYTES_PER_SECOND
+    overlap = WHISPER_OVERLAP_SECONDS * PCM_BYTES_PER_SECOND
+
+    cmd = ["ffmpeg", "-nostdin", "-loglevel", "error"]
+    if http_headers:
+        cmd += ["-headers", "".join(f"{k}: {v}\r\n" for k, v in http_headers.items())]
+    cmd += ["-i", source, "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "pipe:1"]
+
+    starts: List[float] = []
+    futures = []
+
+    def report_progress():
+        if on_progress:
+            done = [starts[i] + whisper_window_seconds() for i, f in enumerate(futures) if f.done()]
+            on_progress(max(done, default=0.0))
+
+    try:
+        # stderr goes to a file: an unread pipe would stall ffmpeg once it filled up
+        with ThreadPoolExecutor(max_workers=max(1, WHISPER_CONCURRENCY)) as executor, tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+            try:
+                for start, pcm in pcm_windows(process.stdout, window, overlap):
+                    starts.append(start)
+                    futures.append(executor.submit(transcribe_window, client, pcm, start, len(starts) - 1))
+                    report_progress()
+                process.wait()
+            finally:
+                if process.poll() is None:
+                    process.kill()
+
+            if process.returncode != 0 or not futures:
+                stderr.seek(0)
+                error = stderr.read().decode(errors="replace").strip()
+                executor.shutdown(wait=False, cancel_futures=True)
+                st.warning(f"오디오 디코딩 실패 (ffmpeg {process.returncode}): {error[-500:] or 'no audio'}")
+                return None
+
+            for _ in as_completed(futures):
+                report_progress()
+            entries = stitch_windows([(start, future.result()) for start, future in zip(starts, futures)])
+
+        text, segments = build_segments(entries)
+        return (text, segments) if text else None
         
     except Exception as e:
         st.error(f"음성 인식 실패: {e}")
         return None
 
 
-def chunk_text(text: str, chunk_size: int = 4000, overlap: int = 200) -> List[str]:
+# Token budgeting: transcript chunks and the reduce input are sized in
+# tokens, since Korean text costs ~4x the tokens per character of English.
+# tiktoken's cl100k_base (close to the Llama 3 tokenizer) when installed,
+# otherwise a character-class estimate.
+MODEL_CONTEXT_WINDOWS = {
+    "llama-3.1-8b-instant": 131072,
+    "llama-3.3-70b-versatile": 131072,
+    "meta-llama/llama-4-scout-17b-16e-instruct": 131072,
+    "openai/gpt-oss-120b": 131072,
+}
+MAP_CHUNK_TOKENS = int(os.getenv("MAP_CHUNK_TOKENS", "2000"))
+REDUCE_INPUT_TOKENS = int(os.getenv("REDUCE_INPUT_TOKENS", "8000"))
+TOKEN_SAFETY_MARGIN = 256
+
+
+@st.cache_resource
+def get_token_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_token_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    hangul = sum(1 for ch in text if "가" <= ch <= "힣")
+    return hangul + (len(text) - hangul) // 4 + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """The longest prefix of `text` that fits in `max_tokens`."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = get_token_encoding()
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens]).rstrip("�")
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+
+def prompt_budget(tier: str, prompt: PromptTemplate, max_tokens: int, target: int) -> int:
     """
-    Step 3: Split text into manageable chunks for LLM processing.
+    Tokens left for a prompt's variable input on `tier`'s models: the smallest
+    context window minus the template and the reserved completion tokens,
+    capped at `target`.
     """
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=overlap,
-        length_function=len,
-        separators=["\n\n", "\n", ". ", " ", ""]
-    )
-    chunks = splitter.split_text(text)
-    return chunks
+    window = min(MODEL_CONTEXT_WINDOWS.get(model, 8192) for model in MODEL_TIERS[tier] if model)
+    available = window - count_tokens(prompt.template) - max_tokens - TOKEN_SAFETY_MARGIN
+    return max(min(available, target), 1)
 
 
-def summarize_chunk(chunk: str, chunk_num: int, total_chunks: int, llm: ChatGroq) -> str:
-    """Map step: Summarize a single chunk."""
-    map_prompt = PromptTemplate(
-        input_variables=["chunk", "chunk_num", "total_chunks"],
-        template="""다음은 YouTube 영상의 {chunk_num}/{total_chunks} 부분입니다.
+MAP_PROMPT = PromptTemplate(
+    input_variables=["chunk", "chunk_num", "total_chunks"],
+    template="""다음은 YouTube 영상의 {chunk_num}/{total_chunks} 부분입니다.
 
-이 부분의 핵심 내용을 요약해주세요:
+이 부분의 핵심 내용을 요약해주세요. 부분이 [m:ss-m:ss] 형식의 시간 범위로 시작하면 요약도 그 시간 범위로 시작하세요:
 
 {chunk}
 
 요약:"""
-    )
-    
-    chain = map_prompt | llm | StrOutputParser()
-    result = chain.invoke({"chunk": chunk, "chunk_num": chunk_num, "total_chunks": total_chunks})
-    return result
+)
 
 
-def final_summarize(summaries: List[str], llm: ChatGroq) -> dict:
-    """Reduce step: Combine all chunk summaries into final output."""
-    combined = "\n\n---\n\n".join(summaries)
-    
-    reduce_prompt = PromptTemplate(
-        input_variables=["summaries"],
-        template="""다음은 YouTube 영상의 각 부분별 요약입니다:
+REDUCE_PROMPT = PromptTemplate(
+    input_variables=["summaries"],
+    template="""다음은 YouTube 영상의 각 부분별 요약입니다:
 
 {summaries}
 
@@ -277,7 +754,7 @@ def final_summarize(summaries: List[str], llm: ChatGroq) -> dict:
 (가장 중요한 내용 3가지를 간결하게)
 
 ## 📋 타임라인별 상세 내용
-(영상의 주요 흐름을 시간순으로 설명)
+(영상의 주요 흐름을 시간순으로 설명. 요약에 [m:ss] 시간 정보가 있으면 각 항목 앞에 표기)
 
 ## 🏷️ 주요 키워드 해시태그
 (영상의 핵심 키워드를 해시태그 형식으로 나열)
@@ -286,10 +763,91 @@ def final_summarize(summaries: List[str], llm: ChatGroq) -> dict:
 (영상에서 얻을 수 있는 주요 통찰이나 교훈)
 
 분석 결과:"""
+)
+
+
+def chunk_text(
+    text: str,
+    chunk_tokens: Optional[int] = None,
+    overlap_tokens: int = 75,
+    segments: Optional[dict] = None,
+) -> List[str]:
+    """
+    Step 3: Split text into manageable chunks for LLM processing.
+    Chunks are sized in tokens to fit the map step's model and prompt.
+    With caption timings they end on caption boundaries and start with their
+    time range, so the final timeline can cite real timestamps.
+    """
+    chunk_tokens = chunk_tokens or prompt_budget("fast", MAP_PROMPT, LLM_MAX_TOKENS, MAP_CHUNK_TOKENS)
+    if segments and segments['starts']:
+        return chunk_segments(text, segments, chunk_tokens - 16)
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_tokens,
+        chunk_overlap=overlap_tokens,
+        length_function=count_tokens,
+        separators=["\n\n", "\n", ". ", " ", ""]
+    )
+    chunks = splitter.split_text(text)
+    return chunks
+
+
+def chunk_segments(text: str, segments: dict, max_tokens: int) -> List[str]:
+    """Greedy chunks of whole caption segments (one shared segment between neighbours)."""
+    starts, durations, offsets = segments['starts'], segments['durations'], segments['offsets']
+    counts = [count_tokens(text[offsets[i]:offsets[i + 1]]) for i in range(len(starts))]
+    chunks = []
+    first = 0
+    while first < len(starts):
+        last, tokens = first, counts[first]
+        while last + 1 < len(starts) and tokens + counts[last + 1] <= max_tokens:
+            last += 1
+            tokens += counts[last]
+        label = f"[{format_timestamp(starts[first])}-{format_timestamp(starts[last] + durations[last])}]"
+        chunks.append(f"{label}\n{text[offsets[first]:offsets[last + 1]].strip()}")
+        if last + 1 >= len(starts):
+            break
+        first = max(last, first + 1)
+    return chunks
+
+
+def summarize_chunk(chunk: str, chunk_num: int, total_chunks: int, llms: List[Tuple[str, ChatGroq]]) -> str:
+    """Map step: Summarize a single chunk."""
+    return invoke_tiered(
+        MAP_PROMPT, {"chunk": chunk, "chunk_num": chunk_num, "total_chunks": total_chunks}, llms, "fast"
     )
+
+
+def map_summarize(
+    chunks: List[str],
+    llms: List[Tuple[str, ChatGroq]],
+    max_concurrency: int,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> List[str]:
+    """
+    Map step over all chunks, at most `max_concurrency` LLM calls in flight.
+    Chunks finish out of order; results are returned in chunk order.
+    `on_progress(done, total)` is called from this (the Streamlit) thread.
+    """
+    summaries: List[Optional[str]] = [None] * len(chunks)
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+        futures = {
+            executor.submit(summarize_chunk, chunk, i + 1, len(chunks), llms): i
+            for i, chunk in enumerate(chunks)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            summaries[futures[future]] = future.result()
+            if on_progress:
+                on_progress(done, len(chunks))
+    return summaries
+
+
+def final_summarize(summaries: List[str], llms: List[Tuple[str, ChatGroq]]) -> dict:
+    """Reduce step: Combine all chunk summaries into final output."""
+    combined = "\n\n---\n\n".join(summaries)
+    # Never overflow the reduce model's context (a long single-chunk transcript, many notes)
+    combined = truncate_to_tokens(combined, prompt_budget("quality", REDUCE_PROMPT, LLM_MAX_TOKENS, REDUCE_INPUT_TOKENS))
     
-    chain = reduce_prompt | llm | StrOutputParser()
-    result = chain.invoke({"summaries": combined})
+    result = invoke_tiered(REDUCE_PROMPT, {"summaries": combined}, llms, "quality")
     
     return {
         'full_analysis': result,
@@ -297,12 +855,14 @@ def final_summarize(summaries: List[str], llm: ChatGroq) -> dict:
     }
 
 
-def process_video(video_id: str, api_key: str) -> dict:
+def process_video(video_id: str, api_key: str, max_concurrency: int = MAP_CONCURRENCY) -> dict:
     """Main processing pipeline."""
     results = {
         'metadata': None,
         'transcript': None,
         'source': None,
+        'track': None,
+        'segments': None,
         'summary': None,
         'error': None
     }
@@ -315,74 +875,84 @@ def process_video(video_id: str, api_key: str) -> dict:
     
     # Step 1: Try to get transcript
     with st.status("📝 자막 확인 중...", expanded=True) as status:
-        transcript, source = get_transcript(video_id)
+        transcript, source, track, segments = get_transcript(video_id)
         
         if transcript:
             results['transcript'] = transcript
             results['source'] = 'subtitle'
-            st.write(f"✅ 자막 추출 완료 ({len(transcript):,}자)")
+            results['track'] = track
+            results['segments'] = segments
+            st.write(f"✅ 자막 추출 완료 ({len(transcript):,}자, {track['language']})")
             status.update(label="✅ 자막 추출 완료", state="complete")
         else:
             status.update(label="⚠️ 자막 없음 - 오디오 분석 필요", state="complete")
     
-    # Step 2: If no transcript, download and transcribe audio
+    # Step 2: If no transcript, transcribe the audio while it streams in
     if results['transcript'] is None:
-        with st.status("🎵 오디오 다운로드 중...", expanded=True) as status:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                audio_path = download_audio(video_id, temp_dir)
-                
-                if audio_path:
-                    st.write(f"✅ 오디오 다운로드 완료")
-                    status.update(label="✅ 오디오 다운로드 완료", state="complete")
-                    
-                    with st.status("🎤 Groq Whisper로 음성 인식 중...", expanded=True) as stt_status:
-                        transcript = transcribe_audio_with_groq(audio_path, api_key)
-                        
-                        if transcript:
-                            results['transcript'] = transcript
-                            results['source'] = 'whisper'
-                            st.write(f"✅ 음성 인식 완료 ({len(transcript):,}자)")
-                            stt_status.update(label="✅ 음성 인식 완료", state="complete")
-                        else:
-                            results['error'] = "음성 인식에 실패했습니다."
-                            stt_status.update(label="❌ 음성 인식 실패", state="error")
-                            return results
-                else:
-                    results['error'] = "오디오 다운로드에 실패했습니다."
-                    status.update(label="❌ 오디오 다운로드 실패", state="error")
-                    return results
+        with st.status("🎤 오디오 스트리밍 음성 인식 중...", expanded=True) as status:
+            duration = results['metadata'].get('duration') or 0
+            progress = st.progress(0.0)
+
+            def on_progress(seconds: float):
+                if duration:
+                    progress.progress(min(seconds / duration, 1.0))
+
+            transcribed = None
+            stream = audio_stream(video_id)
+            if stream:
+                url, headers = stream
+                transcribed = transcribe_audio_stream(url, api_key, headers, on_progress=on_progress)
+
+            if transcribed is None:
+                # Direct stream unavailable or rejected: download the file, then transcribe it
+                st.write("⚠️ 스트리밍 실패 - 오디오 파일 다운로드 후 재시도")
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    audio_path = download_audio(video_id, temp_dir)
+                    if not audio_path:
+                        results['error'] = "오디오 다운로드에 실패했습니다."
+                        status.update(label="❌ 오디오 다운로드 실패", state="error")
+                        return results
+                    transcribed = transcribe_audio_stream(audio_path, api_key, on_progress=on_progress)
+
+            if transcribed:
+                results['transcript'], results['segments'] = transcribed
+                results['source'] = 'whisper'
+                progress.progress(1.0)
+                st.write(f"✅ 음성 인식 완료 ({len(results['transcript']):,}자)")
+                status.update(label="✅ 음성 인식 완료", state="complete")
+            else:
+                results['error'] = "음성 인식에 실패했습니다."
+                status.update(label="❌ 음성 인식 실패", state="error")
+                return results
     
     # Step 3 & 4: Chunk and summarize
     if results['transcript']:
         with st.status("🤖 AI 분석 중...", expanded=True) as status:
-            # Initialize LLM
-            llm = ChatGroq(
-                groq_api_key=api_key,
-                model_name="llama-3.3-70b-versatile",
-                temperature=0.3,
-                max_tokens=4096
-            )
+            # Shared LLM clients (keep their connection pools across runs):
+            # small model for the per-chunk map step, large one for the final analysis
+            map_llms = get_tier_llms(api_key, "fast")
+            reduce_llms = get_tier_llms(api_key, "quality")
             
             # Chunk the text
-            chunks = chunk_text(results['transcript'])
+            chunks = chunk_text(results['transcript'], segments=results['segments'])
             st.write(f"📄 텍스트를 {len(chunks)}개 청크로 분할")
             
             if len(chunks) == 1:
                 # Short video - direct summarization
                 st.write("🔄 단일 요약 진행 중...")
-                summary_result = final_summarize([results['transcript']], llm)
+                summary_result = final_summarize([results['transcript']], reduce_llms)
             else:
                 # Long video - Map-Reduce
                 st.write("🔄 Map-Reduce 요약 진행 중...")
-                chunk_summaries = []
-                
                 progress_bar = st.progress(0)
-                for i, chunk in enumerate(chunks):
-                    chunk_summary = summarize_chunk(chunk, i+1, len(chunks), llm)
-                    chunk_summaries.append(chunk_summary)
-                    progress_bar.progress((i + 1) / len(chunks))
+                chunk_summaries = map_summarize(
+                    chunks,
+                    map_llms,
+                    max_concurrency,
+                    on_progress=lambda done, total: progress_bar.progress(done / total),
+                )
                 
-                summary_result = final_summarize(chunk_summaries, llm)
+                summary_result = final_summarize(chunk_summaries, reduce_llms)
             
             results['summary'] = summary_result
             st.write("✅ AI 분석 완료!")
@@ -412,6 +982,26 @@ def main():
         else:
             st.warning("⚠️ API Key를 입력해주세요")
         
+        max_concurrency = st.slider(
+            "동시 요약 요청 수",
+            min_value=1,
+            # Widen the range so a larger MAP_CONCURRENCY is still a valid default
+            max_value=max(16, MAP_CONCURRENCY),
+            value=max(1, MAP_CONCURRENCY),
+            help="긴 영상의 청크를 동시에 요약하는 개수입니다. Groq 요청 한도에 맞게 조절하세요."
+        )
+        
+        store = get_transcript_store()
+        st.caption(f"📦 자막 캐시: 적중 {store.hits} / 미스 {store.misses}")
+        latency = get_tier_latency()
+        for tier, stats in latency.summary().items():
+            st.caption(
+                f"⏱️ {tier} ({MODEL_TIERS[tier][0]}): {stats['calls']}회, "
+                f"p50 {stats['p50_ms']:.0f}ms / p95 {stats['p95_ms']:.0f}ms"
+            )
+        if latency.fallbacks:
+            st.caption(f"🔀 대체 모델 전환: {latency.fallbacks}회")
+        
         st.divider()
         
         st.markdown("""
@@ -423,8 +1013,8 @@ def main():
         
         ### 🚀 처리 순서
         1. 자막 추출 시도
-        2. (자막 없으면) 오디오 다운로드
-        3. Whisper로 음성 인식
+        2. (자막 없으면) 오디오를 받으면서 구간별로
+        3. Whisper 병렬 음성 인식
         4. LLM으로 요약 생성
         """)
     
@@ -459,7 +1049,7 @@ def main():
             return
         
         # Process the video
-        results = process_video(video_id, api_key)
+        results = process_video(video_id, api_key, max_concurrency)
         
         if results['error']:
             st.error(f"❌ 오류: {results['error']}")
@@ -481,6 +1071,10 @@ def main():
                 duration_mins = results['metadata']['duration'] // 60
                 duration_secs = results['metadata']['duration'] % 60
                 source_label = "📝 자막" if results['source'] == 'subtitle' else "🎤 Whisper STT"
+                if results['track']:
+                    track = results['track']
+                    source_label += f" ({track['language']}"
+                    source_label += ", 자동 생성)" if track['is_generated'] else ")"
                 
                 st.markdown(f"""
                 - ⏱️ **길이**: {duration_mins}분 {duration_secs}초